@@ -0,0 +1,75 @@
+from abaqus import *
+from abaqusConstants import *
+import json
+import os
+import sys
+import time
+
+from tct_params import load_designs, material_key
+from tct_simulation import build_model
+
+
+def generate_batch(designs, output_dir='.', cae_path=None, keep_models=False, report_file='batch_report.json'):
+    """
+    Build many design variants inside one CAE kernel session and write their input files.
+
+    The kernel start-up and Abaqus module imports are paid once for the whole
+    batch, and designs that share material parameters copy the material
+    definitions of the first model that created them.
+
+    Parameters:
+        designs (list): Named parameter records (see sweep.name_designs).
+        output_dir (str): Directory receiving <job>.inp for every design.
+        cae_path (str): Optional .cae saving all models of the batch.
+        keep_models (bool): Keep every model in the session; otherwise each model and job is
+            deleted once its input file is written (required for large batches without cae_path).
+        report_file (str): JSON report with the per-design build and write times, in output_dir.
+
+    Returns:
+        list: Per-design report dicts.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    keep_models = keep_models or cae_path is not None
+    material_models = {}  # material key -> model name holding those materials
+    report = []
+    cwd = os.getcwd()
+    os.chdir(output_dir)
+    try:
+        for params in designs:
+            model_name = params['MODEL_NAME']
+            job_name = params['JOB_NAME']
+            start = time.perf_counter()
+            key = material_key(params)
+            source_name = material_models.get(key)
+            source = mdb.models[source_name] if source_name in mdb.models.keys() else None
+            build_model(params, model_name, material_source=source)
+            if source is None:
+                material_models[key] = model_name
+            built = time.perf_counter()
+            mdb.jobs[job_name].writeInput(consistencyChecking=OFF)
+            written = time.perf_counter()
+
+            report.append({'model': model_name, 'job': job_name, 'build_time': built - start,
+                           'write_time': written - built, 'materials_copied': source is not None})
+            print(f"{model_name}: built in {built - start:.2f} s, input written in {written - built:.2f} s")
+
+            if not keep_models and model_name not in material_models.values():
+                del mdb.jobs[job_name]
+                del mdb.models[model_name]
+
+        if cae_path is not None:
+            mdb.saveAs(pathName=os.path.abspath(os.path.join(cwd, cae_path)))
+        with open(report_file, 'w') as f:
+            json.dump(report, f, indent=1)
+    finally:
+        os.chdir(cwd)
+    return report
+
+
+if __name__ == "__main__":
+    # abaqus cae noGUI=batch_generate.py -- designs.json [output_dir] [batch.cae]
+    args = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else ['designs.json']
+    designs = load_designs(args[0])
+    output_dir = args[1] if len(args) > 1 else '.'
+    cae_path = args[2] if len(args) > 2 else None
+    generate_batch(designs, output_dir, cae_path)
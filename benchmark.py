@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from damage_front import analyze
+from extract_failed_elements import save_initial_coordinates, scan_failed_elements
+from instrumentation import Tracer
+from odb_reader import SyntheticOdbReader
+from result_files import join_results, read_centroids, read_failures
+from tct_params import DEFAULT_PARAMS, make_params
+from via_mesh import via_mesh
+
+# Synthetic CU grids (elements per axis) and frames of the post-processing cases, smallest first
+SIZES = {'1k': ((10, 10, 10), 51), '8k': ((20, 20, 20), 51), '64k': ((40, 40, 40), 51)}
+# Seed divisors of the generated via meshes per size
+MESH_REFINEMENT = {'1k': 1.0, '8k': 2.0, '64k': 4.0}
+
+# Throughput metrics compared with the history, higher is better
+METRICS = ('elements_per_s', 'frames_per_s')
+
+
+def _case_initial_coordinates(reader, workdir, params, state):
+    path = os.path.join(workdir, 'initial_coordinates.txt')
+    save_initial_coordinates(reader, path)
+    state['coordinates'] = path
+    return {'elements': reader.meshes['CU'][2].size}
+
+
+def _case_scan_failed_elements(reader, workdir, params, state):
+    path = os.path.join(workdir, 'failed_elements.txt')
+    scan_failed_elements(reader, path)
+    state['failures'] = path
+    frames = sum(reader.frame_count(step_name) for step_name in reader.step_names())
+    return {'elements': reader.meshes['CU'][2].size * frames, 'frames': frames}
+
+
+def _case_parse_results(reader, workdir, params, state):
+    centroids = read_centroids(state['coordinates'], cache=False)
+    state['joined'] = join_results(centroids, read_failures(state['failures'], cache=False))
+    return {'elements': centroids.size}
+
+
+def _case_damage_front(reader, workdir, params, state):
+    joined = state['joined']
+    analyze(params, joined['label'], np.column_stack([joined['x'], joined['y'], joined['z']]), joined['time'])
+    return {'elements': joined.size}
+
+
+def _case_via_mesh(reader, workdir, params, state):
+    cu, si = via_mesh(params)
+    return {'elements': cu.all_element_labels().size + si.all_element_labels().size}
+
+
+# Benchmark cases in run order; each gets (reader, workdir, params, state) and returns its work counts
+# (elements, and frames for frame scans, where elements counts element-frames). Later cases read what
+# earlier ones left in state.
+CASES = {
+    'initial_coordinates': _case_initial_coordinates,
+    'scan_failed_elements': _case_scan_failed_elements,
+    'parse_results': _case_parse_results,
+    'damage_front': _case_damage_front,
+    'via_mesh': _case_via_mesh,
+}
+
+
+def code_version():
+    """Short git commit of the scripts (with '+' if the tree has changes), 'unknown' outside git."""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=directory,
+                                         stderr=subprocess.DEVNULL, text=True).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=directory,
+                                        stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('+' if dirty else '')
+
+
+def run_benchmarks(sizes=tuple(SIZES), cases=tuple(CASES), repeats=3, memory=False):
+    """
+    Time every case on synthetic ODBs and generated meshes of increasing size.
+
+    Every case runs repeats times per size inside a Tracer span; the fastest
+    run counts. With memory the spans also record the peak Python allocation
+    (tracemalloc slows the timed code, so compare such runs only with each other).
+
+    Returns:
+        dict: case -> size -> seconds, elements_per_s, frames_per_s (cases that read frames) and
+            peak_bytes (with memory).
+    """
+    tracer = Tracer(enabled=True, memory=memory)
+    results = {}
+    for size in sizes:
+        grid, n_frames = SIZES[size]
+        reader = SyntheticOdbReader({'CU': grid}, {'TCTCondition': n_frames})
+        seed = DEFAULT_PARAMS['CONTACT_SEED'] / MESH_REFINEMENT[size]
+        params = make_params(CONTACT_SEED=seed, MESH_SIZE=DEFAULT_PARAMS['MESH_SIZE'] / MESH_REFINEMENT[size])
+        workdir = tempfile.mkdtemp(prefix='tct_benchmark_')
+        state = {}
+        try:
+            for case in cases:
+                runs = []
+                for _ in range(repeats):
+                    with tracer.span(case, size=size) as record:
+                        counts = CASES[case](reader, workdir, params, state)
+                    runs.append(record)
+                best = min(runs, key=lambda record: record['seconds'])
+                entry = {'seconds': best['seconds'],
+                         'elements_per_s': counts['elements'] / best['seconds']}
+                if 'frames' in counts:
+                    entry['frames_per_s'] = counts['frames'] / best['seconds']
+                if memory:
+                    entry['peak_bytes'] = max(record['peak_bytes'] for record in runs)
+                results.setdefault(case, {})[size] = entry
+                print(f"{case} [{size}]: {best['seconds']:.3f} s, {entry['elements_per_s']:.3g} elements/s"
+                      + (f", {entry['frames_per_s']:.1f} frames/s" if 'frames_per_s' in entry else ''))
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def load_history(path='benchmark_history.jsonl'):
+    """Benchmark records of earlier runs, oldest first ([] if there is no history)."""
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(record, path='benchmark_history.jsonl'):
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def find_regressions(results, history, threshold=0.2, window=5, host=None):
+    """
+    Throughputs that dropped against the recent history.
+
+    The baseline of a metric is the median of the last window records of
+    the same host that have it; a result more than threshold below its
+    baseline is a regression.
+
+    Returns:
+        list: Dicts with case, size, metric, value, baseline and change (relative), worst first.
+    """
+    host = host or platform.node()
+    earlier = [record for record in history if record.get('host') == host]
+    regressions = []
+    for case, by_size in results.items():
+        for size, entry in by_size.items():
+            for metric in METRICS:
+                if metric not in entry:
+                    continue
+                previous = [record['results'][case][size][metric] for record in earlier
+                            if metric in record['results'].get(case, {}).get(size, {})][-window:]
+                if not previous:
+                    continue
+                baseline = statistics.median(previous)
+                change = entry[metric] / baseline - 1.0
+                if change < -threshold:
+                    regressions.append({'case': case, 'size': size, 'metric': metric, 'value': entry[metric],
+                                        'baseline': baseline, 'change': change})
+    return sorted(regressions, key=lambda regression: regression['change'])
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark post-processing throughput and flag regressions.")
+    parser.add_argument('--sizes', default=','.join(SIZES), help=f"Comma separated sizes of {tuple(SIZES)}")
+    parser.add_argument('--cases', default=','.join(CASES))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--memory', action='store_true', help="Record the peak Python allocation per case")
+    parser.add_argument('--history', default='benchmark_history.jsonl')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    parser.add_argument('--no-record', action='store_true', help="Do not append this run to the history")
+    args = parser.parse_args()
+
+    results = run_benchmarks(tuple(args.sizes.split(',')), tuple(args.cases.split(',')), args.repeats, args.memory)
+    record = {'version': code_version(), 'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'host': platform.node(),
+              'python': platform.python_version(), 'numpy': np.__version__, 'memory': args.memory,
+              'results': results}
+    # Memory-traced runs are slower; compare them only with each other
+    history = [entry for entry in load_history(args.history) if entry.get('memory', False) == args.memory]
+    regressions = find_regressions(results, history, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['case']} [{regression['size']}] {regression['metric']}: "
+              f"{regression['value']:.3g} vs {regression['baseline']:.3g} ({regression['change']:+.0%})")
+    if not args.no_record:
+        append_history(record, args.history)
+    sys.exit(1 if regressions else 0)
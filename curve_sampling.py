@@ -0,0 +1,125 @@
+import sys
+import time
+
+import numpy as np
+from scipy.interpolate import CubicSpline
+
+INTERPOLATIONS = ('linear', 'spline')
+
+# Positions inside every interval where the interpolation error is checked
+CHECK_POSITIONS = (0.25, 0.5, 0.75)
+
+
+def _interpolant(x, y, interpolation):
+    if interpolation == 'linear' or x.size < 3:
+        return lambda t: np.interp(t, x, y)
+    return CubicSpline(x, y, bc_type='natural')
+
+
+def interval_errors(f, x, y, interpolation='linear', positions=CHECK_POSITIONS):
+    """
+    Largest interpolation error inside every interval of the samples.
+
+    Parameters:
+        f (callable): Vectorized curve.
+        x, y (np.ndarray): Samples, x increasing.
+        interpolation (str): 'linear' (tables read by linear interpolation, e.g. *Plastic) or
+            'spline' (natural cubic spline through the points, e.g. a sketch Spline).
+        positions (tuple): Relative positions checked inside every interval.
+
+    Returns:
+        np.ndarray: Error per interval (n - 1,).
+    """
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation {interpolation!r}, expected one of {INTERPOLATIONS}")
+    t = x[:-1, None] + np.asarray(positions)[None, :] * np.diff(x)[:, None]
+    return np.abs(f(t) - _interpolant(x, y, interpolation)(t)).max(axis=1)
+
+
+def adaptive_samples(f, a, b, tolerance, interpolation='linear', initial=3, max_points=10000, breakpoints=()):
+    """
+    Fewest samples of a curve on [a, b] whose interpolation stays within tolerance.
+
+    Starts from initial equally spaced points (plus breakpoints, e.g. kinks
+    of a piecewise curve) and bisects every interval whose error at the
+    CHECK_POSITIONS exceeds tolerance, all intervals of a pass at once. Stops
+    when no interval exceeds tolerance or at max_points.
+
+    Parameters:
+        f (callable): Vectorized curve y = f(x).
+        a, b (float): Interval.
+        tolerance (float): Maximum absolute error of the interpolation, in units of y.
+        interpolation (str): See interval_errors.
+        initial (int): Equally spaced starting points.
+        max_points (int): Upper bound of the number of samples.
+        breakpoints (tuple): Points always sampled.
+
+    Returns:
+        tuple: (x, y) arrays of the samples, x increasing from a to b.
+    """
+    x = np.unique(np.concatenate([np.linspace(a, b, max(initial, 2)),
+                                  [point for point in breakpoints if a < point < b]]))
+    y = f(x)
+    while x.size < max_points:
+        errors = interval_errors(f, x, y, interpolation)
+        split = errors > tolerance
+        if not split.any():
+            break
+        # Bisect the worst intervals first when the budget runs out
+        budget = max_points - x.size
+        if split.sum() > budget:
+            split = np.zeros_like(split)
+            split[np.argsort(-errors)[:budget]] = True
+        midpoints = 0.5 * (x[:-1] + x[1:])[split]
+        order = np.argsort(np.concatenate([x, midpoints]), kind='stable')
+        x = np.concatenate([x, midpoints])[order]
+        y = np.concatenate([y, f(midpoints)])[order]
+    return x, y
+
+
+def max_error(f, x, y, interpolation='linear', n_check=20001):
+    """Largest interpolation error of samples on a dense uniform grid plus the interval checks."""
+    t = np.linspace(x[0], x[-1], n_check)
+    dense = float(np.abs(f(t) - _interpolant(x, y, interpolation)(t)).max())
+    return max(dense, float(interval_errors(f, x, y, interpolation).max()) if x.size > 1 else 0.0)
+
+
+def compare_sampling(f, a, b, n_uniform, tolerance, interpolation='linear', breakpoints=()):
+    """
+    Uniform sampling with n_uniform points against adaptive_samples at tolerance.
+
+    Returns:
+        dict: Points, maximum error and sampling time in seconds of both, uniform_* and adaptive_*.
+    """
+    start = time.perf_counter()
+    x = np.linspace(a, b, n_uniform)
+    y = f(x)
+    uniform_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    x_adaptive, y_adaptive = adaptive_samples(f, a, b, tolerance, interpolation, breakpoints=breakpoints)
+    adaptive_seconds = time.perf_counter() - start
+    return {
+        'uniform_points': int(x.size), 'uniform_error': max_error(f, x, y, interpolation),
+        'uniform_seconds': uniform_seconds,
+        'adaptive_points': int(x_adaptive.size),
+        'adaptive_error': max_error(f, x_adaptive, y_adaptive, interpolation),
+        'adaptive_seconds': adaptive_seconds,
+    }
+
+
+# Example usage
+if __name__ == "__main__":
+    # python curve_sampling.py [params.json]
+    from tct_params import DEFAULT_PARAMS, load_params, plastic_curve, radius_function
+    params = load_params(sys.argv[1]) if len(sys.argv) > 1 else dict(DEFAULT_PARAMS)
+    curves = {
+        'P_TABLE_CU': (plastic_curve(params), 0.0, params['P_EPS_MAX'], params['P_POINTS'],
+                       params['P_TOLERANCE'] or 0.5, 'linear'),
+        'Via profile': (radius_function(params), 0.0, params['Y_SI'], params['PROFILE_POINTS'],
+                        params['PROFILE_TOLERANCE'] or 1e-3, 'spline'),
+    }
+    for name, (f, a, b, n_uniform, tolerance, interpolation) in curves.items():
+        report = compare_sampling(f, a, b, n_uniform, tolerance, interpolation)
+        print(f"{name}: {report['uniform_points']} uniform points (max error {report['uniform_error']:.3g}) -> "
+              f"{report['adaptive_points']} adaptive points (max error {report['adaptive_error']:.3g}, "
+              f"tolerance {tolerance:g}), sampled in {report['adaptive_seconds'] * 1e3:.2f} ms")
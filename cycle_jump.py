@@ -0,0 +1,257 @@
+import json
+import math
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from inp_writer import write_inp
+from odb_reader import frame_total_times, open_reader
+from sweep import SOLVE_COMMAND, job_fields
+from tct_params import DEFAULT_PARAMS, load_params, make_params
+
+
+def element_values(reader, step_name, index, field_name, instance):
+    """
+    Per-element maximum of a field over its integration points.
+
+    Returns:
+        tuple: (sorted element labels, values)
+    """
+    blocks = [(labels, data) for _, labels, data in reader.field_blocks(step_name, index, field_name, instance)]
+    if not blocks:
+        return np.zeros(0, dtype=np.int64), np.zeros(0)
+    labels = np.concatenate([labels for labels, _ in blocks])
+    values = np.concatenate([data.max(axis=1) for _, data in blocks]).astype(np.float64)
+    unique, inverse = np.unique(labels, return_inverse=True)
+    result = np.full(unique.size, -np.inf)
+    np.maximum.at(result, inverse, values)
+    return unique, result
+
+
+def cycle_end_states(reader, cycle_time, n_cycles, instance, fields):
+    """
+    Field values at the start of the analysis and at the end of every cycle.
+
+    Takes the last frame at or before each cycle boundary, so the output
+    frequency must put frames on (or close before) the boundaries.
+
+    Returns:
+        tuple: (element labels, {field: array (n_cycles + 1, n_elements)})
+    """
+    frames = frame_total_times(reader)
+    times = np.array([frame[2] for frame in frames])
+    labels = None
+    states = {field: [] for field in fields}
+    for cycle in range(n_cycles + 1):
+        position = int(np.searchsorted(times, cycle * cycle_time * (1 + 1e-9), side='right')) - 1
+        step_name, index, _ = frames[max(position, 0)]
+        for field in fields:
+            field_labels, values = element_values(reader, step_name, index, field, instance)
+            if labels is None:
+                labels = field_labels
+            elif not np.array_equal(labels, field_labels):
+                # Removed elements can drop out of later frames; align on the first frame's labels
+                aligned = np.zeros(labels.size)
+                aligned[np.isin(labels, field_labels)] = values[np.isin(field_labels, labels)]
+                values = aligned
+            states[field].append(values)
+    return labels, {field: np.array(rows) for field, rows in states.items()}
+
+
+def relative_change(previous, last):
+    """Largest change between two per-cycle increments, relative to the largest last increment."""
+    scale = np.abs(last).max() if last.size else 0.0
+    if scale == 0:
+        return 0.0
+    return float(np.abs(last - previous).max() / scale)
+
+
+def abaqus_solve(params, initial_state, directory, command=SOLVE_COMMAND):
+    """
+    Write the deck of one block with inp_writer and run the solver on it.
+
+    Returns:
+        str: Path of the resulting ODB.
+    """
+    job = params['JOB_NAME']
+    os.makedirs(directory, exist_ok=True)
+    write_inp(os.path.join(directory, f"{job}.inp"), params, initial_state=initial_state)
+    fields = job_fields(params)
+    with open(os.path.join(directory, 'solve.log'), 'w') as log:
+        code = subprocess.call([part.format(**fields) for part in command], cwd=directory, stdout=log,
+                               stderr=subprocess.STDOUT, shell=sys.platform == 'win32')
+    if code != 0:
+        raise RuntimeError(f"Solver failed on {job} with exit code {code}")
+    return os.path.join(directory, f"{job}.odb")
+
+
+class CycleJumpDriver:
+    """
+    Predict fatigue life by alternating short simulated blocks with extrapolated cycle jumps.
+
+    Every block simulates cycles_per_block cycles, restarting from the carried
+    plastic state (PEEQ, as *Initial Conditions, type=HARDENING) with the
+    failed elements removed. Once the per-cycle increments of PEEQ and damage
+    change by less than tolerance between the last two cycles of a block, the
+    damage is extrapolated linearly over a jump of skipped cycles, limited so
+    no element gains more than damage_step in one jump.
+
+    Abaqus cannot initialize its ductile damage variables, so each block
+    starts with zero damage; the driver accumulates the damage of every block
+    and jump itself, and an element fails once its accumulated damage reaches
+    failure_damage.
+
+    Parameters:
+        params (dict): Parameter record of the design; TOTAL_CYCLES is replaced per block.
+        solve (callable): solve(block_params, initial_state, directory) -> ODB path or OdbReader;
+            default abaqus_solve. initial_state is None for the first block.
+        instance (str): Deck instance whose elements can fail (read from the ODB upper-cased).
+        damage_field (str): Damage field output accumulated over the blocks (e.g. 'SDEG' or 'DUCTCRT').
+        plastic_field (str): Plastic strain field output carried between blocks.
+        cycles_per_block (int): Simulated cycles per block (at least 2 to detect stabilization).
+        tolerance (float): Stabilization tolerance on the relative change of per-cycle increments.
+        max_jump (int): Maximum number of cycles skipped in one jump.
+        damage_step (float): Maximum damage added to any element in one jump.
+        failure_damage (float): Accumulated damage at which an element fails.
+        target_cycles (int): Stop once this many cycles are covered.
+        stop_count (int): Stop once this many elements have failed.
+        workdir (str): Directory receiving one sub-directory per block and cycle_jump.json.
+    """
+
+    def __init__(self, params, solve=abaqus_solve, instance='Cu', damage_field='SDEG', plastic_field='PEEQ',
+                 cycles_per_block=3, tolerance=0.05, max_jump=50, damage_step=0.2, failure_damage=1.0,
+                 target_cycles=1000, stop_count=1, workdir='cycle_jump'):
+        if cycles_per_block < 2:
+            raise ValueError("cycles_per_block must be at least 2 to detect stabilization")
+        self.params = params
+        self.solve = solve
+        self.instance = instance
+        self.damage_field = damage_field
+        self.plastic_field = plastic_field
+        self.cycles_per_block = cycles_per_block
+        self.tolerance = tolerance
+        self.max_jump = max_jump
+        self.damage_step = damage_step
+        self.failure_damage = failure_damage
+        self.target_cycles = target_cycles
+        self.stop_count = stop_count
+        self.workdir = workdir
+
+        self.cycle = 0  # Cycles covered, simulated and jumped
+        self.labels = None
+        self.peeq = None
+        self.damage = None
+        self.failure_cycle = None  # Fractional cycle of failure per element, NaN while alive
+        self.history = []
+
+    def initial_state(self):
+        if self.labels is None:
+            return None
+        failed = ~np.isnan(self.failure_cycle)
+        return {'instance': self.instance, 'labels': self.labels[~failed], 'peeq': self.peeq[~failed],
+                'removed': self.labels[failed]}
+
+    def _fail(self, start_damage, per_cycle, start_cycle, cycles):
+        """Mark alive elements whose damage crosses failure_damage within the next cycles."""
+        alive = np.isnan(self.failure_cycle)
+        crossing = alive & (start_damage + per_cycle * cycles >= self.failure_damage) & (per_cycle > 0)
+        self.failure_cycle[crossing] = start_cycle + (self.failure_damage - start_damage[crossing]) / \
+            per_cycle[crossing]
+
+    def run_block(self, number):
+        """Simulate one block, accumulate its damage and extrapolate if it has stabilized."""
+        block_params = make_params(self.params, TOTAL_CYCLES=self.cycles_per_block,
+                                   JOB_NAME=f"{self.params['JOB_NAME']}_B{number:03d}")
+        directory = os.path.join(self.workdir, block_params['JOB_NAME'])
+        reader = open_reader(self.solve(block_params, self.initial_state(), directory))
+        try:
+            labels, states = cycle_end_states(reader, self.params['CYCLE_TIME'], self.cycles_per_block,
+                                              self.instance.upper(), (self.plastic_field, self.damage_field))
+        finally:
+            reader.close()
+        if self.labels is None:
+            self.labels = labels
+            self.peeq = np.zeros(labels.size)
+            self.damage = np.zeros(labels.size)
+            self.failure_cycle = np.full(labels.size, np.nan)
+        rows = np.searchsorted(self.labels, labels)
+        alive = np.isnan(self.failure_cycle[rows])
+        rows, plastic, damage = rows[alive], states[self.plastic_field][:, alive], states[self.damage_field][:, alive]
+
+        # Damage simulated in the block, cycle by cycle
+        damage_increments = np.diff(damage, axis=0)
+        for cycle, increment in enumerate(damage_increments):
+            start = self.damage.copy()
+            self.damage[rows] += increment
+            per_cycle = np.zeros(self.labels.size)
+            per_cycle[rows] = increment
+            self._fail(start, per_cycle, self.cycle + cycle, 1)
+        self.peeq[rows] = plastic[-1]
+        self.cycle += self.cycles_per_block
+
+        plastic_increments = np.diff(plastic, axis=0)
+        change = max(relative_change(plastic_increments[-2], plastic_increments[-1]),
+                     relative_change(damage_increments[-2], damage_increments[-1]))
+        jump = 0
+        if change < self.tolerance:
+            alive = np.isnan(self.failure_cycle[rows])
+            rate = np.clip(damage_increments[-1], 0, None)
+            largest = rate[alive].max() if alive.any() else 0.0
+            jump = min(self.max_jump, self.target_cycles - self.cycle)
+            if largest > 0:
+                jump = min(jump, int(math.floor(self.damage_step / largest)))
+            jump = max(jump, 0)
+        if jump:
+            per_cycle = np.zeros(self.labels.size)
+            per_cycle[rows] = rate
+            self._fail(self.damage, per_cycle, self.cycle, jump)
+            self.damage += per_cycle * jump
+            self.peeq[rows] += np.clip(plastic_increments[-1], 0, None) * jump
+            self.cycle += jump
+
+        entry = {'block': number, 'job': block_params['JOB_NAME'], 'simulated': self.cycles_per_block,
+                 'jump': jump, 'cycle': self.cycle, 'change': change, 'stabilized': change < self.tolerance,
+                 'max_damage': float(self.damage.max()) if self.damage.size else 0.0,
+                 'n_failed': int((~np.isnan(self.failure_cycle)).sum())}
+        self.history.append(entry)
+        print(f"Block {number}: simulated {self.cycles_per_block}, jumped {jump}, cycle {self.cycle}, "
+              f"change {change:.3g}, max damage {entry['max_damage']:.3g}, failed {entry['n_failed']}")
+        return entry
+
+    def run(self):
+        """
+        Alternate blocks and jumps until stop_count elements failed or target_cycles are covered.
+
+        Returns:
+            dict: cycles covered, simulated cycles, life (fractional cycle of the stop_count-th
+                failure, or None), failures {label: cycle} and the per-block history.
+        """
+        os.makedirs(self.workdir, exist_ok=True)
+        number = 0
+        while self.cycle < self.target_cycles:
+            entry = self.run_block(number)
+            number += 1
+            if entry['n_failed'] >= self.stop_count:
+                break
+        failed = ~np.isnan(self.failure_cycle)
+        failure_cycles = np.sort(self.failure_cycle[failed])
+        result = {
+            'cycles': self.cycle,
+            'simulated_cycles': number * self.cycles_per_block,
+            'life': float(failure_cycles[self.stop_count - 1]) if failure_cycles.size >= self.stop_count else None,
+            'failures': {int(label): float(cycle) for label, cycle in zip(self.labels[failed].tolist(),
+                                                                          self.failure_cycle[failed].tolist())},
+            'history': self.history,
+        }
+        with open(os.path.join(self.workdir, 'cycle_jump.json'), 'w') as f:
+            json.dump(result, f, indent=1)
+        return result
+
+
+# Example usage
+if __name__ == "__main__":
+    params = load_params(sys.argv[1]) if len(sys.argv) > 1 else dict(DEFAULT_PARAMS)
+    result = CycleJumpDriver(params).run()
+    print(f"Covered {result['cycles']} cycles with {result['simulated_cycles']} simulated, life: {result['life']}")
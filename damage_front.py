@@ -0,0 +1,213 @@
+import json
+import sys
+
+import numpy as np
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from result_files import join_results, read_centroids, read_failures
+from tct_params import DEFAULT_PARAMS, load_params, radius_function
+
+
+def cylindrical(centroids):
+    """Radius from the via axis (y) and axial position of centroids (m, 3)."""
+    centroids = np.asarray(centroids, dtype=np.float64)
+    return np.hypot(centroids[:, 0], centroids[:, 2]), centroids[:, 1]
+
+
+def interface_distance(params, centroids):
+    """
+    Distance of centroids from the Cu/Si side wall r = r_CU(y) of the Lagrange profile.
+
+    The radial gap r_CU(y) - r is scaled by the cosine of the wall slope,
+    which is the normal distance for a wall that is straight on the scale of
+    the gap. Positive inside the via, negative in Si.
+
+    Returns:
+        np.ndarray: Distances (m,).
+    """
+    r, y = cylindrical(centroids)
+    profile = radius_function(params)
+    slope = np.polyder(profile)(y)
+    return (profile(y) - r) / np.sqrt(1.0 + slope ** 2)
+
+
+def neighbor_spacing(tree):
+    """Median distance between a centroid and its nearest neighbour."""
+    if tree.n < 2:
+        return 0.0
+    distances, _ = tree.query(tree.data, k=2)
+    return float(np.median(distances[:, 1]))
+
+
+def failure_clusters(centroids, radius):
+    """
+    Group failed elements whose centroids are within radius of each other.
+
+    Parameters:
+        centroids (np.ndarray): Centroids of the failed elements (n, 3).
+        radius (float): Linking distance, e.g. 1.5 times the neighbour spacing.
+
+    Returns:
+        tuple: (cluster index per element (n,), cluster sizes, largest first)
+    """
+    n = len(centroids)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    pairs = cKDTree(centroids).query_pairs(radius, output_type='ndarray')
+    graph = coo_matrix((np.ones(len(pairs)), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, components = connected_components(graph, directed=False)
+    sizes = np.bincount(components)
+    # Renumber so cluster 0 is the largest
+    rank = np.empty(sizes.size, dtype=np.int64)
+    rank[np.argsort(-sizes, kind='stable')] = np.arange(sizes.size)
+    return rank[components], np.sort(sizes)[::-1]
+
+
+def failure_fronts(times, centroids, depth, windows):
+    """
+    Extent of the failed region at the end of every time window.
+
+    Cumulative minima and maxima over the failures sorted by time are
+    sampled at the window ends, so the cost is one sort.
+
+    Parameters:
+        times (np.ndarray): Failure time of every failed element (n,).
+        centroids (np.ndarray): Centroids of the failed elements (n, 3).
+        depth (np.ndarray): Interface distance of the failed elements (n,), see interface_distance.
+        windows (np.ndarray): Window end times, increasing.
+
+    Returns:
+        dict: Arrays per window end: time, n_failed, n_new, y_min, y_max, depth_max (deepest
+            failure from the interface) and r_min (innermost failure radius); NaN before the first failure.
+    """
+    order = np.argsort(times, kind='stable')
+    times = np.asarray(times)[order]
+    r, y = cylindrical(np.asarray(centroids)[order])
+    depth = np.asarray(depth)[order]
+    windows = np.asarray(windows, dtype=np.float64)
+    counts = np.searchsorted(times, windows, side='right')
+    fronts = {'time': windows, 'n_failed': counts, 'n_new': np.diff(np.concatenate([[0], counts]))}
+    for key, values, accumulate in (('y_min', y, np.minimum), ('y_max', y, np.maximum),
+                                    ('depth_max', depth, np.maximum), ('r_min', r, np.minimum)):
+        if values.size:
+            running = accumulate.accumulate(values)[np.maximum(counts - 1, 0)]
+            fronts[key] = np.where(counts > 0, running, np.nan)
+        else:
+            fronts[key] = np.full(windows.size, np.nan)
+    return fronts
+
+
+def growth_rates(fronts):
+    """
+    Speed of the failure fronts between window ends.
+
+    Returns:
+        dict: Arrays per window end of the failure rate (elements per time), axial growth of
+            the failed extent (y_max - y_min) and radial growth into the via (depth_max).
+    """
+    t = fronts['time']
+    if t.size < 2:
+        return {'failure_rate': np.zeros(t.size), 'axial_rate': np.zeros(t.size), 'radial_rate': np.zeros(t.size)}
+    extent = np.nan_to_num(fronts['y_max'] - fronts['y_min'])
+    return {
+        'failure_rate': np.gradient(fronts['n_failed'].astype(np.float64), t),
+        'axial_rate': np.gradient(extent, t),
+        'radial_rate': np.gradient(np.nan_to_num(fronts['depth_max']), t),
+    }
+
+
+def damage_origin(params, times, centroids, depth, n_first=10, band=None):
+    """
+    Where damage starts: near the via top or bottom and at the interface or inside the via.
+
+    Parameters:
+        params (dict): Parameter record (Y0_CU gives the via ends).
+        times, centroids, depth: Failed elements as for failure_fronts.
+        n_first (int): Earliest failures taken into account.
+        band (float): Interface band width; default 10 % of the smallest via radius.
+
+    Returns:
+        dict: end ('top' or 'bottom'), y (mean axial position), at_interface (fraction of the first
+            failures within band of the wall).
+    """
+    if len(times) == 0:
+        return {'end': None, 'y': None, 'at_interface': None}
+    first = np.argsort(times, kind='stable')[:n_first]
+    y = float(np.asarray(centroids)[first, 1].mean())
+    bottom, top = min(params['Y0_CU']), max(params['Y0_CU'])
+    band = band if band is not None else 0.1 * min(params['R0_CU'])
+    return {'end': 'top' if abs(y - top) < abs(y - bottom) else 'bottom', 'y': y,
+            'at_interface': float((np.abs(np.asarray(depth)[first]) <= band).mean())}
+
+
+def analyze(params, labels, centroids, times, n_windows=20, link_factor=1.5, band=None):
+    """
+    Damage progression of one run.
+
+    Parameters:
+        params (dict): Parameter record of the design.
+        labels (np.ndarray): Labels of all elements of the instance (m,).
+        centroids (np.ndarray): Their centroids (m, 3).
+        times (np.ndarray): Their failure times (m,), NaN for elements that did not fail.
+        n_windows (int): Equal time windows from 0 to the last failure.
+        link_factor (float): Clusters link failed elements closer than link_factor times the
+            median neighbour spacing of all elements.
+        band (float): Interface band width (default: the neighbour spacing).
+
+    Returns:
+        dict: origin, fronts and growth rates per window, and clusters (count, sizes of the
+            largest, fraction of failed elements in the interface band, labels per cluster).
+    """
+    centroids = np.asarray(centroids, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    spacing = neighbor_spacing(cKDTree(centroids))
+    band = band if band is not None else spacing
+    failed = ~np.isnan(times)
+    failed_centroids = centroids[failed]
+    depth = interface_distance(params, failed_centroids)
+    end = float(times[failed].max()) if failed.any() else 0.0
+    fronts = failure_fronts(times[failed], failed_centroids, depth, np.linspace(0.0, end, n_windows + 1)[1:])
+    cluster, sizes = failure_clusters(failed_centroids, link_factor * spacing)
+    failed_labels = np.asarray(labels)[failed]
+    return {
+        'n_elements': int(len(labels)),
+        'n_failed': int(failed.sum()),
+        'spacing': spacing,
+        'origin': damage_origin(params, times[failed], failed_centroids, depth, band=band),
+        'fronts': fronts,
+        'rates': growth_rates(fronts),
+        'clusters': {
+            'count': int(sizes.size),
+            'sizes': sizes,
+            'interface_fraction': float((np.abs(depth) <= band).mean()) if depth.size else 0.0,
+            'labels': np.split(failed_labels[np.argsort(cluster, kind='stable')], np.cumsum(sizes)[:-1]),
+        },
+    }
+
+
+def _jsonable(value):
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, np.ndarray):
+        return [None if isinstance(item, float) and np.isnan(item) else item for item in value.tolist()]
+    return value
+
+
+# Example usage
+if __name__ == "__main__":
+    # python damage_front.py [params.json] -- reads initial_coordinates.txt and failed_elements.txt
+    params = load_params(sys.argv[1]) if len(sys.argv) > 1 else dict(DEFAULT_PARAMS)
+    joined = join_results(read_centroids('initial_coordinates.txt'), read_failures('failed_elements.txt'))
+    joined = joined[joined['instance'] == 'CU']
+    result = analyze(params, joined['label'], np.column_stack([joined['x'], joined['y'], joined['z']]),
+                     joined['time'])
+    print(f"{result['n_failed']} of {result['n_elements']} elements failed, damage starts at the "
+          f"{result['origin']['end']} (y = {result['origin']['y']})")
+    print(f"{result['clusters']['count']} clusters, largest {result['clusters']['sizes'][:5].tolist()}, "
+          f"{result['clusters']['interface_fraction']:.0%} of failures at the interface")
+    with open('damage_front.json', 'w') as f:
+        json.dump(_jsonable(result), f, indent=1)
@@ -1,98 +1,433 @@
-from odbAccess import *
+import json
 import os
 import sys
 
+import numpy as np
+
+from instrumentation import span, traced, write_trace
+from odb_reader import (build_label_index, lookup_rows, instance_node_arrays, instance_connectivity,
+                        open_reader)
+
+
+def centroids_from_arrays(node_labels, coords, connectivity, mask):
+    """
+    Compute element centroids from mesh arrays in one vectorized reduction.
+
+    Parameters:
+        node_labels (np.ndarray): Node labels (n,).
+        coords (np.ndarray): Node coordinates (n, 3).
+        connectivity (np.ndarray): Padded element connectivity by node label (m, k).
+        mask (np.ndarray): True where connectivity holds a real node (m, k).
+
+    Returns:
+        np.ndarray: Centroids (m, 3) float64.
+    """
+    rows = np.zeros(connectivity.shape, dtype=np.int64)
+    rows[mask] = lookup_rows(build_label_index(node_labels), connectivity[mask])
+    gathered = coords[rows] * mask[..., None]
+    return gathered.sum(axis=1) / mask.sum(axis=1)[:, None]
+
+
+# Faces of the supported solid topologies (0-based corner indices, Abaqus node order)
+ELEMENT_FACES = {
+    4: ((0, 1, 2), (0, 3, 1), (1, 3, 2), (2, 3, 0)),
+    6: ((0, 1, 2), (3, 5, 4), (0, 3, 4, 1), (1, 4, 5, 2), (2, 5, 3, 0)),
+    8: ((0, 1, 2, 3), (4, 7, 6, 5), (0, 4, 5, 1), (1, 5, 6, 2), (2, 6, 7, 3), (3, 7, 4, 0)),
+}
+
+
+def volumes_from_arrays(node_labels, coords, connectivity, mask, signed=False):
+    """
+    Compute element volumes from mesh arrays, vectorized per topology.
+
+    Each face is fanned into triangles around its center and every triangle
+    forms a tetrahedron with the element centroid, which handles warped
+    faces. Tetrahedra, wedges and hexahedra (4, 6 and 8 corner nodes) are
+    supported; other elements get NaN.
+
+    Parameters:
+        node_labels, coords, connectivity, mask: As for centroids_from_arrays.
+        signed (bool): Return signed volumes; elements with Abaqus node ordering are
+            positive, inverted elements negative.
+
+    Returns:
+        np.ndarray: Volumes (m,) float64.
+    """
+    rows = np.zeros(connectivity.shape, dtype=np.int64)
+    rows[mask] = lookup_rows(build_label_index(node_labels), connectivity[mask])
+    counts = mask.sum(axis=1)
+    volumes = np.full(connectivity.shape[0], np.nan)
+    for count, faces in ELEMENT_FACES.items():
+        selected = np.flatnonzero(counts == count)
+        if selected.size == 0:
+            continue
+        corners = coords[rows[selected, :count]]  # (e, count, 3)
+        center = corners.mean(axis=1)
+        volume = np.zeros(selected.size)
+        for face in faces:
+            points = corners[:, face]
+            face_center = points.mean(axis=1)
+            for a, b in zip(face, face[1:] + face[:1]):
+                edge_a = corners[:, a] - center
+                edge_b = corners[:, b] - center
+                volume += np.einsum('ij,ij->i', np.cross(edge_a, edge_b), face_center - center) / 6.0
+        # Abaqus face node order gives inward normals, so valid elements sum to a negative value
+        volumes[selected] = -volume if signed else np.abs(volume)
+    return volumes
+
+
+def element_centroids(instance):
+    """
+    Compute the centroid of every element of an instance in one vectorized pass.
+
+    Node labels are resolved through a label index, so meshes with
+    non-contiguous node numbering give correct centroids.
+
+    Parameters:
+        instance: ODB instance (or a stand-in with .nodes and .elements).
+
+    Returns:
+        tuple: (element labels (m,), centroids (m, 3) float64)
+    """
+    node_labels, coords = instance_node_arrays(instance)
+    element_labels, connectivity, mask = instance_connectivity(instance)
+    return element_labels, centroids_from_arrays(node_labels, coords, connectivity, mask)
+
+
+def write_initial_coordinates(f, instance_name, labels, centroids):
+    """Write centroid records of one instance in the initial_coordinates.txt format."""
+    f.writelines(f"Element: {label}, Instance: {instance_name}, Centroid: {centroid}\n"
+                 for label, centroid in zip(labels.tolist(), centroids.tolist()))
+
+
+@traced()
 def save_initial_coordinates(odb_path, output_file):
     """
     Save the initial coordinates of all elements in the ODB file, averaged to (x, y, z) format.
 
     Parameters:
-        odb_path (str): Path to the ODB file.
+        odb_path (str or OdbReader): Path to the ODB file, or an open reader.
         output_file (str): Path to the output text file.
     """
     # Open the ODB file
     print(f"Opening ODB file: {odb_path}")
-    odb = openOdb(path=odb_path)
+    reader = open_reader(odb_path)
 
     with open(output_file, 'w') as f:
         f.write("Initial Element Coordinates\n")
         f.write("================================\n")
 
-        for instance_name, instance in odb.rootAssembly.instances.items():
+        for instance_name in reader.instance_names():
             print(f"Processing instance: {instance_name}")
-            for element in instance.elements:
-                element_label = element.label
-                nodes = element.connectivity
-                node_coords = [list(instance.nodes[node - 1].coordinates) for node in nodes]
-                coordsum_x = 0.0
-                coordsum_y = 0.0
-                coordsum_z = 0.0
-                # Calculate centroid as the average of node coordinates
-                for coord in node_coords:
-                    coordsum_x = coord[0] + coordsum_x
-                    coordsum_y = coord[1] + coordsum_y
-                    coordsum_z = coord[2] + coordsum_z
-                centroidx = coordsum_x / len(node_coords)
-                centroidy = coordsum_y / len(node_coords)  
-                centroidz = coordsum_z / len(node_coords)
-                centroid = [centroidx, centroidy, centroidz]    
-
-                f.write(f"Element: {element_label}, Instance: {instance_name}, Centroid: {centroid}\n")
-
-    odb.close()
+            # Calculate centroids as the average of node coordinates
+            with span('instance_centroids', instance=instance_name) as record:
+                node_labels, coords, labels, connectivity, mask = reader.instance_mesh(instance_name)
+                centroids = centroids_from_arrays(node_labels, coords, connectivity, mask)
+                write_initial_coordinates(f, instance_name, labels, centroids)
+                if record is not None:
+                    record['attrs']['elements'] = int(labels.size)
+
+    if reader is not odb_path:
+        reader.close()
     print("Finished processing ODB file.")
 
-def extract_failed_elements(odb_path, output_file):
+
+class FailureScanner:
+    """
+    Single-pass tracker of element failures across frames.
+
+    Keeps a per-instance "still alive" mask indexed by element label and
+    records the time at which each element is first seen with STATUS == 0.
+    Elements that already failed cost nothing beyond the vectorized mask test.
     """
-    Extracts failed elements and their corresponding step time from an Abaqus ODB file.
-    Records only the first failure of each element.
+
+    def __init__(self):
+        self.alive = {}  # instance name -> bool array indexed by element label
+        self.failures = {}  # instance name -> list of (time, labels) chunks
+
+    def _alive_mask(self, instance_name, max_label):
+        alive = self.alive.get(instance_name)
+        if alive is None or alive.size <= max_label:
+            grown = np.ones(max(max_label + 1, 2 * (0 if alive is None else alive.size)), dtype=bool)
+            if alive is not None:
+                grown[:alive.size] = alive
+            self.alive[instance_name] = alive = grown
+        return alive
+
+    def update(self, time, instance_name, labels, status):
+        """
+        Feed one block of STATUS values and return the labels that failed for the first time.
+
+        Parameters:
+            time (float): Frame time of the block.
+            instance_name (str): Instance the labels belong to.
+            labels (array-like): Element labels of the block.
+            status (array-like): STATUS values, one per label.
+
+        Returns:
+            np.ndarray: Sorted labels of newly failed elements.
+        """
+        labels = np.asarray(labels, dtype=np.int64).ravel()
+        status = np.asarray(status).reshape(labels.size, -1)[:, 0]
+        if labels.size == 0:
+            return labels
+        alive = self._alive_mask(instance_name, int(labels.max()))
+        newly = np.unique(labels[(status == 0) & alive[labels]])
+        if newly.size:
+            alive[newly] = False
+            self.failures.setdefault(instance_name, []).append((time, newly))
+        return newly
+
+    def mark_failed(self, instance_name, labels):
+        """Mark labels as already failed without recording a time (e.g. when resuming)."""
+        labels = np.asarray(labels, dtype=np.int64).ravel()
+        if labels.size:
+            alive = self._alive_mask(instance_name, int(labels.max()))
+            alive[labels] = False
+
+    def first_failures(self):
+        """
+        Return the recorded first failures.
+
+        Returns:
+            dict: instance name -> (labels (n,), times (n,)) in order of failure.
+        """
+        result = {}
+        for instance_name, chunks in self.failures.items():
+            labels = np.concatenate([chunk for _, chunk in chunks])
+            times = np.concatenate([np.full(chunk.size, time, dtype=np.float64) for time, chunk in chunks])
+            result[instance_name] = (labels, times)
+        return result
+
+
+def select_frames(reader, step_name, frame_stride=1, time_window=None):
+    """
+    Pick the frame indices of a step to scan.
 
     Parameters:
-        odb_path (str): Path to the ODB file.
-        output_file (str): Path to the output text file.
+        reader (OdbReader): Open reader.
+        step_name (str): Step name.
+        frame_stride (int): Scan every n-th frame; the last frame is always scanned.
+        time_window (tuple): Optional (start, end) step-time bounds, inclusive.
+
+    Returns:
+        list: Frame indices in increasing order.
     """
-    # Delete the lock file if it exists
-    lock_file = odb_path.replace('.odb', '.lck')
-    if os.path.exists(lock_file):
-        os.remove(lock_file)
+    n = reader.frame_count(step_name)
+    indices = list(range(0, n, frame_stride))
+    if n and indices[-1] != n - 1:
+        indices.append(n - 1)
+    if time_window is not None:
+        start, end = time_window
+        indices = [i for i in indices if start <= reader.frame_time(step_name, i) <= end]
+    return indices
 
-    # Open the ODB file
-    odb = openOdb(path=odb_path)
+
+@traced()
+def scan_failed_elements(odb_path, output_file, instance=None, element_set=None,
+                         frame_stride=1, time_window=None):
+    """
+    Stream the first failure time of every element to a text file in one pass.
+
+    Each frame's STATUS is read through bulk data blocks and compared with a
+    still-alive mask, so already failed elements are not revisited value by
+    value. Records are flushed after every frame, so the file can be read
+    while the scan runs.
+
+    Parameters:
+        odb_path (str or OdbReader): Path to the ODB file, or an open reader.
+        output_file (str): Path to the output text file.
+        instance (str): Limit the scan to one instance (e.g. 'CU').
+        element_set (str): Limit the scan to an element set (e.g. 'CUVOLUME').
+        frame_stride (int): Scan every n-th frame (coarser failure times, faster triage).
+        time_window (tuple): Optional (start, end) step-time bounds.
+
+    Returns:
+        FailureScanner: The scanner holding the recorded failures.
+    """
+    reader = open_reader(odb_path)
+    scanner = FailureScanner()
 
     with open(output_file, 'w') as f:
         f.write("Failed Elements and Step Times\n")
         f.write("================================\n")
 
-        # Set to track already recorded failed elements
-        recorded_elements = set()
-
-        # Iterate through steps
-        for step_name, step in odb.steps.items():
+        for step_name in reader.step_names():
             f.write(f"Step: {step_name}\n")
+            frames = select_frames(reader, step_name, frame_stride, time_window)
+            with span('scan_step', step=step_name, frames=len(frames)):
+                for index in frames:
+                    time = reader.frame_time(step_name, index)  # Step time
+                    for instance_name, labels, status in reader.field_blocks(step_name, index, 'STATUS',
+                                                                             instance, element_set):
+                        newly = scanner.update(time, instance_name, labels, status)
+                        f.writelines(f"Time: {time}, Element: {label}, Instance: {instance_name}\n"
+                                     for label in newly.tolist())
+                    f.flush()
+
+    if reader is not odb_path:
+        reader.close()
+    return scanner
+
+
+def load_checkpoint(checkpoint_file):
+    """
+    Load an incremental-scan checkpoint.
+
+    Returns:
+        dict or None: {'step': name, 'frame': index, 'steps_done': [...], 'failed': {instance: [labels]},
+        'identity': odb_identity, 'instance': ..., 'element_set': ...}, or None if there is no checkpoint yet.
+    """
+    if not os.path.exists(checkpoint_file):
+        return None
+    with open(checkpoint_file, 'r') as f:
+        return json.load(f)
+
+
+def save_checkpoint(checkpoint_file, checkpoint):
+    """Write a checkpoint atomically so an interrupted poll never leaves a torn file."""
+    tmp_file = checkpoint_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_file, checkpoint_file)
+
+
+def odb_identity(odb):
+    """
+    File identity of an ODB for checkpoints: inode, creation time (where the OS records it), size and
+    modification time.
+
+    Returns:
+        dict or None: None for readers without a file on disk (e.g. SyntheticOdbReader).
+    """
+    path = getattr(odb, 'odb_path', odb)
+    if not isinstance(path, str) or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    created = getattr(stat, 'st_birthtime', stat.st_ctime if sys.platform == 'win32' else None)
+    return {'inode': stat.st_ino, 'created': created, 'size': stat.st_size, 'mtime': stat.st_mtime}
 
-            # Iterate through frames in the step
-            for frame in step.frames:
-                time = frame.frameValue  # Step time
-                status_field = frame.fieldOutputs['STATUS']  # Use direct key access instead of 'get'
 
-                for value in status_field.values:
-                    if value.data == 0:  # Failed element
-                        element_label = value.elementLabel
-                        instance_name = value.instance.name
-                        element_key = (instance_name, element_label)
+def _same_odb(recorded, current):
+    """A running job only grows its ODB; a smaller, older or different file is a rerun that replaced it."""
+    if recorded is None or current is None:
+        return recorded == current
+    return (recorded.get('inode') == current['inode'] and recorded.get('created') == current['created']
+            and current['size'] >= recorded.get('size', 0) and current['mtime'] >= recorded.get('mtime', 0.0))
 
-                        # Record only if the element is not already recorded
-                        if element_key not in recorded_elements:
-                            recorded_elements.add(element_key)
-                            f.write(f"Time: {time}, Element: {element_label}, Instance: {instance_name}\n")
 
-    odb.close()
+def _checkpoint_matches(reader, checkpoint, identity, instance, element_set):
+    """Check that a checkpoint still describes this ODB and scan (same file and filter, steps, no frames lost)."""
+    if not _same_odb(checkpoint.get('identity'), identity):
+        return False
+    if checkpoint.get('instance') != instance or checkpoint.get('element_set') != element_set:
+        return False
+    step_names = reader.step_names()
+    for step_name in checkpoint['steps_done']:
+        if step_name not in step_names:
+            return False
+    step_name = checkpoint['step']
+    if step_name is None:
+        return True
+    return step_name in step_names and reader.frame_count(step_name) > checkpoint['frame']
+
+
+@traced()
+def update_failed_elements(odb_path, output_file, checkpoint_file=None, instance=None, element_set=None):
+    """
+    Incrementally extend failed_elements.txt with frames written since the last call.
+
+    The checkpoint stores the last processed step/frame and the set of already
+    failed elements, so each call reads only the new frames of a running job
+    and appends their first failures to the output file. Without a usable
+    checkpoint the file is rewritten from frame 0: on the first call, when the
+    scan filter changed, or when the ODB was replaced by a rerun of the job
+    (different file, or one smaller or older than at the last call).
+
+    Parameters:
+        odb_path (str or OdbReader): Path to the ODB file, or an open reader.
+        output_file (str): Path to the output text file.
+        checkpoint_file (str): Path to the checkpoint; defaults to output_file + '.ckpt.json'.
+        instance (str): Limit the scan to one instance (e.g. 'CU').
+        element_set (str): Limit the scan to an element set (e.g. 'CUVOLUME').
+
+    Returns:
+        list: Newly recorded (step time, element label, instance name, step name) tuples.
+    """
+    if checkpoint_file is None:
+        checkpoint_file = output_file + '.ckpt.json'
+
+    identity = odb_identity(odb_path)
+    reader = open_reader(odb_path)
+    scanner = FailureScanner()
+
+    checkpoint = load_checkpoint(checkpoint_file)
+    if checkpoint is not None and not (os.path.exists(output_file)
+                                       and _checkpoint_matches(reader, checkpoint, identity, instance, element_set)):
+        checkpoint = None
+    if checkpoint is None:
+        checkpoint = {'odb': str(odb_path), 'instance': instance, 'element_set': element_set, 'step': None,
+                      'frame': -1, 'steps_done': [], 'failed': {}}
+        with open(output_file, 'w') as f:
+            f.write("Failed Elements and Step Times\n")
+            f.write("================================\n")
+    for instance_name, labels in checkpoint['failed'].items():
+        scanner.mark_failed(instance_name, labels)
+
+    new_records = []
+    step_names = reader.step_names()
+    with open(output_file, 'a') as f:
+        for step_name in step_names:
+            if step_name in checkpoint['steps_done']:
+                continue
+            if step_name != checkpoint['step']:
+                f.write(f"Step: {step_name}\n")
+                checkpoint['step'], checkpoint['frame'] = step_name, -1
+            for index in range(checkpoint['frame'] + 1, reader.frame_count(step_name)):
+                time = reader.frame_time(step_name, index)  # Step time
+                for instance_name, labels, status in reader.field_blocks(step_name, index, 'STATUS',
+                                                                         instance, element_set):
+                    newly = scanner.update(time, instance_name, labels, status).tolist()
+                    f.writelines(f"Time: {time}, Element: {label}, Instance: {instance_name}\n"
+                                 for label in newly)
+                    checkpoint['failed'].setdefault(instance_name, []).extend(newly)
+                    new_records.extend((time, label, instance_name, step_name) for label in newly)
+                checkpoint['frame'] = index
+            # A step is finished once a later step has started writing frames
+            if step_name != step_names[-1]:
+                checkpoint['steps_done'].append(step_name)
+        f.flush()
+        checkpoint['identity'] = identity
+        save_checkpoint(checkpoint_file, checkpoint)
+
+    if reader is not odb_path:
+        reader.close()
+    return new_records
+
+
+def extract_failed_elements(odb_path, output_file):
+    """
+    Extracts failed elements and their corresponding step time from an Abaqus ODB file.
+    Records only the first failure of each element.
+
+    Parameters:
+        odb_path (str): Path to the ODB file.
+        output_file (str): Path to the output text file.
+    """
+    scan_failed_elements(odb_path, output_file)
 
 # Example usage
 if __name__ == "__main__":
-    odb_path = "ThermalAnalysis.odb"  # Path to the ODB file
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    odb_path = args[0] if args else "ThermalAnalysis.odb"  # Path to the ODB file
     initial_coords_file = "initial_coordinates.txt"  # File to save initial coordinates
     failed_elements_file = "failed_elements.txt"  # File to save failed elements
 
-    save_initial_coordinates(odb_path, initial_coords_file)
-    extract_failed_elements(odb_path, failed_elements_file)
+    if '--incremental' in sys.argv:
+        # Append only the frames written since the previous call (for polling a running job)
+        new_records = update_failed_elements(odb_path, failed_elements_file)
+        print(f"{len(new_records)} newly failed elements")
+    else:
+        save_initial_coordinates(odb_path, initial_coords_file)
+        extract_failed_elements(odb_path, failed_elements_file)
+    write_trace()  # TCT_TRACE=trace.json
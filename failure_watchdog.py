@@ -0,0 +1,286 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from extract_failed_elements import centroids_from_arrays, volumes_from_arrays, update_failed_elements
+from monitor_progress import StaFollower
+from odb_reader import open_reader
+from tct_params import DEFAULT_PARAMS, step_start_times
+
+
+class FailedCount:
+    """Stop once at least n elements of an instance have failed."""
+
+    def __init__(self, n, instance='CU'):
+        self.n = n
+        self.instance = instance
+
+    def __call__(self, state):
+        return state.failed_labels(self.instance).size >= self.n
+
+    def __str__(self):
+        return f"{self.n} failed elements in {self.instance}"
+
+
+class FailedVolumeFraction:
+    """Stop once the failed elements make up a fraction of the instance volume."""
+
+    def __init__(self, fraction, instance='CU'):
+        self.fraction = fraction
+        self.instance = instance
+
+    def __call__(self, state):
+        return state.failed_volume_fraction(self.instance) >= self.fraction
+
+    def __str__(self):
+        return f"failed volume fraction {self.fraction:g} of {self.instance}"
+
+
+class FailureHeight:
+    """
+    Stop once a failed element centroid reaches a height along the via axis.
+
+    Parameters:
+        height (float): Coordinate along the axis (y is the via axis in tct_simulation.py).
+        instance (str): Instance to watch.
+        direction (str): 'up' if damage grows from the bottom (reached when centroid >= height),
+            'down' if it grows from the top (reached when centroid <= height).
+        axis (int): Coordinate index of the via axis.
+    """
+
+    def __init__(self, height, instance='CU', direction='up', axis=1):
+        self.height = height
+        self.instance = instance
+        self.direction = direction
+        self.axis = axis
+
+    def __call__(self, state):
+        heights = state.failed_centroids(self.instance)[:, self.axis]
+        if heights.size == 0:
+            return False
+        if self.direction == 'up':
+            return heights.max() >= self.height
+        return heights.min() <= self.height
+
+    def __str__(self):
+        return f"failure reaching y={self.height:g} ({self.direction}) in {self.instance}"
+
+
+def load_geometry(odb, instances=('CU',)):
+    """
+    Load element labels, centroids and volumes of the watched instances.
+
+    Parameters:
+        odb (str or OdbReader): ODB path or open reader.
+        instances (tuple): Instance names.
+
+    Returns:
+        dict: instance name -> (labels, centroids (m, 3), volumes (m,))
+    """
+    reader = open_reader(odb)
+    geometry = {}
+    for instance_name in instances:
+        node_labels, coords, labels, connectivity, mask = reader.instance_mesh(instance_name)
+        geometry[instance_name] = (labels,
+                                   centroids_from_arrays(node_labels, coords, connectivity, mask),
+                                   volumes_from_arrays(node_labels, coords, connectivity, mask))
+    if reader is not odb:
+        reader.close()
+    return geometry
+
+
+class WatchdogState:
+    """Failures observed so far, with the geometry the criteria need."""
+
+    def __init__(self, geometry=None):
+        self.geometry = geometry or {}
+        self.failed = {}  # instance name -> list of labels
+
+    def add(self, records):
+        for t, label, instance_name, step_name in records:
+            self.failed.setdefault(instance_name, []).append(label)
+
+    def failed_labels(self, instance_name):
+        return np.asarray(self.failed.get(instance_name, []), dtype=np.int64)
+
+    def _failed_rows(self, instance_name):
+        labels = self.geometry[instance_name][0]
+        return np.flatnonzero(np.isin(labels, self.failed_labels(instance_name)))
+
+    def failed_centroids(self, instance_name):
+        return self.geometry[instance_name][1][self._failed_rows(instance_name)]
+
+    def failed_volume_fraction(self, instance_name):
+        volumes = self.geometry[instance_name][2]
+        return volumes[self._failed_rows(instance_name)].sum() / volumes.sum()
+
+
+def frame_groups(records):
+    """
+    Split failure records into the frames they were found in, in time order.
+
+    Steps keep the order in which they first appear (the step time restarts
+    in every step); within a step the records are ordered by step time.
+
+    Returns:
+        list: ((step name, step time), records) per frame.
+    """
+    step_rank = {}
+    for record in records:
+        step_rank.setdefault(record[3], len(step_rank))
+    groups = []
+    for record in sorted(records, key=lambda record: (step_rank[record[3]], record[0])):
+        key = (record[3], record[0])
+        if not groups or groups[-1][0] != key:
+            groups.append((key, []))
+        groups[-1][1].append(record)
+    return groups
+
+
+def abaqus_terminate(job_name):
+    """Default kill hook: ask Abaqus to terminate the job."""
+    subprocess.run(['abaqus', 'terminate', f'job={job_name}'], check=False, shell=sys.platform == 'win32')
+
+
+class FailureWatchdog:
+    """
+    Follow a running job's failures and stop it once a criterion is met.
+
+    Parameters:
+        job_name (str): Job to watch (e.g. 'ThermalAnalysis').
+        criteria (list): Callables taking a WatchdogState; the job is stopped when any returns True.
+        poll_failures (callable): Returns the (step time, label, instance, step name) records failed since
+            the last call. Defaults to incremental scanning of <job_name>.odb.
+        geometry (dict): Output of load_geometry. When needed and not given it is loaded from the ODB on the
+            first poll that finds failures, retried until the ODB can be opened.
+        kill_job (callable): Called with job_name to stop the job; defaults to abaqus_terminate.
+        is_running (callable): Returns False once the job has ended on its own; polling then stops.
+            Defaults to following <job_name>.sta for the completion message.
+        life_file (str): JSON file the stopping time is recorded in; defaults to <job_name>_life.json.
+        interval (float): Seconds between polls.
+        step_starts (dict): Total time at which every step starts (tct_params.step_start_times); the life
+            is recorded in total time. Without it the step time of the failure is recorded.
+    """
+
+    def __init__(self, job_name, criteria, poll_failures=None, geometry=None, kill_job=abaqus_terminate,
+                 is_running=None, life_file=None, interval=60.0, step_starts=None):
+        self.job_name = job_name
+        self.criteria = list(criteria)
+        self.odb_path = odb_path = f"{job_name}.odb"
+        if poll_failures is None:
+            failed_file = f"{job_name}_failed_elements.txt"
+
+            def poll_failures():
+                # The watchdog starts with the job, before the solver has created the ODB
+                if not os.path.exists(odb_path):
+                    return []
+                return update_failed_elements(odb_path, failed_file)
+        self.poll_failures = poll_failures
+        # Instances whose geometry the criteria need and that still have to be loaded from the ODB
+        self.pending_geometry = [] if geometry is not None else sorted(
+            {criterion.instance for criterion in self.criteria if not isinstance(criterion, FailedCount)})
+        self.state = WatchdogState(geometry)
+        self.history = []  # Every failure record polled so far
+        self.replayed = False  # Whether the history was checked with the geometry criteria
+        self.met = None  # (step name, step time) of the frame that first met a criterion
+        self.kill_job = kill_job
+        if is_running is None:
+            sta = StaFollower(f"{job_name}.sta")
+
+            def is_running():
+                sta.poll()
+                return sta.status not in ('completed', 'failed')
+        self.is_running = is_running
+        self.life_file = life_file or f"{job_name}_life.json"
+        self.interval = interval
+        self.step_starts = step_starts or {}
+
+    def life(self):
+        """Total time (step start plus step time) of the frame that met a criterion, or None."""
+        if self.met is None:
+            return None
+        step_name, step_time = self.met
+        return self.step_starts.get(step_name, 0.0) + step_time
+
+    def load_pending_geometry(self):
+        """Load the geometry the criteria still need; False while the ODB cannot be opened yet."""
+        if not self.pending_geometry:
+            return True
+        if not os.path.exists(self.odb_path):
+            return False
+        try:
+            self.state.geometry.update(load_geometry(self.odb_path, self.pending_geometry))
+        except Exception:  # odbAccess raises its own OdbError while the solver is still creating the ODB
+            return False
+        self.pending_geometry = []
+        return True
+
+    def check(self):
+        """
+        Poll once; return the criterion that was met, or None.
+
+        The polled failures are added frame by frame and the criteria checked
+        after every frame, so the life is the frame that first met a
+        criterion even when one poll delivers many frames.
+        """
+        records = list(self.poll_failures())
+        self.history.extend(records)
+        # Geometry criteria wait until there are failures and the geometry could be loaded
+        geometry_ready = bool(self.history) and self.load_pending_geometry()
+        if geometry_ready and not self.replayed:
+            # Check the frames polled while the geometry was pending again, now with all criteria
+            self.state = WatchdogState(self.state.geometry)
+            records = self.history
+            self.replayed = True
+        for frame, group in frame_groups(records):
+            self.state.add(group)
+            for criterion in self.criteria:
+                if not geometry_ready and not isinstance(criterion, FailedCount):
+                    continue
+                if criterion(self.state):
+                    self.met = frame
+                    return criterion
+        return None
+
+    def record(self, criterion):
+        """Write the stopping time (the design's life) to the life file."""
+        result = {
+            'job': self.job_name,
+            'criterion': None if criterion is None else str(criterion),
+            'life': None if criterion is None else self.life(),
+            'step': None if self.met is None else self.met[0],
+            'failed_elements': {name: len(labels) for name, labels in self.state.failed.items()},
+            'stopped_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+        with open(self.life_file, 'w') as f:
+            json.dump(result, f, indent=1)
+        return result
+
+    def run(self):
+        """
+        Poll until a criterion is met (the job is then killed) or the job ends.
+
+        Returns:
+            dict: The recorded result; 'life' is None if no criterion was met.
+        """
+        while True:
+            criterion = self.check()
+            if criterion is not None:
+                print(f"Criterion met: {criterion} at time {self.life()}. Stopping {self.job_name}.")
+                self.kill_job(self.job_name)
+                return self.record(criterion)
+            if not self.is_running():
+                return self.record(self.check())  # pick up the final frames
+            time.sleep(self.interval)
+
+
+# Example usage
+if __name__ == "__main__":
+    job_name = "ThermalAnalysis"
+    watchdog = FailureWatchdog(job_name, [FailedCount(50), FailedVolumeFraction(0.3), FailureHeight(60.0)],
+                               interval=300.0, step_starts=step_start_times(DEFAULT_PARAMS))
+    print(watchdog.run())
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from inp_writer import write_inp
+from monitor_progress import StaFollower
+from sweep import SOLVE_COMMAND, job_fields
+from tct_params import DEFAULT_PARAMS, STEP_MODES, estimate_increments, load_params, make_params, step_plan
+
+
+def read_sta_summary(sta_path):
+    """
+    Summarize a finished .sta file.
+
+    Returns:
+        dict: increments, cutbacks, iterations, total_time and status (see StaFollower).
+    """
+    follower = StaFollower(sta_path)
+    records = follower.poll()
+    return {
+        'increments': sum(1 for record in records if not record.cutback),
+        'cutbacks': sum(1 for record in records if record.cutback),
+        'iterations': sum(record.total_iters for record in records),
+        'total_time': records[-1].total_time if records else 0.0,
+        'status': follower.status,
+    }
+
+
+def run_case(params, workdir, command=SOLVE_COMMAND):
+    """
+    Write the deck of one design, solve it and summarize its incrementation.
+
+    Parameters:
+        params (dict): Named parameter record.
+        workdir (str): Directory receiving <job>/<job>.inp and the solver files.
+        command (list): Solver command template ({job}, {cpus}, {memory}, {script_dir}); replace it to use
+            a stand-in solver.
+
+    Returns:
+        dict: read_sta_summary fields plus job, step_mode, steps, estimated_increments and wall_time.
+    """
+    job = params['JOB_NAME']
+    directory = os.path.join(workdir, job)
+    os.makedirs(directory, exist_ok=True)
+    write_inp(os.path.join(directory, f"{job}.inp"), params)
+    fields = job_fields(params)
+    start = time.perf_counter()
+    with open(os.path.join(directory, 'solve.log'), 'w') as log:
+        subprocess.call([part.format(**fields) for part in command], cwd=directory, stdout=log,
+                        stderr=subprocess.STDOUT, shell=sys.platform == 'win32')
+    wall_time = time.perf_counter() - start
+    result = {'job': job, 'step_mode': params['STEP_MODE'], 'steps': len(step_plan(params)),
+              'estimated_increments': estimate_increments(params), 'wall_time': wall_time}
+    result.update(read_sta_summary(os.path.join(directory, f"{job}.sta")))
+    return result
+
+
+def benchmark(base=None, modes=STEP_MODES, workdir='increment_benchmark', command=SOLVE_COMMAND,
+              estimate_only=False, report_file=None):
+    """
+    Compare the single-step setup with segment-aware incrementation.
+
+    Parameters:
+        base (dict): Design to benchmark (default DEFAULT_PARAMS).
+        modes (tuple): STEP_MODE values to compare.
+        workdir (str): Directory of the benchmark runs.
+        command (list): Solver command template (see run_case).
+        estimate_only (bool): Only report estimate_increments, without solving.
+        report_file (str): JSON report; default <workdir>/increment_benchmark.json.
+
+    Returns:
+        list: One result dict per mode.
+    """
+    base = DEFAULT_PARAMS if base is None else base
+    results = []
+    for mode in modes:
+        params = make_params(base, STEP_MODE=mode, JOB_NAME=f"{base['JOB_NAME']}_{mode}")
+        if estimate_only:
+            result = {'job': params['JOB_NAME'], 'step_mode': mode, 'steps': len(step_plan(params)),
+                      'estimated_increments': estimate_increments(params)}
+        else:
+            result = run_case(params, workdir, command)
+        results.append(result)
+        print(', '.join(f"{key}: {value:.2f}" if isinstance(value, float) else f"{key}: {value}"
+                        for key, value in result.items()))
+
+    if not estimate_only:
+        reference = results[0]
+        for result in results[1:]:
+            if reference['increments'] and reference['wall_time']:
+                print(f"{result['step_mode']} vs {reference['step_mode']}: "
+                      f"{result['increments'] / reference['increments']:.2f}x increments, "
+                      f"{result['wall_time'] / reference['wall_time']:.2f}x wall time")
+        os.makedirs(workdir, exist_ok=True)
+        with open(report_file or os.path.join(workdir, 'increment_benchmark.json'), 'w') as f:
+            json.dump(results, f, indent=1)
+    return results
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark single-step against segment-aware incrementation.")
+    parser.add_argument('params', nargs='?', help="Parameter JSON of the design (default DEFAULT_PARAMS)")
+    parser.add_argument('--workdir', default='increment_benchmark')
+    parser.add_argument('--estimate', action='store_true', help="Only estimate increments, do not solve")
+    args = parser.parse_args()
+    base = load_params(args.params) if args.params else None
+    benchmark(base, workdir=args.workdir, estimate_only=args.estimate)
@@ -0,0 +1,364 @@
+import sys
+import time
+
+import numpy as np
+
+from tct_params import DEFAULT_PARAMS, load_params, plastic_table, amplitude_data, step_plan, symmetry
+from extract_failed_elements import volumes_from_arrays
+from output_policy import NODAL_VARIABLES, output_plan
+from via_mesh import signed_areas, via_mesh
+
+
+def _write_labels(f, labels, per_line=16):
+    """Write labels as data lines of at most 16 entries (the Abaqus limit)."""
+    labels = np.asarray(labels).ravel()
+    for start in range(0, labels.size, per_line):
+        f.write(', '.join(map(str, labels[start:start + per_line].tolist())) + '\n')
+
+
+def _write_table(f, rows):
+    for row in rows:
+        f.write(', '.join(repr(float(value)) for value in row) + '\n')
+
+
+def _write_set(f, keyword, name, labels):
+    labels = np.asarray(labels)
+    if labels.size and np.array_equal(labels, np.arange(labels[0], labels[0] + labels.size)):
+        f.write(f"*{keyword}, {keyword.lower()}={name}, generate\n{labels[0]}, {labels[-1]}, 1\n")
+    else:
+        f.write(f"*{keyword}, {keyword.lower()}={name}\n")
+        _write_labels(f, labels)
+
+
+def write_part(f, part, section):
+    """
+    Write a *Part block.
+
+    Parameters:
+        f: Open text file.
+        part (PartMesh): Mesh of the part.
+        section (tuple): (section name, material name, element set) of the solid section.
+    """
+    f.write(f"*Part, name={part.name}\n*Node\n")
+    nodes = np.column_stack([part.node_labels, part.coords])
+    np.savetxt(f, nodes, fmt=['%d'] + ['%.10g'] * part.coords.shape[1], delimiter=', ')
+    element_labels = part.element_labels()
+    for elem_type, connectivity in part.elements.items():
+        f.write(f"*Element, type={elem_type}\n")
+        np.savetxt(f, np.column_stack([element_labels[elem_type], connectivity]), fmt='%d', delimiter=', ')
+    for name, labels in part.nsets.items():
+        _write_set(f, 'Nset', name, labels)
+    for name, labels in part.elsets.items():
+        _write_set(f, 'Elset', name, labels)
+    for name, faces in part.surfaces.items():
+        for number, labels in faces.items():
+            f.write(f"*Elset, elset=_{name}_S{number}, internal\n")
+            _write_labels(f, labels)
+        f.write(f"*Surface, type=ELEMENT, name={name}\n")
+        for number in faces:
+            f.write(f"_{name}_S{number}, S{number}\n")
+    section_name, material, elset = section
+    f.write(f"** Section: {section_name}\n*Solid Section, elset={elset}, material={material}\n,\n*End Part\n")
+
+
+def write_materials(f, params):
+    """Write the Cu and Si materials of tct_simulation.create_materials."""
+    f.write("*Material, name=Cu\n")
+    f.write(f"*Conductivity\n{params['K_CU']!r},\n")
+    f.write("*Damage Initiation, criterion=DUCTILE\n")
+    _write_table(f, [params['DAMAGE_INITIATION']])
+    f.write(f"*Damage Evolution, type=DISPLACEMENT\n{params['DAMAGE_DISPLACEMENT']!r},\n")
+    f.write(f"*Density\n{params['RHO_CU']!r},\n")
+    f.write(f"*Elastic\n{params['E_CU']!r}, {params['NU_CU']!r}\n")
+    f.write(f"*Expansion\n{params['CTE_CU']!r},\n")
+    f.write("*Plastic\n")
+    _write_table(f, plastic_table(params))
+    f.write(f"*Specific Heat\n{params['C_CU']!r},\n")
+    f.write("*Material, name=Si\n")
+    f.write(f"*Conductivity\n{params['K_SI']!r},\n")
+    f.write(f"*Density\n{params['RHO_SI']!r},\n")
+    f.write(f"*Elastic\n{params['E_SI']!r}, {params['NU_SI']!r}\n")
+    f.write(f"*Expansion\n{params['CTE_SI']!r},\n")
+    f.write(f"*Specific Heat\n{params['C_SI']!r},\n")
+
+
+def write_amplitude(f, params, name='ThermalCycle'):
+    """Write the thermal cycle amplitude (total-time based, four pairs per line)."""
+    f.write(f"*Amplitude, name={name}, time=TOTAL TIME\n")
+    data = np.asarray(amplitude_data(params), dtype=float).ravel()
+    for start in range(0, data.size, 8):
+        f.write(', '.join(repr(value) for value in data[start:start + 8].tolist()) + '\n')
+
+
+def write_boundary_conditions(f, params):
+    """Write the fixed Si lateral faces and, for reduced models, the symmetry conditions."""
+    mode = symmetry(params)
+    f.write("*Boundary\n")
+    if mode == 'axisymmetric':
+        f.write("Si.SiLateralSurf, 1, 2\nCu.Axis, 1, 1\n")
+    else:
+        f.write("Si.SiLateralSurf, 1, 3\n")
+    if mode == 'quarter':
+        f.write("Cu.XSymm, XSYMM\nSi.XSymm, XSYMM\nCu.ZSymm, ZSYMM\nSi.ZSymm, ZSYMM\n")
+
+
+def write_initial_state(f, initial_state):
+    """
+    Write the restart state of a previous analysis as initial conditions.
+
+    Parameters:
+        f: Open text file.
+        initial_state (dict): 'instance' (deck instance name, e.g. 'Cu'), 'labels' and 'peeq'
+            (equivalent plastic strain per element, written as *Initial Conditions, type=HARDENING).
+    """
+    labels = np.asarray(initial_state['labels'])
+    peeq = np.asarray(initial_state['peeq'], dtype=np.float64)
+    keep = peeq > 0
+    if not keep.any():
+        return
+    f.write("*Initial Conditions, type=HARDENING\n")
+    instance = initial_state['instance']
+    f.writelines(f"{instance}.{label}, {value!r}\n" for label, value in zip(labels[keep].tolist(), peeq[keep].tolist()))
+
+
+def write_output_requests(f, requests, time_points, defined, new=False):
+    """
+    Write the field output requests of one step of output_policy.output_plan.
+
+    Parameters:
+        f: Open text file.
+        requests (list): Active requests of the step.
+        time_points (dict): Time point name -> step times; names not in defined are written first.
+        defined (set): Time point names already defined, updated in place.
+        new (bool): Replace the requests of the previous steps (op=NEW).
+    """
+    for request in requests:
+        name = request['time_points']
+        if name is not None and name not in defined:
+            f.write(f"*Time Points, name={name}\n")
+            points = time_points[name]
+            for start in range(0, len(points), 8):
+                f.write(', '.join(repr(point) for point in points[start:start + 8]) + '\n')
+            defined.add(name)
+    op = ', op=NEW' if new else ''
+    if not requests:
+        f.write(f"*Output, field{op}, frequency=0\n")
+    for request in requests:
+        if request['time_points'] is None:
+            f.write(f"*Output, field{op}, frequency={request['frequency']}\n")
+        else:
+            f.write(f"*Output, field{op}, time points={request['time_points']}\n")
+        element = [variable for variable in request['variables'] if variable not in NODAL_VARIABLES]
+        nodal = [variable for variable in request['variables'] if variable in NODAL_VARIABLES]
+        if element:
+            region = f", elset={request['instance']}.{request['elset']}" if request['instance'] else ''
+            f.write(f"*Element Output{region}\n{', '.join(element)}\n")
+        if nodal:
+            f.write(f"*Node Output\n{', '.join(nodal)}\n")
+
+
+def write_steps(f, params, removed=False, first=0, amplitude=None):
+    """
+    Write the coupled temperature-displacement steps of tct_params.step_plan.
+
+    The thermal cycle boundary conditions and output requests are defined in
+    the first step and carry over to the following ones. With OUTPUT_POLICY
+    'needs' the field output requests of output_policy.output_plan are written
+    and replaced in every step where they change; otherwise the PRESELECT
+    defaults are requested. With removed, the assembly element set Removed is
+    taken out of the model in the first step. With RESTART_WRITE, steps that
+    close a cycle write restart data at their end.
+
+    Parameters:
+        f: Open text file.
+        params (dict): Parameter record.
+        removed (bool): Remove the Removed element set in the first written step.
+        first (int): Index in the step plan of the first step to write (restart analyses).
+        amplitude (str): Replace all boundary conditions in the first written step, with the
+            thermal cycle following this amplitude (restart analyses extending the cycles).
+    """
+    plan = step_plan(params)
+    outputs, time_points = output_plan(params) if params['OUTPUT_POLICY'] == 'needs' else (None, None)
+    # Time points of the steps before a restart are defined in the previous job
+    defined = {request['time_points'] for requests in (outputs or [])[:first] for request in requests}
+    for number, step in enumerate(plan[first:], first):
+        f.write(f"*Step, name={step['name']}, nlgeom=NO, inc={params['MAX_NUM_INC']}\n")
+        f.write(f"*Coupled Temperature-Displacement, creep=none, deltmx={step['deltmx']!r}\n")
+        f.write(f"{step['initial_inc']!r}, {step['period']!r}, {step['min_inc']!r}, {step['max_inc']!r}\n")
+        if number == first and removed:
+            f.write("*Model Change, type=ELEMENT, remove\nRemoved\n")
+        if number == 0:
+            f.write("*Boundary, amplitude=ThermalCycle\nSi.Sivolume, 11, 11, 1.\nCu.Cuvolume, 11, 11, 1.\n")
+            if outputs is None:
+                f.write("*Output, field, variable=PRESELECT\n*Output, history, variable=PRESELECT\n")
+        elif number == first and amplitude is not None:
+            f.write(f"*Boundary, op=NEW, amplitude={amplitude}\nSi.Sivolume, 11, 11, 1.\nCu.Cuvolume, 11, 11, 1.\n")
+            write_boundary_conditions(f, params)
+        if outputs is not None and (number == 0 or outputs[number] != outputs[number - 1]):
+            write_output_requests(f, outputs[number], time_points, defined, new=number > 0)
+        if params['RESTART_WRITE']:
+            if step['cycle_end']:
+                f.write("*Restart, write, number interval=1, time marks=NO\n")
+            else:
+                f.write("*Restart, write, frequency=0\n")
+        f.write("*End Step\n")
+
+
+def write_restart_inp(path, params, restart_step, extended_from=None):
+    """
+    Write the input file of a restart analysis that continues the steps of step_plan.
+
+    Run it with 'abaqus job=<new> oldjob=<previous>'. The analysis resumes at
+    the end of step restart_step (1-based, as numbered in the .sta file) of
+    the previous job and runs the remaining steps of the plan.
+
+    Parameters:
+        path (str): Output .inp path.
+        params (dict): Parameter record; TOTAL_CYCLES may be larger than in the previous job.
+        restart_step (int): Last completed step of the previous job to restart from.
+        extended_from (int): TOTAL_CYCLES of the original model when params adds cycles; the
+            thermal cycle then continues with a new amplitude covering all cycles.
+    """
+    with open(path, 'w') as f:
+        f.write(f"*Heading\n** Job name: {params['JOB_NAME']} Model name: {params['MODEL_NAME']}\n"
+                f"** Restart from step {restart_step}, generated by inp_writer.py\n")
+        f.write(f"*Restart, read, step={restart_step}\n")
+        amplitude = None
+        if extended_from is not None and params['TOTAL_CYCLES'] != extended_from:
+            amplitude = f"ThermalCycle{params['TOTAL_CYCLES']}"
+            write_amplitude(f, params, amplitude)
+        f.write("**\n** STEP\n**\n")
+        write_steps(f, params, first=restart_step, amplitude=amplitude)
+
+
+def write_inp(path, params, cu=None, si=None, initial_state=None):
+    """
+    Write a complete Abaqus input deck of the TCT model without CAE.
+
+    The deck mirrors tct_simulation.build_model: Cu and Si parts with the
+    ContactSurfCu/ContactSurfSi surfaces and Cuvolume/Sivolume/SiLateralSurf
+    sets, the CuSiTie constraint, materials, the ThermalCycle amplitude, the
+    fixed lateral Si faces and the coupled temperature-displacement step(s).
+    Quarter and axisymmetric designs (SYMMETRY) get their reduced mesh and
+    symmetry boundary conditions.
+
+    Parameters:
+        path (str): Output .inp path.
+        params (dict): Parameter record (see tct_params.DEFAULT_PARAMS).
+        cu, si (PartMesh): Meshes to write; generated with via_mesh.via_mesh if not given.
+        initial_state (dict): Restart state (see write_initial_state), optionally with 'removed',
+            the labels of failed elements to leave out of the analysis.
+
+    Returns:
+        tuple: (Cu PartMesh, Si PartMesh) that were written.
+    """
+    if cu is None or si is None:
+        cu, si = via_mesh(params)
+    with open(path, 'w') as f:
+        f.write(f"*Heading\n** Job name: {params['JOB_NAME']} Model name: {params['MODEL_NAME']}\n"
+                "** Generated by inp_writer.py\n")
+        f.write("*Preprint, echo=NO, model=NO, history=NO, contact=NO\n**\n** PARTS\n**\n")
+        write_part(f, cu, ('Via', 'Cu', 'Cuvolume'))
+        write_part(f, si, ('wafer', 'Si', 'Sivolume'))
+        f.write("**\n** ASSEMBLY\n**\n*Assembly, name=Assembly\n")
+        f.write("*Instance, name=Cu, part=Cu\n*End Instance\n*Instance, name=Si, part=Si\n*End Instance\n")
+        f.write("*Tie, name=CuSiTie, adjust=yes\nSi.ContactSurfSi, Cu.ContactSurfCu\n")
+        removed = initial_state is not None and len(initial_state.get('removed', ())) > 0
+        if removed:
+            f.write(f"*Elset, elset=Removed, instance={initial_state['instance']}\n")
+            _write_labels(f, initial_state['removed'])
+        f.write("*End Assembly\n")
+        write_amplitude(f, params)
+        f.write("**\n** MATERIALS\n**\n")
+        write_materials(f, params)
+        f.write("**\n** BOUNDARY CONDITIONS\n**\n")
+        write_boundary_conditions(f, params)
+        if initial_state is not None:
+            write_initial_state(f, initial_state)
+        f.write("**\n** STEP\n**\n")
+        write_steps(f, params, removed)
+    return cu, si
+
+
+def check_deck(path):
+    """
+    Check a written deck offline for the errors the Abaqus pre-processor would reject.
+
+    Verifies that element connectivity only refers to defined nodes, that
+    element volumes (areas in 2D) are positive, that the sets and surfaces referenced by the
+    assembly, boundary conditions and step exist, and that data lines stay
+    within 16 entries.
+
+    Parameters:
+        path (str): .inp file to check.
+
+    Returns:
+        list: Problems found (empty for a valid deck).
+    """
+    parts = {}
+    problems = []
+    part = keyword = None
+    references = []
+    with open(path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('**'):
+                continue
+            if line.startswith('*'):
+                options = [item.strip() for item in line[1:].split(',')]
+                keyword = options[0].lower()
+                settings = dict(item.split('=', 1) for item in options[1:] if '=' in item)
+                if keyword == 'part':
+                    part = parts.setdefault(settings['name'], {'nodes': {}, 'elements': [], 'sets': set()})
+                elif keyword == 'end part':
+                    part = None
+                elif keyword in ('nset', 'elset', 'surface') and part is not None:
+                    part['sets'].add(settings[keyword if keyword != 'surface' else 'name'].split('.')[-1])
+                continue
+            fields = [item.strip() for item in line.split(',')]
+            if len(fields) > 16:
+                problems.append(f"line {number}: {len(fields)} entries")
+            if part is not None and keyword == 'node':
+                part['nodes'][int(fields[0])] = [float(v) for v in fields[1:]]
+            elif part is not None and keyword == 'element':
+                part['elements'].append([int(v) for v in fields])
+            elif keyword in ('tie', 'boundary'):
+                references.extend(field for field in fields if '.' in field and not field[0].isdigit())
+
+    for name, part in parts.items():
+        by_width = {}
+        for row in part['elements']:
+            by_width.setdefault(len(row), []).append(row)
+        labels = np.array(sorted(part['nodes']), dtype=np.int64)
+        coords = np.array([part['nodes'][label] for label in labels.tolist()])
+        for width, rows in by_width.items():
+            rows = np.array(rows, dtype=np.int64)
+            connectivity = rows[:, 1:]
+            missing = ~np.isin(connectivity, labels)
+            if missing.any():
+                problems.append(f"{name}: {int(missing.any(axis=1).sum())} elements refer to undefined nodes")
+                continue
+            if coords.shape[1] == 2:
+                volume = signed_areas(coords, np.searchsorted(labels, connectivity))
+            else:
+                volume = volumes_from_arrays(labels, coords, connectivity, np.ones(connectivity.shape, dtype=bool),
+                                             signed=True)
+            if (volume <= 0).any():
+                problems.append(f"{name}: {int((volume <= 0).sum())} elements with non-positive volume")
+    for reference in references:
+        instance, set_name = reference.split('.', 1)
+        if instance not in parts or set_name not in parts[instance]['sets']:
+            problems.append(f"undefined set or surface {reference}")
+    return problems
+
+
+# Example usage
+if __name__ == "__main__":
+    # python inp_writer.py [params.json]
+    params = load_params(sys.argv[1]) if len(sys.argv) > 1 else dict(DEFAULT_PARAMS)
+    start = time.perf_counter()
+    cu, si = write_inp(f"{params['JOB_NAME']}.inp", params)
+    n_elements = sum(c.shape[0] for part in (cu, si) for c in part.elements.values())
+    print(f"Wrote {params['JOB_NAME']}.inp: {n_elements} elements in {time.perf_counter() - start:.3f} s")
+    for problem in check_deck(f"{params['JOB_NAME']}.inp"):
+        print(f"Deck check: {problem}")
@@ -0,0 +1,195 @@
+import contextlib
+import functools
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Set to a file path to trace every stage of a run into that JSON trace (e.g. TCT_TRACE=trace.json)
+TRACE_ENV = 'TCT_TRACE'
+# Set to 1 to also record the peak Python allocation of every span (tracemalloc, slows the traced code)
+TRACE_MEMORY_ENV = 'TCT_TRACE_MEMORY'
+
+_NULL_SPAN = contextlib.nullcontext()
+
+
+def peak_rss():
+    """Peak resident set size of the process in bytes (None where the resource module is missing)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class Tracer:
+    """
+    Nested timing (and optionally memory) spans of the stages of a run.
+
+    A span records its name, wall and CPU seconds, nesting depth, parent and
+    attributes; with memory it also records the peak Python allocation inside
+    it (tracemalloc) and the process peak RSS at its end. When the tracer is
+    disabled, span returns a shared no-op context manager and traced
+    functions are called directly, so instrumented code costs one attribute
+    check per stage.
+
+    Parameters:
+        enabled (bool): Record spans.
+        memory (bool): Record the peak Python allocation per span.
+        path (str): Default file of write.
+    """
+
+    def __init__(self, enabled=False, memory=False, path=None):
+        self.enabled = enabled
+        self.memory = memory
+        self.path = path
+        self.spans = []
+        self._stack = []
+        self._stage = None
+        self._origin = time.perf_counter()
+
+    def enable(self, memory=False, path=None):
+        self.enabled = True
+        self.memory = memory
+        self.path = path or self.path
+
+    def disable(self):
+        self.stage(None)
+        self.enabled = False
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def reset(self):
+        self.spans = []
+        self._stack = []
+        self._stage = None
+        self._origin = time.perf_counter()
+
+    def span(self, name, **attrs):
+        """Context manager timing the enclosed block as a span named name."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, attrs)
+
+    @contextlib.contextmanager
+    def _span(self, name, attrs):
+        record = {'name': name, 'depth': len(self._stack),
+                  'parent': self._stack[-1]['index'] if self._stack else None, 'attrs': attrs}
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                # The parent keeps the peak reached so far before this span resets it
+                self._stack[-1]['_peak'] = max(self._stack[-1]['_peak'], peak)
+            tracemalloc.reset_peak()
+            record['_current'], record['_peak'] = current, current
+        record['index'] = len(self.spans)
+        self.spans.append(record)
+        self._stack.append(record)
+        start, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['start'] = start - self._origin
+            record['seconds'] = time.perf_counter() - start
+            record['cpu_seconds'] = time.process_time() - cpu
+            self._stack.pop()
+            if self.memory and tracemalloc.is_tracing():
+                peak = max(record.pop('_peak'), tracemalloc.get_traced_memory()[1])
+                record['peak_bytes'] = peak - record.pop('_current')
+                record['rss_bytes'] = peak_rss()
+                if self._stack:
+                    self._stack[-1]['_peak'] = max(self._stack[-1]['_peak'], peak)
+
+    def stage(self, name, **attrs):
+        """
+        End the previous stage and start a span for the next one, for scripts without functions.
+
+        stage(None) ends the last stage.
+        """
+        if self._stage is not None:
+            self._stage.__exit__(None, None, None)
+            self._stage = None
+        if name is not None and self.enabled:
+            self._stage = self._span(name, attrs)
+            self._stage.__enter__()
+
+    def traced(self, name=None):
+        """Decorator running every call of a function in a span (default name: the function name)."""
+        def decorate(function):
+            span_name = name or function.__name__
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                with self._span(span_name, {}):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        """Total seconds, calls and largest peak_bytes per span name, slowest first."""
+        totals = {}
+        for record in self.spans:
+            if 'seconds' not in record:
+                continue
+            entry = totals.setdefault(record['name'], {'seconds': 0.0, 'calls': 0, 'peak_bytes': None})
+            entry['seconds'] += record['seconds']
+            entry['calls'] += 1
+            if record.get('peak_bytes') is not None:
+                entry['peak_bytes'] = max(entry['peak_bytes'] or 0, record['peak_bytes'])
+        return dict(sorted(totals.items(), key=lambda item: -item[1]['seconds']))
+
+    def trace(self):
+        """
+        The finished spans as a JSON-serializable trace.
+
+        traceEvents follows the Chrome trace event format, so the file opens in
+        chrome://tracing or Perfetto; spans keeps the records themselves.
+        """
+        spans = [{key: value for key, value in record.items() if not key.startswith('_')}
+                 for record in self.spans if 'seconds' in record]
+        events = [{'name': record['name'], 'ph': 'X', 'pid': os.getpid(), 'tid': 0,
+                   'ts': record['start'] * 1e6, 'dur': record['seconds'] * 1e6,
+                   'args': dict(record['attrs'], **{key: record[key] for key in ('cpu_seconds', 'peak_bytes')
+                                                     if key in record})}
+                  for record in spans]
+        return {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'argv': sys.argv, 'spans': spans,
+                'summary': self.summary(), 'traceEvents': events}
+
+    def write(self, path=None):
+        """Write the trace to path (default the tracer's path); nothing when disabled or without a path."""
+        path = path or self.path
+        if not self.enabled or path is None:
+            return None
+        self.stage(None)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.trace(), f, indent=1)
+        os.replace(path + '.tmp', path)
+        return path
+
+
+# Process-wide tracer of the build and post-processing scripts, enabled by TCT_TRACE
+TRACER = Tracer(enabled=bool(os.environ.get(TRACE_ENV)), memory=os.environ.get(TRACE_MEMORY_ENV) == '1',
+                path=os.environ.get(TRACE_ENV) or None)
+span = TRACER.span
+stage = TRACER.stage
+traced = TRACER.traced
+write_trace = TRACER.write
+
+
+# Example usage
+if __name__ == "__main__":
+    # python instrumentation.py trace.json -- summary of a written trace
+    with open(sys.argv[1] if len(sys.argv) > 1 else 'trace.json', 'r') as f:
+        summary = json.load(f)['summary']
+    for name, entry in summary.items():
+        peak = f", peak {entry['peak_bytes'] / 1e6:.1f} MB" if entry['peak_bytes'] is not None else ''
+        print(f"{name}: {entry['seconds']:.3f} s in {entry['calls']} calls{peak}")
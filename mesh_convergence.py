@@ -0,0 +1,301 @@
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from damage_front import interface_distance
+from extract_failed_elements import centroids_from_arrays
+from odb_reader import open_reader
+from sweep import run_sweep
+from tct_params import DEFAULT_PARAMS, MESH_DEFAULTS_FILE, geometry_family, load_mesh_defaults, load_params, make_params
+
+# Seeds scaled together along the ladder
+MESH_KEYS = ('CONTACT_SEED', 'MESH_SIZE')
+
+# Quantities compared between the meshes
+QUANTITIES = ('peak_peeq', 'first_failure', 'interface_stress')
+
+# Written into every run directory by the extract (or stand-in) command
+QUANTITY_FILE = 'mesh_quantities.json'
+
+# Run per ladder level by sweep.run_sweep, formatted with {job}, {params}, {cpus}, {memory}, {script_dir}
+EXTRACT_COMMAND = ['abaqus', 'python', '{script_dir}/mesh_convergence.py', 'extract', '{job}.odb', '{params}']
+# Stand-in replacing build, solve and extract: writes synthetic mesh-dependent quantities (standin_quantities)
+STANDIN_COMMANDS = {
+    'build_command': [sys.executable, '{script_dir}/mesh_convergence.py', 'standin', '{params}'],
+    'solve_command': [sys.executable, '-c', 'pass'],
+    'extract_command': [sys.executable, '-c', 'pass'],
+}
+
+# Stand-in quantities q(h) = exact * (1 + coefficient * (h / 10)^order), h = CONTACT_SEED
+STANDIN_MODEL = {
+    'peak_peeq': (0.05, -0.2, 2.0),
+    'first_failure': (350.0, 0.1, 1.5),
+    'interface_stress': (420.0, -0.05, 1.0),
+}
+
+# Safety factor of the grid convergence index with three meshes
+GCI_SAFETY = 1.25
+
+
+def seed_ladder(params, levels=4, ratio=math.sqrt(2.0), keys=MESH_KEYS):
+    """
+    Designs with the seeds of a design refined step by step.
+
+    Level k divides every seed of keys by ratio^k, so level 0 is the design
+    itself and the element count grows by about ratio^3 per level in 3D.
+    Levels are named <JOB_NAME>_M<k>.
+
+    Returns:
+        list: (relative element size ratio^-k, parameter record) per level, coarsest first.
+    """
+    ladder = []
+    for level in range(levels):
+        scale = ratio ** -level
+        name = f"{params['JOB_NAME']}_M{level}"
+        overrides = {key: params[key] * scale for key in keys}
+        ladder.append((scale, make_params(params, MODEL_NAME=name, JOB_NAME=name, **overrides)))
+    return ladder
+
+
+def von_mises(stress):
+    """Mises stress of rows of S components (S11, S22, S33, S12[, S13, S23])."""
+    s = np.asarray(stress, dtype=np.float64)
+    shear = (s[:, 3:] ** 2).sum(axis=1)
+    return np.sqrt(0.5 * ((s[:, 0] - s[:, 1]) ** 2 + (s[:, 1] - s[:, 2]) ** 2 + (s[:, 2] - s[:, 0]) ** 2)
+                   + 3.0 * shear)
+
+
+def mesh_quantities(odb, params, instance='CU', band=None):
+    """
+    Peak Cu PEEQ and peak Mises stress at the Cu/Si interface over all frames of an ODB.
+
+    The interface band has a fixed physical width, so it holds the same
+    material on every level of a ladder.
+
+    Parameters:
+        odb (str or OdbReader): ODB path or open reader.
+        params (dict): Parameter record of the run (profile of the interface).
+        instance (str): Cu instance name in the ODB.
+        band (float): Width of the interface band in Cu; default 10 % of the smallest via radius.
+
+    Returns:
+        dict: peak_peeq and interface_stress (None if the field was not written).
+    """
+    reader = open_reader(odb)
+    band = band if band is not None else 0.1 * min(params['R0_CU'])
+    node_labels, coords, element_labels, connectivity, mask = reader.instance_mesh(instance)
+    centroids = centroids_from_arrays(node_labels, coords, connectivity, mask)
+    near = dict(zip(element_labels.tolist(), (np.abs(interface_distance(params, centroids)) <= band).tolist()))
+    peaks = {'peak_peeq': None, 'interface_stress': None}
+    for step_name in reader.step_names():
+        for index in range(reader.frame_count(step_name)):
+            for key, field_name in (('peak_peeq', 'PEEQ'), ('interface_stress', 'S')):
+                try:
+                    blocks = list(reader.field_blocks(step_name, index, field_name, instance))
+                except KeyError:
+                    continue
+                for _, labels, data in blocks:
+                    if field_name == 'S':
+                        selected = np.array([near.get(label, False) for label in labels.tolist()], dtype=bool)
+                        values = von_mises(data[selected])
+                    else:
+                        values = data[:, 0]
+                    if values.size:
+                        peaks[key] = max(peaks[key] or -np.inf, float(values.max()))
+    if reader is not odb:
+        reader.close()
+    return peaks
+
+
+def standin_quantities(params):
+    """Synthetic quantities of STANDIN_MODEL that converge with CONTACT_SEED at known orders."""
+    h = params['CONTACT_SEED'] / 10.0
+    return {key: exact * (1.0 + coefficient * h ** order)
+            for key, (exact, coefficient, order) in STANDIN_MODEL.items()}
+
+
+def richardson(sizes, values, safety=GCI_SAFETY):
+    """
+    Richardson extrapolation of a quantity from the three finest meshes.
+
+    With f1, f2, f3 on meshes of relative size h1 < h2 < h3 and constant
+    ratio r = h2 / h1, the observed order is p = ln((f3 - f2) / (f2 - f1)) / ln r,
+    the extrapolated value f1 + (f1 - f2) / (r^p - 1) and the grid convergence
+    index of the finest mesh safety * |(f1 - f2) / f1| / (r^p - 1). Without
+    monotonic convergence (or with fewer than three meshes) the finest value
+    stands in for the extrapolated one and order and GCI are None.
+
+    Parameters:
+        sizes (list): Relative element sizes of the meshes.
+        values (list): The quantity on every mesh.
+
+    Returns:
+        dict: order, extrapolated, gci, monotonic and errors (relative error of every mesh
+            against the extrapolated value, in the order of sizes).
+    """
+    sizes = np.asarray(sizes, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    order = np.argsort(sizes)
+    result = {'order': None, 'extrapolated': float(values[order[0]]), 'gci': None, 'monotonic': False}
+    if sizes.size >= 3:
+        f1, f2, f3 = values[order[:3]]
+        r = sizes[order[1]] / sizes[order[0]]
+        if (f3 - f2) * (f2 - f1) > 0 and f2 != f1:
+            p = math.log((f3 - f2) / (f2 - f1)) / math.log(r)
+            if p > 0:
+                result.update(order=p, extrapolated=float(f1 + (f1 - f2) / (r ** p - 1)), monotonic=True,
+                              gci=float(safety * abs((f1 - f2) / f1) / (r ** p - 1)) if f1 else None)
+    reference = result['extrapolated']
+    scale = abs(reference) if reference else 1.0
+    result['errors'] = (np.abs(values - reference) / scale).tolist()
+    return result
+
+
+def select_mesh(sizes, estimates, tolerance):
+    """
+    Coarsest mesh whose estimated error is within tolerance for every quantity.
+
+    Parameters:
+        sizes (list): Relative element sizes.
+        estimates (dict): Quantity -> richardson result.
+        tolerance (float or dict): Relative error bound, per quantity if a dict.
+
+    Returns:
+        int: Index into sizes, or None if no mesh is within tolerance.
+    """
+    chosen = None
+    for index in np.argsort(sizes)[::-1]:
+        if all(estimate['errors'][index] <= (tolerance[name] if isinstance(tolerance, dict) else tolerance)
+               for name, estimate in estimates.items()):
+            chosen = int(index)
+            break
+    return chosen
+
+
+def save_mesh_default(family, record, path=MESH_DEFAULTS_FILE):
+    """
+    Record the mesh default of a geometry family, keeping the other families.
+
+    sweep.name_designs applies the recorded seeds to the designs of that family.
+    """
+    defaults = load_mesh_defaults(path)
+    defaults[family] = record
+    with open(path + '.tmp', 'w') as f:
+        json.dump(defaults, f, indent=1)
+    os.replace(path + '.tmp', path)
+
+
+def read_quantities(run_dir):
+    path = os.path.join(run_dir, QUANTITY_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def convergence_study(params, levels=4, ratio=math.sqrt(2.0), tolerance=0.05, quantities=QUANTITIES,
+                      workdir='mesh_convergence', max_concurrent=4, cpu_budget=None, commands=None, interval=10.0,
+                      defaults_file=MESH_DEFAULTS_FILE, family=None):
+    """
+    Run a seed ladder of a design and record the coarsest mesh within tolerance.
+
+    All levels run at once through sweep.run_sweep under max_concurrent and
+    cpu_budget, the finest (longest) first. Every quantity is extrapolated
+    with richardson; the coarsest level whose error is within tolerance for
+    all quantities becomes the mesh default of the geometry family in
+    defaults_file. Levels that failed or lack a quantity are left out.
+
+    Parameters:
+        params (dict): Parameter record at the coarsest seeds to consider.
+        levels (int): Number of meshes.
+        ratio (float): Seed ratio between neighbouring levels.
+        tolerance (float or dict): Relative error bound, per quantity if a dict.
+        quantities (tuple): Quantities of QUANTITY_FILE to compare.
+        workdir (str): Directory receiving one sub-directory per level.
+        max_concurrent, cpu_budget, interval: See sweep.run_sweep.
+        commands (dict): build_command, solve_command and/or extract_command for run_sweep; default
+            the Abaqus build and solve with EXTRACT_COMMAND, STANDIN_COMMANDS for a dry run.
+        defaults_file (str): Mesh defaults file; None to record nothing.
+        family (str): Geometry family (default geometry_family(params)).
+
+    Returns:
+        dict: levels (size, seeds, job, status, quantities), estimates per quantity, chosen level index
+            (None if no level is within tolerance) and the recorded default.
+    """
+    commands = dict({'extract_command': EXTRACT_COMMAND}, **(commands or {}))
+    ladder = seed_ladder(params, levels, ratio)
+    finest_first = [design for _, design in reversed(ladder)]
+    statuses = {status['job']: status for status in
+                run_sweep(finest_first, workdir, max_concurrent, cpu_budget, interval=interval, **commands)}
+    runs = []
+    for size, design in ladder:
+        job = design['JOB_NAME']
+        values = read_quantities(os.path.join(workdir, job)) if statuses[job]['stage'] == 'done' else None
+        runs.append({'size': size, 'job': job, 'seeds': {key: design[key] for key in MESH_KEYS},
+                     'status': statuses[job], 'quantities': values})
+
+    solved = [run for run in runs if run['quantities'] is not None]
+    estimates = {}
+    for name in quantities:
+        have = [run for run in solved if run['quantities'].get(name) is not None]
+        if len(have) < 2:
+            print(f"{name}: only {len(have)} levels have a value, not compared")
+            continue
+        estimate = richardson([run['size'] for run in have], [run['quantities'][name] for run in have])
+        # Errors per level of the whole ladder, None where the level has no value
+        errors = dict(zip([run['job'] for run in have], estimate['errors']))
+        estimate['errors'] = [errors.get(run['job'], math.inf) for run in runs]
+        estimates[name] = estimate
+
+    study = {'family': family or geometry_family(params), 'tolerance': tolerance,
+             'levels': runs, 'estimates': estimates, 'chosen': None, 'default': None}
+    if not estimates:
+        return study
+    study['chosen'] = select_mesh([run['size'] for run in runs], estimates, tolerance)
+    if study['chosen'] is not None:
+        index = study['chosen']
+        study['default'] = {'seeds': runs[index]['seeds'], 'tolerance': tolerance,
+                            'errors': {name: estimate['errors'][index] for name, estimate in estimates.items()},
+                            'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+        if defaults_file:
+            save_mesh_default(study['family'], study['default'], defaults_file)
+    return study
+
+
+# Example usage
+if __name__ == "__main__":
+    # python mesh_convergence.py [params.json] [--standin]
+    # abaqus python mesh_convergence.py extract <job>.odb <params.json>  (EXTRACT_COMMAND)
+    # python mesh_convergence.py standin <params.json>                   (STANDIN_COMMANDS)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    if args[:1] == ['extract']:
+        from extract_failed_elements import extract_failed_elements, save_initial_coordinates
+        from result_cache import read_run_results
+        from tct_params import step_start_times
+        params = load_params(args[2])
+        save_initial_coordinates(args[1], 'initial_coordinates.txt')
+        extract_failed_elements(args[1], 'failed_elements.txt')
+        values = mesh_quantities(args[1], params)
+        values['first_failure'] = read_run_results('.', step_starts=step_start_times(params))[1]['first_failure']
+        with open(QUANTITY_FILE, 'w') as f:
+            json.dump(values, f, indent=1)
+    elif args[:1] == ['standin']:
+        with open(os.path.join(os.path.dirname(os.path.abspath(args[1])), QUANTITY_FILE), 'w') as f:
+            json.dump(standin_quantities(load_params(args[1])), f, indent=1)
+    else:
+        params = load_params(args[0]) if args else dict(DEFAULT_PARAMS)
+        study = convergence_study(params, commands=STANDIN_COMMANDS if '--standin' in sys.argv else None,
+                                  interval=0.5 if '--standin' in sys.argv else 10.0)
+        for run in study['levels']:
+            print(f"{run['job']}: seeds {run['seeds']} -> {run['quantities']}")
+        for name, estimate in study['estimates'].items():
+            print(f"{name}: order {estimate['order']}, extrapolated {estimate['extrapolated']}, "
+                  f"GCI {estimate['gci']}")
+        if study['default'] is not None:
+            print(f"Default of {study['family']}: {study['default']['seeds']}")
+        else:
+            print(f"No mesh within {study['tolerance']} for {study['family']}")
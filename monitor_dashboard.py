@@ -0,0 +1,199 @@
+import argparse
+import asyncio
+import glob
+import json
+import os
+import time
+
+from monitor_progress import StaFollower, ProgressRate, time_period
+
+
+class MsgFollower(StaFollower):
+    """Follow a .msg file and count solver warnings, errors and convergence problems."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.warnings = 0
+        self.errors = 0
+
+    def reset(self):
+        super().reset()
+        self.warnings = 0
+        self.errors = 0
+
+    def poll(self):
+        for line in self.read_lines():
+            if '***WARNING' in line:
+                self.warnings += 1
+            elif '***ERROR' in line:
+                self.errors += 1
+                self.status = 'failed'
+        return []
+
+
+def _signature(path):
+    """(inode, size, mtime) of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class JobMonitor:
+    """Progress state of one job, fed from its .sta and .msg files."""
+
+    def __init__(self, sta_path, time_period=time_period, window=120.0):
+        self.name = os.path.splitext(os.path.basename(sta_path))[0]
+        self.sta = StaFollower(sta_path)
+        self.msg = MsgFollower(os.path.splitext(sta_path)[0] + '.msg')
+        self.rate = ProgressRate(time_period, window)
+        self.last_update = None
+        self.replacements = 0
+        self.sta_signature = None  # (inode, size, mtime) of the .sta file at the last poll
+
+    def sta_changed(self):
+        """Whether the .sta file was written, replaced or truncated since the last poll (one stat)."""
+        return _signature(self.sta.path) != self.sta_signature
+
+    def poll(self, wall_time):
+        """Read whatever the solver appended since the last poll."""
+        self.sta_signature = _signature(self.sta.path)
+        records = self.sta.poll()
+        if self.sta.replacements != self.replacements:  # The job was resubmitted; follow the new run
+            self.replacements = self.sta.replacements
+            self.msg.reset()
+            self.rate = ProgressRate(self.rate.time_period, self.rate.window)
+            self.last_update = None
+        self.msg.poll()
+        self.rate.add(records, wall_time)
+        if records:
+            self.last_update = wall_time
+
+    def refresh(self, wall_time):
+        """Poll a running job; a finished one only when its .sta changed, e.g. because it was resubmitted."""
+        if self.status not in ('completed', 'failed') or self.sta_changed():
+            self.poll(wall_time)
+
+    @property
+    def status(self):
+        if self.msg.status == 'failed' and self.sta.status != 'completed':
+            return 'failed'
+        return self.sta.status
+
+    def snapshot(self):
+        """Return the job status as a JSON-serializable dict."""
+        record = self.sta.latest
+        return {
+            'job': self.name,
+            'status': self.status,
+            'step': record.step if record else None,
+            'increment': record.increment if record else None,
+            'step_time': record.step_time if record else None,
+            'total_time': record.total_time if record else None,
+            'time_increment': record.time_increment if record else None,
+            'cutbacks': self.rate.cutbacks,
+            'increments_per_second': self.rate.increments_per_second(),
+            'eta': self.rate.eta(),
+            'warnings': self.msg.warnings,
+            'errors': self.msg.errors,
+            'last_update': self.last_update,
+        }
+
+
+class Dashboard:
+    """
+    Watch many jobs at once from a single asyncio loop.
+
+    Each poll only stats the known .sta/.msg files and reads their new bytes,
+    so its cost is constant per job regardless of how long the runs are.
+    Finished jobs cost one stat of their .sta file, which still notices a
+    resubmitted job replacing it. The
+    glob patterns are re-expanded every few polls to pick up new jobs.
+
+    Parameters:
+        patterns (list): Directories or glob patterns of .sta files.
+        time_period (float): Total analysis time used for the ETA.
+        interval (float): Seconds between polls.
+        rescan_every (int): Re-expand the patterns every n polls.
+        snapshot_file (str): Optional JSON status file rewritten after every poll.
+    """
+
+    def __init__(self, patterns, time_period=time_period, interval=5.0, rescan_every=12, snapshot_file=None):
+        self.patterns = [os.path.join(p, '*.sta') if os.path.isdir(p) else p for p in patterns]
+        self.time_period = time_period
+        self.interval = interval
+        self.rescan_every = rescan_every
+        self.snapshot_file = snapshot_file
+        self.jobs = {}
+        self.polls = 0
+
+    def discover(self):
+        """Add jobs whose .sta files appeared since the last scan."""
+        for pattern in self.patterns:
+            for path in glob.glob(pattern):
+                if path not in self.jobs:
+                    self.jobs[path] = JobMonitor(path, self.time_period)
+
+    async def poll(self, wall_time=None):
+        """Poll every job once; file reads run in worker threads so slow disks do not stall the loop."""
+        if self.polls % self.rescan_every == 0:
+            self.discover()
+        self.polls += 1
+        if wall_time is None:
+            wall_time = time.time()
+        await asyncio.gather(*(asyncio.to_thread(job.refresh, wall_time) for job in self.jobs.values()))
+        if self.snapshot_file is not None:
+            self.write_snapshot(self.snapshot_file)
+
+    def snapshot(self):
+        """Return the status of all jobs as a JSON-serializable dict."""
+        return {'time': time.time(), 'jobs': [job.snapshot() for _, job in sorted(self.jobs.items())]}
+
+    def write_snapshot(self, path):
+        """Write the JSON snapshot atomically, so readers never see a partial file."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=1)
+        os.replace(tmp_path, path)
+
+    def format_table(self):
+        """Format the per-job status table."""
+        rows = [f"{'JOB':<28} {'STATUS':<10} {'STEP':>4} {'INC':>7} {'CUTB':>5} {'INC/S':>7} {'ETA':>19}"]
+        for job in (job for _, job in sorted(self.jobs.items())):
+            info = job.snapshot()
+            per_second = info['increments_per_second']
+            eta = info['eta']
+            rows.append(f"{info['job'][:28]:<28} {info['status']:<10} {info['step'] or '-':>4} "
+                        f"{info['increment'] or '-':>7} {info['cutbacks']:>5} "
+                        f"{'-' if per_second is None else f'{per_second:.2f}':>7} "
+                        f"{'-' if eta is None else time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(eta)):>19}")
+        return '\n'.join(rows)
+
+    async def run(self, polls=None, quiet=False):
+        """Poll until interrupted (or for a fixed number of polls), printing the table each time."""
+        count = 0
+        while polls is None or count < polls:
+            await self.poll()
+            if not quiet:
+                print(self.format_table())
+                print()
+            count += 1
+            if polls is None or count < polls:
+                await asyncio.sleep(self.interval)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor many Abaqus jobs from their .sta/.msg files.")
+    parser.add_argument('patterns', nargs='*', default=['.'], help="Directories or glob patterns of .sta files")
+    parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls")
+    parser.add_argument('--time-period', type=float, default=time_period, help="Total analysis time for the ETA")
+    parser.add_argument('--json', dest='snapshot_file', default=None, help="Write a JSON status snapshot here")
+    args = parser.parse_args()
+
+    dashboard = Dashboard(args.patterns, args.time_period, args.interval, snapshot_file=args.snapshot_file)
+    print("Monitoring simulation progress. Press Ctrl+C to stop.")
+    try:
+        asyncio.run(dashboard.run())
+    except KeyboardInterrupt:
+        print("Monitoring stopped.")
@@ -1,34 +1,215 @@
 import time
 import os
+from collections import deque, namedtuple
 
 # Path to the .sta file
 sta_file = "ThermalAnalysis.sta"
 
+# Total analysis time over all steps (total_cycles * cycle_time in tct_simulation.py)
+time_period = 700.0
+
+# Bytes at the start of a .sta file compared between polls (the header with the job's start date and time)
+HEAD_BYTES = 256
+
+StaRecord = namedtuple('StaRecord', ['step', 'increment', 'attempts', 'cutback', 'severe_iters', 'equil_iters',
+                                     'total_iters', 'total_time', 'step_time', 'time_increment'])
+
+
+def parse_sta_line(line):
+    """
+    Parse one increment row of an Abaqus/Standard .sta file.
+
+    A row looks like '   1    12   1U    0     5     5  3.42   3.42   0.2500'; a 'U'
+    after the attempt number marks an attempt that was cut back.
+
+    Returns:
+        StaRecord or None: The parsed record, or None for headers and messages.
+    """
+    fields = line.split()
+    if len(fields) < 9 or not (fields[0].isdigit() and fields[1].isdigit()):
+        return None
+    attempts = fields[2]
+    cutback = attempts.endswith('U')
+    try:
+        return StaRecord(int(fields[0]), int(fields[1]), int(attempts.rstrip('U')), cutback,
+                         int(fields[3]), int(fields[4]), int(fields[5]),
+                         float(fields[6]), float(fields[7]), float(fields[8]))
+    except ValueError:
+        return None
+
+
+class StaFollower:
+    """
+    Follow a growing .sta file like `tail -f`.
+
+    Only the bytes appended since the previous poll are read, so the cost of a
+    poll does not grow with the length of the run. A partial last line is kept
+    until the solver finishes writing it. When a new run replaces the file
+    (another inode or another header, which holds the start date and time)
+    or truncates it, the follower starts over from its start.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.partial = ''
+        self.latest = None
+        self.status = 'waiting'  # waiting, running, completed or failed
+        self.inode = None
+        self.head = b''  # First bytes of the file, to recognize a new run that reused the inode
+        self.replacements = 0  # Times a new run replaced or truncated the file
+
+    def reset(self):
+        """Forget what was read, to follow the file from its start."""
+        self.offset, self.partial, self.latest, self.status = 0, '', None, 'waiting'
+
+    def _replaced(self):
+        self.reset()
+        self.replacements += 1
+
+    def read_lines(self):
+        """Return the complete lines appended since the last read."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+        size = stat.st_size
+        if size < self.offset or (self.inode is not None and stat.st_ino != self.inode):  # Replaced by a new run
+            self._replaced()
+        self.inode = stat.st_ino
+        if size == self.offset:
+            return []
+        with open(self.path, 'rb') as file:
+            head = file.read(HEAD_BYTES)
+            if head[:len(self.head)] != self.head:
+                self._replaced()
+            self.head = head
+            file.seek(self.offset)
+            chunk = file.read(size - self.offset).decode('latin-1')
+            self.offset += len(chunk)
+        lines = (self.partial + chunk).replace('\r', '').split('\n')
+        self.partial = lines.pop()
+        return lines
+
+    def poll(self):
+        """
+        Read the lines appended since the last poll.
+
+        Returns:
+            list: New StaRecord rows, in file order.
+        """
+        lines = self.read_lines()
+        records = []
+        for line in lines:
+            record = parse_sta_line(line)
+            if record is not None:
+                records.append(record)
+            elif 'COMPLETED SUCCESSFULLY' in line:
+                self.status = 'completed'
+            elif 'HAS NOT BEEN COMPLETED' in line:
+                self.status = 'failed'
+        if records:
+            self.latest = records[-1]
+            if self.status == 'waiting':
+                self.status = 'running'
+        return records
+
+
+class ProgressRate:
+    """
+    Rolling increment throughput and projected finish time.
+
+    Parameters:
+        time_period (float): Total analysis time the ETA is projected against (all steps together).
+        window (float): Wall-clock seconds of history used for the rates.
+    """
+
+    def __init__(self, time_period, window=120.0):
+        self.time_period = time_period
+        self.window = window
+        self.samples = deque()  # (wall time, completed increments, total time)
+        self.increments = 0
+        self.cutbacks = 0
+
+    def add(self, records, wall_time=None):
+        """Account for new .sta records observed at wall_time."""
+        if wall_time is None:
+            wall_time = time.time()
+        for record in records:
+            if record.cutback:
+                self.cutbacks += 1
+            else:
+                self.increments += 1
+        if records:
+            self.samples.append((wall_time, self.increments, records[-1].total_time))
+        while len(self.samples) > 2 and wall_time - self.samples[1][0] > self.window:
+            self.samples.popleft()
+
+    def increments_per_second(self):
+        """Completed increments per wall-clock second over the window, or None."""
+        if len(self.samples) < 2:
+            return None
+        (t0, n0, _), (t1, n1, _) = self.samples[0], self.samples[-1]
+        return (n1 - n0) / (t1 - t0) if t1 > t0 else None
+
+    def eta(self):
+        """Projected wall-clock finish time (epoch seconds) of the analysis, or None."""
+        if len(self.samples) < 2:
+            return None
+        (t0, _, s0), (t1, _, s1) = self.samples[0], self.samples[-1]
+        if t1 <= t0 or s1 <= s0:
+            return None
+        return t1 + (self.time_period - s1) * (t1 - t0) / (s1 - s0)
+
+
+def format_progress(record, rate):
+    """Format the latest record with throughput and ETA for display."""
+    text = (f"STEP {record.step} INCREMENT {record.increment} ATT {record.attempts}"
+            f"{'U' if record.cutback else ''} TOTAL TIME {record.total_time:g}/{rate.time_period:g}"
+            f" INC {record.time_increment:g}")
+    per_second = rate.increments_per_second()
+    if per_second is not None:
+        text += f" | {per_second:.2f} inc/s"
+    finish = rate.eta()
+    if finish is not None:
+        text += f" | ETA {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(finish))}"
+    return text
+
+
+_follower = StaFollower(sta_file)
+
+
 def read_progress():
     """Read the progress from the .sta file."""
     if not os.path.exists(sta_file):
         print(".sta file not found. Waiting for the simulation to start...")
         return None
 
-    with open(sta_file, "r") as file:
-        lines = file.readlines()
-
-    # Look for the last line containing progress information
-    for line in reversed(lines):
-        if "STEP" in line and "INCREMENT" in line:
-            return line.strip()
+    _follower.poll()
+    if _follower.latest is None:
+        return "Progress information not found."
+    record = _follower.latest
+    return (f"STEP {record.step} INCREMENT {record.increment} "
+            f"TOTAL TIME {record.total_time:g} STEP TIME {record.step_time:g}")
 
-    return "Progress information not found."
 
-def monitor():
+def monitor(path=sta_file, period=time_period, interval=5.0):
     """Monitor the simulation progress."""
     print("Monitoring simulation progress. Press Ctrl+C to stop.")
+    follower = StaFollower(path)
+    rate = ProgressRate(period)
     try:
         while True:
-            progress = read_progress()
-            if progress:
-                print(progress)
-            time.sleep(5)  # Check every 5 seconds
+            records = follower.poll()
+            rate.add(records)
+            if not os.path.exists(path):
+                print(".sta file not found. Waiting for the simulation to start...")
+            elif records:
+                print(format_progress(follower.latest, rate))
+            if follower.status in ('completed', 'failed'):
+                print(f"Analysis {follower.status}.")
+                break
+            time.sleep(interval)  # Check every 5 seconds
     except KeyboardInterrupt:
         print("Monitoring stopped.")
 
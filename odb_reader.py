@@ -0,0 +1,340 @@
+import os
+import time
+
+import numpy as np
+
+try:
+    from odbAccess import *
+except ImportError:  # NumPy backend only, e.g. on a machine without Abaqus
+    openOdb = None
+
+
+def build_label_index(labels):
+    """
+    Build a lookup index from (possibly non-contiguous) Abaqus labels to array rows.
+
+    Parameters:
+        labels (array-like): Node or element labels, in storage order.
+
+    Returns:
+        tuple: (sorted_labels, order) where labels[order] == sorted_labels.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    order = np.argsort(labels, kind='stable')
+    return labels[order], order
+
+
+def lookup_rows(index, labels):
+    """
+    Map labels to row numbers using an index from build_label_index.
+
+    Parameters:
+        index (tuple): (sorted_labels, order) from build_label_index.
+        labels (array-like): Labels to look up.
+
+    Returns:
+        np.ndarray: Row numbers, same shape as labels.
+    """
+    sorted_labels, order = index
+    labels = np.asarray(labels, dtype=np.int64)
+    if sorted_labels.size == 0:
+        if labels.size:
+            raise KeyError(f"Unknown labels: {labels.ravel()[:10].tolist()}")
+        return np.zeros(labels.shape, dtype=np.int64)
+    pos = np.searchsorted(sorted_labels, labels)
+    pos = np.minimum(pos, sorted_labels.size - 1)
+    missing = sorted_labels[pos] != labels
+    if missing.any():
+        raise KeyError(f"Unknown labels: {labels[missing][:10].tolist()}")
+    return order[pos]
+
+
+def instance_node_arrays(instance):
+    """
+    Gather node labels and coordinates of an instance into arrays.
+
+    Parameters:
+        instance: ODB instance (or any object with .nodes carrying .label and .coordinates).
+
+    Returns:
+        tuple: (labels (n,), coordinates (n, 3) float64)
+    """
+    nodes = instance.nodes
+    labels = np.fromiter((node.label for node in nodes), dtype=np.int64, count=len(nodes))
+    coords = np.array([node.coordinates for node in nodes], dtype=np.float64).reshape(-1, 3)
+    return labels, coords
+
+
+def instance_connectivity(instance):
+    """
+    Gather element connectivity of an instance into a padded array.
+
+    Mixed topologies (e.g. C3D6T wedges and C3D8T hexes) are padded with 0
+    up to the largest node count; the returned mask marks the real entries.
+
+    Parameters:
+        instance: ODB instance (or any object with .elements carrying .label and .connectivity).
+
+    Returns:
+        tuple: (labels (m,), connectivity (m, k), mask (m, k) bool)
+    """
+    elements = instance.elements
+    m = len(elements)
+    labels = np.fromiter((element.label for element in elements), dtype=np.int64, count=m)
+    counts = np.fromiter((len(element.connectivity) for element in elements), dtype=np.int64, count=m)
+    width = int(counts.max()) if m else 0
+    flat = np.fromiter((node for element in elements for node in element.connectivity),
+                       dtype=np.int64, count=int(counts.sum()))
+    mask = np.arange(width) < counts[:, None]
+    connectivity = np.zeros((m, width), dtype=np.int64)
+    connectivity[mask] = flat
+    return labels, connectivity, mask
+
+
+class OdbReader:
+    """
+    Minimal read-only view of an ODB used by the post-processors.
+
+    Frames are addressed by (step name, frame index) and field values come
+    back as contiguous arrays per instance, so the same scanning code runs
+    against a real ODB or an in-memory stand-in.
+    """
+
+    def step_names(self):
+        """Return the step names in analysis order."""
+        raise NotImplementedError
+
+    def frame_count(self, step_name):
+        """Return the number of frames currently written for a step."""
+        raise NotImplementedError
+
+    def frame_time(self, step_name, index):
+        """Return the step time of a frame."""
+        raise NotImplementedError
+
+    def field_blocks(self, step_name, index, field_name, instance=None, element_set=None):
+        """
+        Yield a field of one frame as contiguous arrays.
+
+        Parameters:
+            step_name (str): Step name.
+            index (int): Frame index within the step.
+            field_name (str): Field output key, e.g. 'STATUS'.
+            instance (str): Limit to one instance (e.g. 'CU').
+            element_set (str): Limit to an element set, looked up in the instance
+                if given, otherwise in the root assembly.
+
+        Yields:
+            tuple: (instance name, element labels (n,), data (n, k))
+        """
+        raise NotImplementedError
+
+    def instance_names(self):
+        """Return the names of the assembly instances."""
+        raise NotImplementedError
+
+    def instance_mesh(self, instance_name):
+        """
+        Return the mesh of an instance as arrays.
+
+        Returns:
+            tuple: (node labels, node coordinates (n, 3), element labels,
+            padded connectivity (m, k), connectivity mask (m, k))
+        """
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def frame_total_times(reader):
+    """
+    Analysis time of every frame, assuming each step ends at its last frame.
+
+    Returns:
+        list: (step name, frame index, total time) in analysis order.
+    """
+    frames = []
+    offset = 0.0
+    for step_name in reader.step_names():
+        n = reader.frame_count(step_name)
+        for index in range(n):
+            frames.append((step_name, index, offset + reader.frame_time(step_name, index)))
+        if n:
+            offset += reader.frame_time(step_name, n - 1)
+    return frames
+
+
+def remove_lock_file(odb_path):
+    """Remove the .lck file left by a running or killed job so the ODB can be opened."""
+    lock_file = odb_path.replace('.odb', '.lck')
+    if os.path.exists(lock_file):
+        os.remove(lock_file)
+
+
+class AbaqusOdbReader(OdbReader):
+    """OdbReader over a real ODB opened read-only through odbAccess."""
+
+    def __init__(self, odb_path, remove_lock=True):
+        if remove_lock:
+            remove_lock_file(odb_path)
+        self.odb_path = odb_path
+        self.odb = openOdb(path=odb_path, readOnly=True)
+
+    def step_names(self):
+        return list(self.odb.steps.keys())
+
+    def frame_count(self, step_name):
+        return len(self.odb.steps[step_name].frames)
+
+    def frame_time(self, step_name, index):
+        return self.odb.steps[step_name].frames[index].frameValue
+
+    def region(self, instance=None, element_set=None):
+        """Resolve an instance / element set restriction to an ODB region, or None."""
+        assembly = self.odb.rootAssembly
+        if instance is not None:
+            odb_instance = assembly.instances[instance.upper()]
+            if element_set is not None:
+                return odb_instance.elementSets[element_set.upper()]
+            return odb_instance
+        if element_set is not None:
+            return assembly.elementSets[element_set.upper()]
+        return None
+
+    def field_blocks(self, step_name, index, field_name, instance=None, element_set=None):
+        field = self.odb.steps[step_name].frames[index].fieldOutputs[field_name]
+        region = self.region(instance, element_set)
+        if region is not None:
+            field = field.getSubset(region=region)
+        for block in field.bulkDataBlocks:
+            labels = np.asarray(block.elementLabels, dtype=np.int64)
+            yield block.instance.name, labels, np.asarray(block.data).reshape(labels.size, -1)
+
+    def instance_names(self):
+        return list(self.odb.rootAssembly.instances.keys())
+
+    def instance_mesh(self, instance_name):
+        instance = self.odb.rootAssembly.instances[instance_name]
+        node_labels, coords = instance_node_arrays(instance)
+        element_labels, connectivity, mask = instance_connectivity(instance)
+        return node_labels, coords, element_labels, connectivity, mask
+
+    def close(self):
+        self.odb.close()
+
+
+def open_reader(odb):
+    """Return odb unchanged if it is already an OdbReader, otherwise open the ODB path read-only."""
+    if isinstance(odb, OdbReader):
+        return odb
+    return AbaqusOdbReader(odb)
+
+
+def synthetic_block_mesh(nx, ny, nz, size=(1.0, 1.0, 1.0), origin=(0.0, 0.0, 0.0), node_offset=0, element_offset=0):
+    """
+    Generate a structured C3D8-style hex block mesh.
+
+    Parameters:
+        nx, ny, nz (int): Elements along x, y, z.
+        size (tuple): Block edge lengths.
+        origin (tuple): Block corner.
+        node_offset, element_offset (int): Added to the 1-based labels, to mimic non-contiguous numbering.
+
+    Returns:
+        tuple: (node labels, coordinates (n, 3), element labels, connectivity (m, 8))
+    """
+    gx, gy, gz = (np.linspace(o, o + s, n + 1) for o, s, n in zip(origin, size, (nx, ny, nz)))
+    X, Y, Z = np.meshgrid(gx, gy, gz, indexing='ij')
+    coords = np.column_stack([X.ravel(), Y.ravel(), Z.ravel()])
+    node_id = np.arange(coords.shape[0]).reshape(nx + 1, ny + 1, nz + 1)
+    i, j, k = (a.ravel() for a in np.meshgrid(np.arange(nx), np.arange(ny), np.arange(nz), indexing='ij'))
+    corners = [(0, 0, 0), (1, 0, 0), (1, 1, 0), (0, 1, 0), (0, 0, 1), (1, 0, 1), (1, 1, 1), (0, 1, 1)]
+    connectivity = np.column_stack([node_id[i + a, j + b, k + c] for a, b, c in corners])
+    node_labels = np.arange(1, coords.shape[0] + 1) + node_offset
+    element_labels = np.arange(1, connectivity.shape[0] + 1) + element_offset
+    return node_labels, coords, element_labels, connectivity + 1 + node_offset
+
+
+class SyntheticOdbReader(OdbReader):
+    """
+    In-memory OdbReader stand-in for testing and benchmarking without Abaqus.
+
+    Each instance is a structured hex block. Every element gets a random
+    failure time; STATUS is 1 before it and 0 after, SDEG ramps to 1 at
+    failure and PEEQ grows linearly with time, so scans have a known answer.
+    Instances, steps and frame counts are picklable constructor arguments,
+    which lets worker processes build identical readers.
+    """
+
+    def __init__(self, instances=None, steps=None, step_time=700.0, seed=0, frame_cost=0.0,
+                 failure_range=(0.1, 3.0)):
+        """
+        Parameters:
+            instances (dict): instance name -> (nx, ny, nz) element grid.
+            steps (dict): step name -> number of frames, in analysis order.
+            step_time (float): Time period of every step.
+            seed (int): Random seed for the failure times.
+            frame_cost (float): Seconds slept per field read, to emulate ODB I/O.
+            failure_range (tuple): Failure times drawn uniformly from this range,
+                in units of the total analysis time.
+        """
+        self.instances = dict(instances or {'CU': (10, 10, 10)})
+        self.steps = dict(steps or {'TCTCondition': 101})
+        self.step_time = step_time
+        self.frame_cost = frame_cost
+        rng = np.random.default_rng(seed)
+        total_time = step_time * len(self.steps)
+        self.meshes = {}
+        self.failure_times = {}
+        for name, (nx, ny, nz) in self.instances.items():
+            self.meshes[name] = synthetic_block_mesh(nx, ny, nz, size=(float(nx), float(ny), float(nz)))
+            n_elements = nx * ny * nz
+            self.failure_times[name] = rng.uniform(*failure_range, size=n_elements) * total_time
+
+    def step_names(self):
+        return list(self.steps)
+
+    def frame_count(self, step_name):
+        return self.steps[step_name]
+
+    def frame_time(self, step_name, index):
+        return self.step_time * index / max(self.steps[step_name] - 1, 1)
+
+    def total_time(self, step_name, index):
+        """Return the analysis time of a frame (previous steps included)."""
+        return self.step_names().index(step_name) * self.step_time + self.frame_time(step_name, index)
+
+    def field_blocks(self, step_name, index, field_name, instance=None, element_set=None):
+        t = self.total_time(step_name, index)
+        for name in self.instances:
+            if instance is not None and name != instance.upper():
+                continue
+            if element_set is not None and element_set.upper() != f"{name}VOLUME":
+                continue
+            if self.frame_cost:
+                time.sleep(self.frame_cost)
+            labels = self.meshes[name][2]
+            failure_times = self.failure_times[name]
+            if field_name == 'STATUS':
+                data = (failure_times > t).astype(np.float32)
+            elif field_name == 'SDEG':
+                data = np.minimum(t / failure_times, 1.0).astype(np.float32)
+            elif field_name == 'PEEQ':
+                data = (0.3 * t / failure_times).astype(np.float32)
+            else:
+                raise KeyError(field_name)
+            yield name, labels, data[:, None]
+
+    def instance_names(self):
+        return list(self.instances)
+
+    def instance_mesh(self, instance_name):
+        node_labels, coords, element_labels, connectivity = self.meshes[instance_name]
+        return node_labels, coords, element_labels, connectivity, np.ones(connectivity.shape, dtype=bool)
@@ -0,0 +1,229 @@
+import math
+import os
+import sys
+
+import numpy as np
+
+from tct_params import DEFAULT_PARAMS, load_params, step_increments, step_plan, symmetry
+from via_mesh import via_mesh
+
+# Field output the post-processors read: (variables, instance, element set, schedule) per consumer. The
+# region is the whole model when instance is None. Schedules: 'increments' (every OUTPUT_FREQUENCY
+# increments), 'extremes' (temperature turning points of every cycle) and 'cycle_ends'.
+OUTPUT_NEEDS = {
+    # extract_failed_elements.py, parallel_extract.py and failure_watchdog.py
+    'failed_elements': [(('STATUS', 'SDEG'), 'Cu', 'Cuvolume', 'increments')],
+    # cycle_jump.py
+    'cycle_jump': [(('PEEQ', 'SDEG'), 'Cu', 'Cuvolume', 'cycle_ends')],
+    # Stress and plastic strain fields at the hot and cold dwells
+    'stress_extremes': [(('S', 'PEEQ'), None, None, 'extremes')],
+}
+
+# Field output of *Output, variable=PRESELECT in a coupled temperature-displacement step with ductile damage
+PRESELECT_FIELDS = ('S', 'PE', 'PEEQ', 'PEMAG', 'LE', 'U', 'RF', 'CF', 'NT', 'HFL', 'RFL', 'STATUS', 'SDEG')
+
+NODAL_VARIABLES = ('U', 'RF', 'CF', 'NT', 'RFL')
+TENSOR_VARIABLES = ('S', 'PE', 'LE')
+VECTOR_VARIABLES = ('U', 'RF', 'CF', 'HFL')
+
+INTEGRATION_POINTS = {'C3D6T': 2, 'C3D8T': 8, 'CAX3T': 1, 'CAX4T': 4}
+
+# Sustained ODB write rate (bytes/s) that turns the size estimate into write time
+ODB_WRITE_RATE = 100e6
+
+
+def output_needs(params):
+    """
+    Merge the needs of the consumers in OUTPUT_CONSUMERS into one request per region and schedule.
+
+    Returns:
+        list: Dicts with name (e.g. 'CuvolumeIncrements'), variables, instance, elset and schedule.
+
+    Raises:
+        ValueError: If a consumer is not one of OUTPUT_NEEDS.
+    """
+    merged = {}
+    for consumer in params['OUTPUT_CONSUMERS']:
+        if consumer not in OUTPUT_NEEDS:
+            raise ValueError(f"Unknown output consumer {consumer!r}, expected one of {tuple(OUTPUT_NEEDS)}")
+        for variables, instance, elset, schedule in OUTPUT_NEEDS[consumer]:
+            merged_variables = merged.setdefault((instance, elset, schedule), [])
+            merged_variables.extend(variable for variable in variables if variable not in merged_variables)
+    return [{'name': (elset or 'Model') + schedule.title().replace('_', ''), 'variables': tuple(variables),
+             'instance': instance, 'elset': elset, 'schedule': schedule}
+            for (instance, elset, schedule), variables in merged.items()]
+
+
+def schedule_times(params, schedule):
+    """Total times of the output of a time-based schedule ('extremes' or 'cycle_ends') over all cycles."""
+    if schedule == 'cycle_ends':
+        cycle_times = [params['CYCLE_TIME']]
+    else:
+        temperatures = [temp for _, temp in params['SINGLE_CYCLE_DATA']]
+        extremes = (max(temperatures), min(temperatures))
+        cycle_times = [time for time, temp in params['SINGLE_CYCLE_DATA'] if temp in extremes]
+    return [round(cycle * params['CYCLE_TIME'] + time, 10)
+            for cycle in range(params['TOTAL_CYCLES']) for time in cycle_times]
+
+
+def output_plan(params):
+    """
+    Field output requests of every step of step_plan under OUTPUT_POLICY 'needs'.
+
+    Per-increment needs are written every OUTPUT_FREQUENCY increments (Abaqus
+    always adds the last increment of a step). The other schedules become time
+    points in step time, named after the request and numbered; steps with the
+    same points share one definition. A request without points in a step is
+    not active in that step.
+
+    Returns:
+        tuple: (list with the active requests of every step, {time point name: step times}).
+            Requests are output_needs dicts plus frequency (or None) and time_points (name or None).
+    """
+    needs = output_needs(params)
+    times = {need['schedule']: np.array(schedule_times(params, need['schedule']))
+             for need in needs if need['schedule'] != 'increments'}
+    names = {}
+    time_points = {}
+    steps = []
+    for step in step_plan(params):
+        requests = []
+        for need in needs:
+            request = dict(need, frequency=None, time_points=None)
+            if need['schedule'] == 'increments':
+                request['frequency'] = params['OUTPUT_FREQUENCY']
+            else:
+                total = times[need['schedule']]
+                inside = total[(total > step['start'] + 1e-9) & (total <= step['start'] + step['period'] + 1e-9)]
+                if not inside.size:
+                    continue
+                points = tuple(np.round(inside - step['start'], 10).tolist())
+                if (need['name'], points) not in names:
+                    count = sum(1 for name, _ in names if name == need['name'])
+                    names[(need['name'], points)] = f"{need['name']}{count + 1}"
+                    time_points[names[(need['name'], points)]] = points
+                request['time_points'] = names[(need['name'], points)]
+            requests.append(request)
+        steps.append(requests)
+    return steps, time_points
+
+
+def _region_sizes(params):
+    """Output locations of the model: integration points and nodes of Cu and of the whole model."""
+    cu, si = via_mesh(params)
+    sizes = {}
+    for name, parts in (('Cu', (cu,)), (None, (cu, si))):
+        points = sum(connectivity.shape[0] * INTEGRATION_POINTS[elem_type]
+                     for part in parts for elem_type, connectivity in part.elements.items())
+        nodes = sum(part.coords.shape[0] for part in parts)
+        sizes[name] = (points, nodes)
+    return sizes
+
+
+def _components(params, variable):
+    axisymmetric = symmetry(params) == 'axisymmetric'
+    if variable in TENSOR_VARIABLES:
+        return 4 if axisymmetric else 6
+    if variable in VECTOR_VARIABLES:
+        return 2 if axisymmetric else 3
+    return 1
+
+
+def odb_estimate(params, policy=None):
+    """
+    Estimate the field output a design writes to its ODB.
+
+    Counts frames and single precision values (element variables at every
+    integration point, nodal variables at every node) from the increments of
+    tct_params.step_increments; labels, history output and the model data are
+    left out, so compare policies rather than reading it as the file size.
+
+    Parameters:
+        params (dict): Parameter record.
+        policy (str): 'needs' or 'preselect'; default OUTPUT_POLICY.
+
+    Returns:
+        dict: policy, frames, values, bytes and write_time (s at ODB_WRITE_RATE).
+    """
+    policy = policy or params['OUTPUT_POLICY']
+    sizes = _region_sizes(params)
+    increments = step_increments(params)
+    if policy == 'preselect':
+        frames = sum(increments)
+        requests = [(frames, PRESELECT_FIELDS, None)]
+    else:
+        outputs, time_points = output_plan(params)
+        # Frames are written at the union of the output times of all requests
+        frames = _frame_count(increments, outputs, time_points)
+        requests = []
+        for count, step_requests in zip(increments, outputs):
+            for request in step_requests:
+                if request['time_points'] is None:
+                    request_frames = math.ceil(count / request['frequency'])
+                else:
+                    request_frames = len(time_points[request['time_points']])
+                requests.append((request_frames, request['variables'], request['instance']))
+    values = 0
+    for request_frames, variables, instance in requests:
+        points = sizes[instance][0]
+        nodes = sizes[None][1]
+        values += request_frames * sum(_components(params, variable) * (nodes if variable in NODAL_VARIABLES
+                                                                         else points) for variable in variables)
+    return {'policy': policy, 'frames': frames, 'values': values, 'bytes': 4 * values,
+            'write_time': 4 * values / ODB_WRITE_RATE}
+
+
+def _frame_count(increments, outputs, time_points):
+    frames = 0
+    for count, step_requests in zip(increments, outputs):
+        frequencies = [request['frequency'] for request in step_requests if request['time_points'] is None]
+        frames_in_step = math.ceil(count / min(frequencies)) if frequencies else 0
+        points = {point for request in step_requests if request['time_points'] is not None
+                  for point in time_points[request['time_points']]}
+        frames += max(frames_in_step, len(points))
+    return frames
+
+
+def output_report(params, reference_odb=None, policy_odb=None):
+    """
+    Compare the estimated ODB output of the PRESELECT defaults and the needs-based requests.
+
+    Parameters:
+        params (dict): Parameter record.
+        reference_odb, policy_odb (str): ODBs of the same design run with each policy; their
+            file sizes are added to the report when given.
+
+    Returns:
+        dict: preselect and needs estimates (see odb_estimate), saved_bytes, saved_write_time,
+            size_ratio and, with the ODBs, measured_bytes {policy: size}.
+    """
+    preselect = odb_estimate(params, 'preselect')
+    needs = odb_estimate(params, 'needs')
+    report = {
+        'preselect': preselect,
+        'needs': needs,
+        'saved_bytes': preselect['bytes'] - needs['bytes'],
+        'saved_write_time': preselect['write_time'] - needs['write_time'],
+        'size_ratio': needs['bytes'] / preselect['bytes'] if preselect['bytes'] else 0.0,
+    }
+    if reference_odb and policy_odb:
+        report['measured_bytes'] = {'preselect': os.path.getsize(reference_odb),
+                                    'needs': os.path.getsize(policy_odb)}
+    return report
+
+
+# Example usage
+if __name__ == "__main__":
+    # python output_policy.py [params.json] [preselect.odb needs.odb]
+    params = load_params(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].endswith('.json') \
+        else dict(DEFAULT_PARAMS)
+    odbs = [arg for arg in sys.argv[1:] if arg.endswith('.odb')]
+    report = output_report(params, *odbs[:2])
+    for policy in ('preselect', 'needs'):
+        estimate = report[policy]
+        print(f"{policy:<10} {estimate['frames']:>8} frames {estimate['bytes'] / 1e6:>10.1f} MB "
+              f"{estimate['write_time']:>8.1f} s write")
+    print(f"Saved {report['saved_bytes'] / 1e6:.1f} MB ({1 - report['size_ratio']:.1%}) and "
+          f"{report['saved_write_time']:.1f} s of ODB writing")
+    for policy, size in report.get('measured_bytes', {}).items():
+        print(f"Measured {policy}: {size / 1e6:.1f} MB")
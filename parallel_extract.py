@@ -0,0 +1,192 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from extract_failed_elements import FailureScanner
+from odb_reader import AbaqusOdbReader, SyntheticOdbReader, remove_lock_file
+
+
+def abaqus_reader_factory(odb_path):
+    """
+    Return a picklable factory that opens its own read-only handle on an ODB.
+
+    The lock file is removed once here, not by every worker.
+    """
+    remove_lock_file(odb_path)
+    return partial(AbaqusOdbReader, odb_path, remove_lock=False)
+
+
+def frame_chunks(reader, chunk_size=64, frame_stride=1):
+    """
+    Split the frames of all steps into contiguous chunks.
+
+    Parameters:
+        reader (OdbReader): Open reader, used only to count frames.
+        chunk_size (int): Frames per chunk (after applying the stride).
+        frame_stride (int): Scan every n-th frame; the last frame of a step is always kept.
+
+    Returns:
+        list: (step index, step name, frame indices) tuples in analysis order.
+    """
+    chunks = []
+    for step_index, step_name in enumerate(reader.step_names()):
+        n = reader.frame_count(step_name)
+        indices = list(range(0, n, frame_stride))
+        if n and indices[-1] != n - 1:
+            indices.append(n - 1)
+        for start in range(0, len(indices), chunk_size):
+            chunks.append((step_index, step_name, indices[start:start + chunk_size]))
+    return chunks
+
+
+def _scan_chunk(reader_factory, field_name, instance, element_set, chunk):
+    """Worker: scan one chunk of frames with a fresh reader and scanner."""
+    step_index, step_name, indices = chunk
+    reader = reader_factory()
+    scanner = FailureScanner()
+    frame_of = {}
+    try:
+        for index in indices:
+            t = reader.frame_time(step_name, index)
+            for instance_name, labels, status in reader.field_blocks(step_name, index, field_name,
+                                                                     instance, element_set):
+                newly = scanner.update(t, instance_name, labels, status)
+                if newly.size:
+                    frame_of.setdefault(instance_name, []).append(np.full(newly.size, index, dtype=np.int64))
+    finally:
+        reader.close()
+    partial_result = {}
+    for instance_name, (labels, times) in scanner.first_failures().items():
+        frames = np.concatenate(frame_of[instance_name])
+        partial_result[instance_name] = (labels, np.full(labels.size, step_index, dtype=np.int64), frames, times)
+    return partial_result
+
+
+def merge_first_failures(partials):
+    """
+    Merge per-chunk first failures with a min-time reduction.
+
+    Parameters:
+        partials (iterable): Dicts of instance name -> (labels, step indices, frame indices, step times).
+
+    Returns:
+        dict: instance name -> (labels, step indices, frame indices, step times), one entry
+        per element at its earliest (step, frame), sorted by failure order.
+    """
+    gathered = {}
+    for partial_result in partials:
+        for instance_name, arrays in partial_result.items():
+            gathered.setdefault(instance_name, []).append(arrays)
+    merged = {}
+    for instance_name, parts in gathered.items():
+        labels, steps, frames, times = (np.concatenate(column) for column in zip(*parts))
+        order = np.lexsort((labels, frames, steps))
+        labels, steps, frames, times = labels[order], steps[order], frames[order], times[order]
+        _, first = np.unique(labels, return_index=True)
+        first.sort()
+        merged[instance_name] = (labels[first], steps[first], frames[first], times[first])
+    return merged
+
+
+def write_failed_elements(output_file, merged, step_names):
+    """Write merged first failures in the failed_elements.txt format."""
+    records = []
+    for instance_name, (labels, steps, frames, times) in merged.items():
+        records.extend(zip(steps.tolist(), frames.tolist(), labels.tolist(), times.tolist(),
+                           [instance_name] * labels.size))
+    records.sort()
+    with open(output_file, 'w') as f:
+        f.write("Failed Elements and Step Times\n")
+        f.write("================================\n")
+        current_step = None
+        for step_index, _, label, t, instance_name in records:
+            if step_index != current_step:
+                current_step = step_index
+                f.write(f"Step: {step_names[step_index]}\n")
+            f.write(f"Time: {t}, Element: {label}, Instance: {instance_name}\n")
+
+
+def parallel_extract_failed_elements(reader_factory, output_file=None, workers=None, chunk_size=64,
+                                     frame_stride=1, field_name='STATUS', instance=None, element_set=None):
+    """
+    Extract first failure times with frames spread over a process pool.
+
+    Each worker opens its own read-only reader through reader_factory, scans
+    a contiguous chunk of frames, and returns its local first failures; the
+    chunks are then merged keeping the earliest (step, frame) per element.
+
+    Parameters:
+        reader_factory (callable): Picklable zero-argument callable returning an OdbReader,
+            e.g. abaqus_reader_factory(odb_path) or partial(SyntheticOdbReader, ...).
+        output_file (str): Optional failed_elements.txt-style output path.
+        workers (int): Worker processes; defaults to os.cpu_count(). 1 runs in-process.
+        chunk_size (int): Frames per task.
+        frame_stride (int): Scan every n-th frame.
+        field_name (str): Field holding the element status.
+        instance (str): Limit the scan to one instance (e.g. 'CU').
+        element_set (str): Limit the scan to an element set (e.g. 'CUVOLUME').
+
+    Returns:
+        dict: instance name -> (labels, step indices, frame indices, step times).
+    """
+    with reader_factory() as reader:
+        step_names = reader.step_names()
+        chunks = frame_chunks(reader, chunk_size, frame_stride)
+
+    scan = partial(_scan_chunk, reader_factory, field_name, instance, element_set)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        partials = list(map(scan, chunks))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            partials = list(executor.map(scan, chunks))
+
+    merged = merge_first_failures(partials)
+    if output_file is not None:
+        write_failed_elements(output_file, merged, step_names)
+    return merged
+
+
+def benchmark(worker_counts=(1, 2, 4), n_frames=400, grid=(40, 40, 40), frame_cost=0.002, chunk_size=25):
+    """
+    Measure scaling of the parallel driver on a synthetic ODB.
+
+    Parameters:
+        worker_counts (tuple): Worker counts to try.
+        n_frames (int): Frames in the synthetic step.
+        grid (tuple): Element grid of the synthetic CU instance.
+        frame_cost (float): Emulated I/O latency per frame read, in seconds.
+        chunk_size (int): Frames per task.
+
+    Returns:
+        list: (workers, seconds, frames per second) per run.
+    """
+    factory = partial(SyntheticOdbReader, instances={'CU': grid}, steps={'TCTCondition': n_frames},
+                      frame_cost=frame_cost)
+    results = []
+    reference = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        merged = parallel_extract_failed_elements(factory, workers=workers, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - start
+        labels = merged['CU'][0]
+        if reference is None:
+            reference = np.sort(labels)
+        elif not np.array_equal(reference, np.sort(labels)):
+            raise RuntimeError(f"Result with {workers} workers differs from the serial run")
+        results.append((workers, elapsed, n_frames / elapsed))
+        print(f"workers={workers}: {elapsed:.2f} s, {n_frames / elapsed:.1f} frames/s, {labels.size} failed")
+    return results
+
+
+# Example usage
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--benchmark':
+        benchmark()
+    else:
+        odb_path = "ThermalAnalysis.odb"  # Path to the ODB file
+        parallel_extract_failed_elements(abaqus_reader_factory(odb_path), "failed_elements.txt")
@@ -0,0 +1,400 @@
+import argparse
+import heapq
+import json
+import math
+import os
+import platform
+import re
+import time
+
+import numpy as np
+from scipy.optimize import least_squares
+
+from sweep import run_sweep
+from tct_params import estimate_increments, load_designs, make_params, save_designs
+from via_mesh import via_mesh
+
+# Scaling model used before any timings are recorded (seconds and bytes; replaced by ScalingModel.fit)
+DEFAULT_MODEL = {
+    'k0': 0.05,  # Seconds per increment independent of the mesh
+    'k1': 2e-5,  # Seconds per increment and element on one CPU
+    'serial': 0.2,  # Fraction of the solve that does not speed up with more CPUs (Amdahl)
+    'm0': 300e6,  # Solver memory independent of the mesh
+    'm1': 20e3,  # Solver memory per element
+    'm_cpu': 100e6,  # Extra memory per additional CPU
+}
+# Weight pulling the fitted coefficients toward DEFAULT_MODEL, so few or similar timings do not make them degenerate
+PRIOR_WEIGHT = 0.1
+# Memory granted to a job relative to its predicted need, and the largest share of the RAM one job may get
+MEMORY_HEADROOM = 1.25
+MAX_MEMORY = 90  # PERCENTAGE
+TIMINGS_FILE = 'solver_timings.jsonl'
+# Relative difference of simulated batch times that plan_batch treats as equal
+PLAN_TOLERANCE = 1e-6
+
+# Memory estimate table of an Abaqus/Standard .dat file: process, floating point operations, minimum memory (MB),
+# memory to minimize I/O (MB)
+_MEMORY_ROW = re.compile(r'^\s*\d+\s+[\d.]+E[+-]\d+\s+([\d.]+)\s+([\d.]+)\s*$', re.IGNORECASE)
+
+
+def machine_resources():
+    """
+    Cores and physical memory of this machine.
+
+    Returns:
+        tuple: (cores, memory in bytes or None where the OS does not report it)
+    """
+    cores = os.cpu_count() or 1
+    try:
+        memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):  # Windows
+        memory = None
+    return cores, memory
+
+
+def job_size(params):
+    """
+    Size of a design's solver job without building it.
+
+    Elements and nodes come from the generated via mesh (the same divisions
+    the CAE mesh is seeded with), increments from estimate_increments.
+
+    Returns:
+        dict: elements, nodes and increments.
+    """
+    cu, si = via_mesh(params)
+    return {'elements': int(cu.all_element_labels().size + si.all_element_labels().size),
+            'nodes': int(cu.coords.shape[0] + si.coords.shape[0]),
+            'increments': estimate_increments(params)}
+
+
+def read_memory_estimate(dat_path):
+    """Memory to minimize I/O from the memory estimate of an Abaqus .dat file, in bytes (None if absent)."""
+    if not os.path.exists(dat_path):
+        return None
+    estimate = None
+    with open(dat_path, 'r') as f:
+        for line in f:
+            match = _MEMORY_ROW.match(line)
+            if match:
+                estimate = max(estimate or 0.0, float(match.group(2)) * 1e6)
+    return estimate
+
+
+class ScalingModel:
+    """
+    Solve time and memory of a job from its size and CPU count.
+
+    seconds = increments * (k0 + k1 * elements) * (serial + (1 - serial) / cpus)
+    memory = m0 + m1 * elements + m_cpu * (cpus - 1)
+
+    Parameters:
+        coefficients: Overrides of DEFAULT_MODEL.
+    """
+
+    def __init__(self, **coefficients):
+        unknown = set(coefficients) - set(DEFAULT_MODEL)
+        if unknown:
+            raise ValueError(f"Unknown coefficients {sorted(unknown)}, expected some of {sorted(DEFAULT_MODEL)}")
+        self.coefficients = dict(DEFAULT_MODEL, **coefficients)
+        self.n_timings = 0
+
+    def seconds(self, elements, increments, cpus):
+        c = self.coefficients
+        return increments * (c['k0'] + c['k1'] * elements) * (c['serial'] + (1.0 - c['serial']) / cpus)
+
+    def memory(self, elements, cpus):
+        c = self.coefficients
+        return c['m0'] + c['m1'] * elements + c['m_cpu'] * (cpus - 1)
+
+    def fit(self, timings):
+        """
+        Fit the coefficients to recorded timings.
+
+        Times are fitted in log space, memories relative to their size; both
+        are pulled toward DEFAULT_MODEL with PRIOR_WEIGHT. The serial fraction
+        is only fitted when the timings cover more than one CPU count.
+
+        Parameters:
+            timings (list): Records with elements, increments, cpus, seconds and optionally memory_bytes
+                (see timings_from_sweep).
+
+        Returns:
+            ScalingModel: self
+        """
+        timed = [record for record in timings if record.get('seconds') and record['increments'] > 0]
+        self.n_timings = len(timed)
+        if timed:
+            elements = np.array([record['elements'] for record in timed], dtype=float)
+            increments = np.array([record['increments'] for record in timed], dtype=float)
+            cpus = np.array([record['cpus'] for record in timed], dtype=float)
+            seconds = np.array([record['seconds'] for record in timed], dtype=float)
+            fit_serial = len(set(cpus.tolist())) > 1
+            prior = np.array([math.log(DEFAULT_MODEL['k0']), math.log(DEFAULT_MODEL['k1']), DEFAULT_MODEL['serial']])
+            start = np.array([math.log(self.coefficients['k0']), math.log(self.coefficients['k1']),
+                              self.coefficients['serial']])
+
+            def residuals(x):
+                serial = x[2] if fit_serial else self.coefficients['serial']
+                predicted = increments * (np.exp(x[0]) + np.exp(x[1]) * elements) * (serial + (1.0 - serial) / cpus)
+                return np.concatenate([np.log(predicted / seconds), PRIOR_WEIGHT * (x - prior)])
+
+            x = least_squares(residuals, start, bounds=([-np.inf, -np.inf, 0.0], [np.inf, np.inf, 1.0])).x
+            self.coefficients['k0'], self.coefficients['k1'] = float(np.exp(x[0])), float(np.exp(x[1]))
+            if fit_serial:
+                self.coefficients['serial'] = float(x[2])
+
+        measured = [record for record in timed if record.get('memory_bytes')]
+        if measured:
+            elements = np.array([record['elements'] for record in measured], dtype=float)
+            cpus = np.array([record['cpus'] for record in measured], dtype=float)
+            memory = np.array([record['memory_bytes'] for record in measured], dtype=float)
+            prior = np.array([DEFAULT_MODEL['m0'], DEFAULT_MODEL['m1'], DEFAULT_MODEL['m_cpu']])
+
+            def residuals(x):
+                predicted = prior[0] * x[0] + prior[1] * x[1] * elements + prior[2] * x[2] * (cpus - 1)
+                return np.concatenate([predicted / memory - 1.0, PRIOR_WEIGHT * (x - 1.0)])
+
+            x = least_squares(residuals, np.ones(3), bounds=(0.0, np.inf)).x * prior
+            self.coefficients['m0'], self.coefficients['m1'], self.coefficients['m_cpu'] = (float(v) for v in x)
+        return self
+
+
+def simulate(jobs, cores, memory_bytes, max_concurrent=None):
+    """
+    Replay the run_sweep scheduler on predicted solve times.
+
+    Jobs start in queue order whenever their CPUs and memory fit next to the
+    running ones (a job that does not fit is passed over for later ones, as in
+    run_sweep) and at most max_concurrent run at once.
+
+    Parameters:
+        jobs (list): Dicts with seconds, cpus and memory_bytes, in queue order.
+        cores (int): CPU budget.
+        memory_bytes (float): Memory budget.
+        max_concurrent (int): Maximum jobs running at once; None for no limit.
+
+    Returns:
+        dict: makespan (seconds), peak_concurrent, starts and ends (seconds per job).
+    """
+    queue = list(range(len(jobs)))
+    running = []  # Heap of (end, job index)
+    starts, ends = [None] * len(jobs), [None] * len(jobs)
+    now = 0.0
+    cpus_free, memory_free = cores, memory_bytes
+    peak = 0
+    while queue or running:
+        for i in list(queue):
+            if max_concurrent is not None and len(running) >= max_concurrent:
+                break
+            if jobs[i]['cpus'] > cpus_free or jobs[i]['memory_bytes'] > memory_free:
+                continue
+            queue.remove(i)
+            starts[i] = now
+            heapq.heappush(running, (now + jobs[i]['seconds'], i))
+            cpus_free -= jobs[i]['cpus']
+            memory_free -= jobs[i]['memory_bytes']
+        peak = max(peak, len(running))
+        if not running:
+            raise ValueError(f"Job {queue[0]} does not fit into {cores} CPUs and {memory_bytes / 1e9:.1f} GB")
+        now, i = heapq.heappop(running)
+        ends[i] = now
+        cpus_free += jobs[i]['cpus']
+        memory_free += jobs[i]['memory_bytes']
+    return {'makespan': now, 'peak_concurrent': peak, 'starts': starts, 'ends': ends}
+
+
+def plan_batch(designs, cores=None, memory_bytes=None, model=None, cpu_options=None):
+    """
+    Choose the CPUs, memory and order of every solver job of a batch for the shortest batch time.
+
+    Every job starts on one CPU, which gives the best throughput while there
+    are more jobs than cores. The planner then repeatedly gives the next CPU
+    option either to all jobs that finish last together (e.g. a batch of
+    identical jobs on more cores than jobs) or to single jobs, latest first.
+    A move is kept when the simulated batch (see simulate) gets shorter, or
+    keeps its length while the jobs finish earlier on average. This helps
+    when fewer jobs than cores are left or memory limits how many jobs run
+    side by side. Jobs are queued longest first.
+
+    Parameters:
+        designs (list): Named parameter records.
+        cores (int): CPUs (license tokens) of the batch; default this machine's cores.
+        memory_bytes (float): Memory of the batch; default this machine's physical memory.
+        model (ScalingModel): Time and memory model; default the uncalibrated DEFAULT_MODEL.
+        cpu_options (list): CPU counts a job may get; default the powers of two up to cores.
+
+    Returns:
+        dict: cores, memory_bytes, model (coefficients), makespan, throughput (jobs per hour),
+            max_concurrent, cpu_budget and memory_budget (for run_sweep) and jobs -- one dict per job in queue
+            order with job, elements, increments, cpus, memory (percentage), memory_bytes, seconds, start and end.
+
+    Raises:
+        ValueError: If the memory of the machine is unknown and not given, or a job does not fit.
+    """
+    machine_cores, machine_memory = machine_resources()
+    cores = cores or machine_cores
+    memory_bytes = memory_bytes or machine_memory
+    if memory_bytes is None:
+        raise ValueError("Physical memory is unknown on this platform, pass memory_bytes")
+    model = model or ScalingModel()
+    cpu_options = sorted(cpu_options or [2 ** k for k in range(int(math.log2(cores)) + 1)])
+    sizes = [job_size(params) for params in designs]
+
+    def job(index, cpus):
+        size = sizes[index]
+        need = model.memory(size['elements'], cpus) * MEMORY_HEADROOM
+        memory = min(MAX_MEMORY, max(1, math.ceil(100 * need / memory_bytes)))
+        return {'index': index, 'cpus': cpus, 'memory': memory, 'memory_bytes': memory * memory_bytes / 100,
+                'seconds': model.seconds(size['elements'], size['increments'], cpus)}
+
+    def schedule(option_of):
+        jobs = sorted((job(i, cpu_options[option]) for i, option in enumerate(option_of)),
+                      key=lambda entry: -entry['seconds'])
+        return jobs, simulate(jobs, cores, memory_bytes)
+
+    def better(trial, result):
+        if trial['makespan'] < result['makespan'] * (1 - PLAN_TOLERANCE):
+            return True
+        return (trial['makespan'] <= result['makespan'] * (1 + PLAN_TOLERANCE)
+                and sum(trial['ends']) < sum(result['ends']) * (1 - PLAN_TOLERANCE))
+
+    option_of = [0] * len(designs)
+    jobs, result = schedule(option_of)
+    improved = True
+    while improved:
+        improved = False
+        # The jobs that end the batch together, then every job on its own, latest first
+        latest = sorted(range(len(jobs)), key=lambda p: -result['ends'][p])
+        last = [p for p in latest if result['ends'][p] >= result['makespan'] * (1 - PLAN_TOLERANCE)]
+        moves = ([last] if len(last) > 1 else []) + [[p] for p in latest]
+        for move in moves:
+            indices = [jobs[p]['index'] for p in move]
+            if any(option_of[index] + 1 >= len(cpu_options) for index in indices):
+                continue
+            trial_options = list(option_of)
+            for index in indices:
+                trial_options[index] += 1
+            trial_jobs, trial = schedule(trial_options)
+            if better(trial, result):
+                option_of, jobs, result = trial_options, trial_jobs, trial
+                improved = True
+                break
+
+    planned = []
+    for entry, start, end in zip(jobs, result['starts'], result['ends']):
+        size = sizes[entry['index']]
+        planned.append({'job': designs[entry['index']]['JOB_NAME'], 'elements': size['elements'],
+                        'increments': size['increments'], 'cpus': entry['cpus'], 'memory': entry['memory'],
+                        'memory_bytes': entry['memory_bytes'], 'seconds': entry['seconds'], 'start': start,
+                        'end': end})
+    makespan = result['makespan']
+    return {'cores': cores, 'memory_bytes': memory_bytes, 'model': dict(model.coefficients), 'makespan': makespan,
+            'throughput': 3600.0 * len(designs) / makespan if makespan > 0 else None,
+            'max_concurrent': max(1, result['peak_concurrent']), 'cpu_budget': cores, 'memory_budget': 100,
+            'jobs': planned}
+
+
+def apply_plan(designs, plan):
+    """
+    Planned copies of the designs: NUM_CPUS, NUM_DOMAINS (one per CPU) and MEMORY set, in the plan's queue order.
+
+    tct_simulation.create_job and the solve commands of sweep.py read these
+    parameters, so the plan holds both for CAE-submitted and command-line jobs.
+    """
+    by_job = {params['JOB_NAME']: params for params in designs}
+    return [make_params(by_job[entry['job']], NUM_CPUS=entry['cpus'], NUM_DOMAINS=entry['cpus'],
+                        MEMORY=entry['memory']) for entry in plan['jobs']]
+
+
+def timings_from_sweep(statuses, designs, workdir='sweep', host=None):
+    """
+    Timing records of the finished solves of a sweep.
+
+    Parameters:
+        statuses (list): Status dicts returned by run_sweep.
+        designs (list): The designs of the sweep.
+        workdir (str): Working directory of the sweep; <job>/<job>.dat supplies the memory estimate.
+        host (str): Machine name recorded with the timings (default this machine).
+
+    Returns:
+        list: Dicts with host, job, elements, nodes, increments, cpus, seconds and memory_bytes (None
+            without a .dat memory estimate).
+    """
+    host = host or platform.node()
+    by_job = {params['JOB_NAME']: params for params in designs}
+    records = []
+    for status in statuses:
+        seconds = status['times'].get('solve')
+        if status['stage'] != 'done' or not seconds or status['job'] not in by_job:
+            continue
+        record = {'host': host, 'job': status['job'], 'cpus': status['cpus'], 'seconds': seconds,
+                  'memory_bytes': read_memory_estimate(os.path.join(workdir, status['job'], f"{status['job']}.dat"))}
+        record.update(job_size(by_job[status['job']]))
+        records.append(record)
+    return records
+
+
+def load_timings(path=TIMINGS_FILE, host=None):
+    """Recorded timings of a host (default this machine), oldest first ([] if there are none)."""
+    if not os.path.exists(path):
+        return []
+    host = host or platform.node()
+    with open(path, 'r') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [record for record in records if record.get('host') == host]
+
+
+def append_timings(records, path=TIMINGS_FILE):
+    with open(path, 'a') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def planned_sweep(designs, workdir='sweep', timings_file=TIMINGS_FILE, cores=None, memory_bytes=None, **sweep_options):
+    """
+    Plan a batch from this machine's recorded timings, run it with run_sweep and record its timings.
+
+    Parameters:
+        designs (list): Named parameter records.
+        workdir (str): Working directory of the sweep.
+        timings_file (str): Timing records the model is fitted to and the new timings are appended to.
+        cores, memory_bytes: Resources of the batch (see plan_batch).
+        sweep_options: Further arguments of run_sweep (commands, cache, database, interval, ...).
+
+    Returns:
+        tuple: (plan, statuses returned by run_sweep)
+    """
+    model = ScalingModel().fit(load_timings(timings_file))
+    plan = plan_batch(designs, cores, memory_bytes, model)
+    planned = apply_plan(designs, plan)
+    statuses = run_sweep(planned, workdir, max_concurrent=plan['max_concurrent'], cpu_budget=plan['cpu_budget'],
+                         memory_budget=plan['memory_budget'], **sweep_options)
+    append_timings(timings_from_sweep(statuses, planned, workdir), timings_file)
+    return plan, statuses
+
+
+# Example usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Plan CPUs, memory and concurrency of a batch of solver jobs.")
+    parser.add_argument('designs', help="JSON list of named designs (see sweep.name_designs)")
+    parser.add_argument('--cores', type=int, default=None)
+    parser.add_argument('--memory-gb', type=float, default=None)
+    parser.add_argument('--timings', default=TIMINGS_FILE, help="Recorded timings the scaling model is fitted to")
+    parser.add_argument('--output', default=None, help="Write the planned designs to this JSON file")
+    args = parser.parse_args()
+
+    designs = load_designs(args.designs)
+    model = ScalingModel().fit(load_timings(args.timings))
+    start = time.perf_counter()
+    plan = plan_batch(designs, args.cores, args.memory_gb * 1e9 if args.memory_gb else None, model)
+    print(f"Planned {len(designs)} jobs on {plan['cores']} CPUs and {plan['memory_bytes'] / 1e9:.1f} GB "
+          f"from {model.n_timings} timings in {time.perf_counter() - start:.2f} s")
+    for entry in plan['jobs']:
+        print(f"{entry['job']}: {entry['elements']} elements, {entry['increments']} increments, "
+              f"{entry['cpus']} CPUs, memory {entry['memory']}%, {entry['start']:.0f}-{entry['end']:.0f} s")
+    print(f"Batch time {plan['makespan']:.0f} s, {plan['throughput']:.2f} jobs/h, "
+          f"run_sweep(max_concurrent={plan['max_concurrent']}, cpu_budget={plan['cpu_budget']}, "
+          f"memory_budget={plan['memory_budget']})")
+    if args.output:
+        save_designs(args.output, apply_plan(designs, plan))
@@ -0,0 +1,220 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from result_files import read_centroids, read_failures, total_times
+from tct_params import amplitude_data, plastic_table
+
+# Bump when the solver setup or the extracted results change meaning, so old entries stop matching
+CACHE_VERSION = 3
+
+# Parameters that only name or schedule a run and do not change its result
+NON_PHYSICAL_KEYS = ('MODEL_NAME', 'JOB_NAME', 'NUM_CPUS', 'NUM_DOMAINS', 'MEMORY', 'CAE_PATH', 'WRITE_INPUT',
+                     'RESTART_WRITE')
+
+
+def _canonical(value):
+    """Normalize a parameter value so that equal designs serialize identically (15 == 15.0, float noise)."""
+    if isinstance(value, dict):
+        return {key: _canonical(item) for key, item in sorted(value.items())}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(item) for item in value]
+    if isinstance(value, (bool, str)) or value is None:
+        return value
+    if isinstance(value, (int, float, np.integer, np.floating)):
+        return format(float(value), '.12g')
+    raise TypeError(f"Cannot hash parameter value {value!r}")
+
+
+def design_key(params):
+    """
+    Content hash of everything that affects a design's result.
+
+    Covers the physical parameters (via profile control points, Si block,
+    materials, damage, cycle and step controls, mesh seeds and element types)
+    plus the derived plasticity and amplitude tables the solver actually sees.
+    Names, CPU counts and file paths are excluded.
+
+    Returns:
+        str: Hex SHA-256 digest.
+    """
+    physical = {key: value for key, value in params.items() if key not in NON_PHYSICAL_KEYS}
+    physical['_P_TABLE_CU'] = plastic_table(params)
+    physical['_AMPLITUDE'] = amplitude_data(params)
+    physical['_VERSION'] = CACHE_VERSION
+    text = json.dumps(_canonical(physical), sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def failure_metrics(times, n_elements, fractions=(0.01, 0.05, 0.1, 0.5)):
+    """
+    Summary metrics of a run's first-failure times.
+
+    Parameters:
+        times (array-like): First-failure time of every failed element.
+        n_elements (int): Number of elements that could fail.
+        fractions (tuple): Failed fractions to report the time of.
+
+    Returns:
+        dict: first_failure, n_failed, failed_fraction and time_to_<percent>pct (None if not reached).
+    """
+    times = np.sort(np.asarray(times, dtype=np.float64))
+    metrics = {
+        'first_failure': float(times[0]) if times.size else None,
+        'n_failed': int(times.size),
+        'failed_fraction': times.size / n_elements if n_elements else 0.0,
+    }
+    for fraction in fractions:
+        needed = int(np.ceil(fraction * n_elements))
+        metrics[f"time_to_{fraction * 100:g}pct"] = float(times[needed - 1]) if 0 < needed <= times.size else None
+    return metrics
+
+
+def read_run_results(run_dir, instance='CU', step_starts=None):
+    """
+    Read the extracted text results of a finished run.
+
+    Parameters:
+        run_dir (str): Run directory with initial_coordinates.txt and failed_elements.txt.
+        instance (str): Instance whose elements are read.
+        step_starts (dict): Step name -> total time at the step start (tct_params.step_start_times),
+            turning the step times of multi-step runs into total times.
+
+    Returns:
+        tuple: (arrays dict with labels/centroids/failed_labels/failure_times, metrics dict)
+    """
+    centroids = read_centroids(os.path.join(run_dir, 'initial_coordinates.txt'))
+    centroids = centroids[centroids['instance'] == instance]
+    failures = read_failures(os.path.join(run_dir, 'failed_elements.txt'))
+    failures = failures[failures['instance'] == instance]
+    arrays = {
+        'labels': centroids['label'],
+        'centroids': np.column_stack([centroids['x'], centroids['y'], centroids['z']]),
+        'failed_labels': failures['label'],
+        'failure_times': total_times(failures, step_starts),
+    }
+    return arrays, failure_metrics(arrays['failure_times'], arrays['labels'].size)
+
+
+class ResultCache:
+    """
+    Content-addressed store of simulated designs.
+
+    Every entry holds a compact summary (parameters and metrics, JSON), the
+    extracted result arrays (.npz) and optionally bulky artifacts such as the
+    ODB. When the artifacts exceed max_artifact_bytes, those of the least
+    recently used entries are deleted; summaries and arrays are always kept.
+
+    Parameters:
+        cache_dir (str): Root directory of the cache.
+        max_artifact_bytes (int): Size bound of all artifacts together.
+    """
+
+    def __init__(self, cache_dir='result_cache', max_artifact_bytes=50 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_artifact_bytes = max_artifact_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _summary_path(self, key):
+        return os.path.join(self.entry_dir(key), 'summary.json')
+
+    def __contains__(self, params):
+        return os.path.exists(self._summary_path(design_key(params)))
+
+    def get(self, params):
+        """
+        Look up a design.
+
+        Returns:
+            dict or None: {'key', 'summary', 'arrays', 'artifacts'} on a hit, None on a miss.
+        """
+        key = design_key(params)
+        summary_path = self._summary_path(key)
+        if not os.path.exists(summary_path):
+            return None
+        with open(summary_path, 'r') as f:
+            summary = json.load(f)
+        summary['last_access'] = time.time()
+        self._write_summary(key, summary)
+        arrays_path = os.path.join(self.entry_dir(key), 'results.npz')
+        arrays = dict(np.load(arrays_path)) if os.path.exists(arrays_path) else {}
+        artifact_dir = os.path.join(self.entry_dir(key), 'artifacts')
+        artifacts = sorted(os.listdir(artifact_dir)) if os.path.isdir(artifact_dir) else []
+        return {'key': key, 'summary': summary, 'arrays': arrays, 'artifacts': artifacts}
+
+    def put(self, params, metrics, arrays=None, artifacts=()):
+        """
+        Store a solved design.
+
+        Parameters:
+            params (dict): Parameter record of the design.
+            metrics (dict): Summary metrics (see failure_metrics).
+            arrays (dict): Extracted result arrays, saved to results.npz.
+            artifacts (iterable): Files (e.g. the .odb) moved into the entry; evictable.
+
+        Returns:
+            str: The design key.
+        """
+        key = design_key(params)
+        entry_dir = self.entry_dir(key)
+        os.makedirs(entry_dir, exist_ok=True)
+        if arrays:
+            np.savez_compressed(os.path.join(entry_dir, 'results.npz'), **arrays)
+        artifact_dir = os.path.join(entry_dir, 'artifacts')
+        for path in artifacts:
+            os.makedirs(artifact_dir, exist_ok=True)
+            shutil.move(path, os.path.join(artifact_dir, os.path.basename(path)))
+        now = time.time()
+        self._write_summary(key, {'params': params, 'metrics': metrics, 'created': now, 'last_access': now})
+        self.evict()
+        return key
+
+    def _write_summary(self, key, summary):
+        path = self._summary_path(key)
+        with open(path + '.tmp', 'w') as f:
+            json.dump(summary, f, indent=1)
+        os.replace(path + '.tmp', path)
+
+    def entries(self):
+        """Yield (key, summary) of every entry."""
+        for prefix in sorted(os.listdir(self.cache_dir)):
+            prefix_dir = os.path.join(self.cache_dir, prefix)
+            if not os.path.isdir(prefix_dir):
+                continue
+            for key in sorted(os.listdir(prefix_dir)):
+                path = self._summary_path(key)
+                if os.path.exists(path):
+                    with open(path, 'r') as f:
+                        yield key, json.load(f)
+
+    def artifact_bytes(self, key):
+        artifact_dir = os.path.join(self.entry_dir(key), 'artifacts')
+        if not os.path.isdir(artifact_dir):
+            return 0
+        return sum(os.path.getsize(os.path.join(artifact_dir, name)) for name in os.listdir(artifact_dir))
+
+    def evict(self):
+        """
+        Delete artifacts of least recently used entries until they fit max_artifact_bytes.
+
+        Returns:
+            list: Keys whose artifacts were deleted.
+        """
+        sizes = [(summary['last_access'], key, self.artifact_bytes(key)) for key, summary in self.entries()]
+        total = sum(size for _, _, size in sizes)
+        evicted = []
+        for _, key, size in sorted(sizes):
+            if total <= self.max_artifact_bytes:
+                break
+            if size:
+                shutil.rmtree(os.path.join(self.entry_dir(key), 'artifacts'))
+                total -= size
+                evicted.append(key)
+        return evicted
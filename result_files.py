@@ -0,0 +1,221 @@
+import json
+import os
+import re
+import sys
+
+import numpy as np
+
+# Bump when the parsed layout changes, so old sidecars are parsed again
+SIDECAR_VERSION = 1
+
+# initial_coordinates.txt: 'Element: 1, Instance: CU, Centroid: [x, y, z]'
+CENTROID_DTYPE = np.dtype([('label', np.int64), ('instance', 'U16'), ('x', np.float64), ('y', np.float64),
+                           ('z', np.float64)])
+# failed_elements.txt: 'Step: name' headings followed by 'Time: t, Element: l, Instance: I' (step time)
+FAILURE_DTYPE = np.dtype([('time', np.float64), ('label', np.int64), ('instance', 'U16'), ('step', 'U32')])
+# join_results: centroid records with the first failure time (NaN if the element did not fail)
+JOINED_DTYPE = np.dtype(CENTROID_DTYPE.descr + [('time', np.float64)])
+
+_CENTROID_RECORD = re.compile(r'^Element: (\d+), Instance: ([^,\s]+), Centroid: \[([^\]]*)\]', re.MULTILINE)
+_FAILED_RECORD = re.compile(r'^Time: ([^,]+), Element: (\d+), Instance: (\S+)', re.MULTILINE)
+_STEP_HEADING = re.compile(r'^Step: (\S+)[ \t]*\r?$', re.MULTILINE)
+
+# Bytes of text parsed at a time; bounds the memory of a streaming pass
+CHUNK_BYTES = 32 * 1024 * 1024
+
+
+def _chunks(path, chunk_bytes):
+    """Yield the text of a file in pieces of whole lines of about chunk_bytes."""
+    with open(path, 'r') as f:
+        while True:
+            lines = f.readlines(chunk_bytes)
+            if not lines:
+                return
+            yield ''.join(lines)
+
+
+def _centroid_records(text):
+    matches = _CENTROID_RECORD.findall(text)
+    records = np.zeros(len(matches), dtype=CENTROID_DTYPE)
+    if matches:
+        labels, instances, coords = zip(*matches)
+        records['label'] = np.array(labels, dtype=np.int64)
+        records['instance'] = instances
+        # '[x, y, z]' from lists and '[x y z]' from NumPy arrays
+        xyz = np.array(' '.join(coords).replace(',', ' ').split(), dtype=np.float64).reshape(-1, 3)
+        records['x'], records['y'], records['z'] = xyz.T
+    return records
+
+
+def _failure_records(text, step):
+    matches = _FAILED_RECORD.findall(text)
+    records = np.zeros(len(matches), dtype=FAILURE_DTYPE)
+    if matches:
+        times, labels, instances = zip(*matches)
+        records['time'] = np.array(times, dtype=np.float64)
+        records['label'] = np.array(labels, dtype=np.int64)
+        records['instance'] = instances
+        records['step'] = step
+    return records
+
+
+def iter_centroids(path, chunk_bytes=CHUNK_BYTES):
+    """
+    Stream the records of an initial_coordinates.txt file.
+
+    Yields:
+        np.ndarray: CENTROID_DTYPE records of one chunk of about chunk_bytes of text.
+    """
+    for text in _chunks(path, chunk_bytes):
+        yield _centroid_records(text)
+
+
+def iter_failures(path, chunk_bytes=CHUNK_BYTES):
+    """
+    Stream the records of a failed_elements.txt file, each tagged with its step heading.
+
+    Yields:
+        np.ndarray: FAILURE_DTYPE records of one chunk of about chunk_bytes of text.
+    """
+    step = ''
+    for text in _chunks(path, chunk_bytes):
+        # re.split with a group gives [text before, step, text after, step, ...]
+        pieces = _STEP_HEADING.split(text)
+        parts = [_failure_records(pieces[0], step)]
+        for i in range(1, len(pieces), 2):
+            step = pieces[i]
+            parts.append(_failure_records(pieces[i + 1], step))
+        yield np.concatenate(parts)
+
+
+def _sidecar_valid(path, sidecar):
+    try:
+        with open(sidecar + '.json', 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    stat = os.stat(path)
+    return meta == {'version': SIDECAR_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns} \
+        and os.path.exists(sidecar)
+
+
+def _load(path, records_of, dtype, cache, chunk_bytes):
+    """Parse a text result file, or load its sidecar <path>.npy if the file has not changed since."""
+    sidecar = path + '.npy'
+    if cache and _sidecar_valid(path, sidecar):
+        return np.load(sidecar)
+    stat = os.stat(path)
+    parts = list(records_of(path, chunk_bytes))
+    records = np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+    if cache:
+        try:
+            with open(sidecar + '.tmp', 'wb') as f:
+                np.save(f, records)
+            os.replace(sidecar + '.tmp', sidecar)
+            with open(sidecar + '.json', 'w') as f:
+                json.dump({'version': SIDECAR_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}, f)
+        except OSError:
+            pass  # Read-only result directory: parse again next time
+    return records
+
+
+def read_centroids(path, cache=True, chunk_bytes=CHUNK_BYTES):
+    """
+    Read all records of an initial_coordinates.txt file.
+
+    Parameters:
+        path (str): File path.
+        cache (bool): Use and write the binary sidecar <path>.npy, checked against the file
+            size and modification time.
+        chunk_bytes (int): Text parsed at a time.
+
+    Returns:
+        np.ndarray: CENTROID_DTYPE records in file order.
+    """
+    return _load(path, iter_centroids, CENTROID_DTYPE, cache, chunk_bytes)
+
+
+def read_failures(path, cache=True, chunk_bytes=CHUNK_BYTES):
+    """
+    Read all records of a failed_elements.txt file (see read_centroids for the parameters).
+
+    Returns:
+        np.ndarray: FAILURE_DTYPE records in file order; time is the step time of the step field.
+    """
+    return _load(path, iter_failures, FAILURE_DTYPE, cache, chunk_bytes)
+
+
+def total_times(failures, step_starts=None):
+    """
+    Failure times in total time.
+
+    Parameters:
+        failures (np.ndarray): FAILURE_DTYPE records.
+        step_starts (dict): Step name -> total time at the step start (tct_params.step_start_times);
+            steps that are not listed start at 0.
+
+    Returns:
+        np.ndarray: Times (n,) float64.
+    """
+    if not step_starts:
+        return failures['time'].copy()
+    steps, inverse = np.unique(failures['step'], return_inverse=True)
+    offsets = np.array([step_starts.get(step, 0.0) for step in steps.tolist()], dtype=np.float64)
+    return failures['time'] + offsets[inverse.reshape(-1)]
+
+
+def join_results(centroids, failures, step_starts=None, how='left'):
+    """
+    Join failure times to centroids on (instance, label), vectorized.
+
+    An element listed more than once in failures gets its earliest time.
+
+    Parameters:
+        centroids (np.ndarray): CENTROID_DTYPE records.
+        failures (np.ndarray): FAILURE_DTYPE records.
+        step_starts (dict): Turn step times into total times (see total_times).
+        how (str): 'left' keeps every centroid (time NaN if it did not fail), 'inner' only failed ones.
+
+    Returns:
+        np.ndarray: JOINED_DTYPE records in centroid order.
+
+    Raises:
+        KeyError: If a failed element has no centroid record.
+    """
+    times = total_times(failures, step_starts)
+    _, inverse = np.unique(np.concatenate([centroids['instance'], failures['instance']]), return_inverse=True)
+    inverse = inverse.reshape(-1)
+    centroid_keys = inverse[:centroids.size].astype(np.int64) * (1 << 40) + centroids['label']
+    failure_keys = inverse[centroids.size:].astype(np.int64) * (1 << 40) + failures['label']
+
+    order = np.argsort(centroid_keys, kind='stable')
+    sorted_keys = centroid_keys[order]
+    position = np.minimum(np.searchsorted(sorted_keys, failure_keys), max(sorted_keys.size - 1, 0))
+    missing = (sorted_keys[position] != failure_keys) if sorted_keys.size else np.ones(failure_keys.size, bool)
+    if missing.any():
+        bad = failures[missing][:10]
+        raise KeyError(f"Failed elements without centroid: "
+                       f"{list(zip(bad['instance'].tolist(), bad['label'].tolist()))}")
+
+    first = np.full(centroids.size, np.inf)
+    np.minimum.at(first, order[position], times)
+    joined = np.zeros(centroids.size, dtype=JOINED_DTYPE)
+    for name in CENTROID_DTYPE.names:
+        joined[name] = centroids[name]
+    joined['time'] = np.where(np.isinf(first), np.nan, first)
+    if how == 'inner':
+        return joined[~np.isnan(joined['time'])]
+    return joined
+
+
+# Example usage
+if __name__ == "__main__":
+    # python result_files.py [initial_coordinates.txt] [failed_elements.txt]
+    coordinates_file = sys.argv[1] if len(sys.argv) > 1 else 'initial_coordinates.txt'
+    failed_file = sys.argv[2] if len(sys.argv) > 2 else 'failed_elements.txt'
+    joined = join_results(read_centroids(coordinates_file), read_failures(failed_file))
+    failed = joined[~np.isnan(joined['time'])]
+    print(f"{joined.size} elements, {failed.size} failed")
+    for record in failed[np.argsort(failed['time'])][:10]:
+        print(f"Time: {record['time']}, Element: {record['label']}, Instance: {record['instance']}, "
+              f"Centroid: [{record['x']}, {record['y']}, {record['z']}]")
@@ -0,0 +1,282 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from extract_failed_elements import centroids_from_arrays, select_frames, volumes_from_arrays
+from odb_reader import OdbReader, build_label_index, frame_total_times, lookup_rows, open_reader
+
+# Bump when the layout of the store changes
+STORE_VERSION = 1
+
+MESH_ARRAYS = ('node_labels', 'coords', 'element_labels', 'connectivity', 'mask', 'centroids', 'volumes')
+
+# Reductions of the integration point values of an element
+REDUCTIONS = {'max': np.fmax, 'min': np.fmin}
+
+
+def _save(store_dir, relative, array):
+    np.save(os.path.join(store_dir, relative), np.ascontiguousarray(array))
+    return relative
+
+
+def export_results(odb, store_dir, fields=('STATUS', 'SDEG', 'PEEQ'), instances=None, frame_stride=1,
+                   reduce='max'):
+    """
+    Export the mesh and selected fields of an ODB into a columnar store of .npy files.
+
+    Every instance gets its mesh arrays (node labels and coordinates, padded
+    connectivity and mask, element centroids and volumes) and one array per
+    field of shape (frames, elements, components) in float32, rows in the
+    order of the element labels. Integration point values are reduced per
+    element (reduce); elements or frames without the field hold NaN and
+    <FIELD>_present.npy marks the frames that have it. The manifest.json
+    written last lists the frames (step, index, step and total time) and the
+    files, so an interrupted export is never mistaken for a complete store.
+
+    Run it where odbAccess is available (abaqus python result_store.py ...);
+    reading the store needs only NumPy.
+
+    Parameters:
+        odb (str or OdbReader): ODB path or open reader.
+        store_dir (str): Output directory.
+        fields (tuple): Element field outputs to export.
+        instances (list): Instances to export (default all).
+        frame_stride (int): Export every n-th frame of each step; the last frame is always exported.
+        reduce (str): 'max' or 'min' over the integration points of an element.
+
+    Returns:
+        dict: The manifest.
+    """
+    reader = open_reader(odb)
+    combine = REDUCTIONS[reduce]
+    os.makedirs(store_dir, exist_ok=True)
+    all_frames = {(step_name, index): total for step_name, index, total in frame_total_times(reader)}
+    frames = [(step_name, index) for step_name in reader.step_names()
+              for index in select_frames(reader, step_name, frame_stride)]
+    manifest = {
+        'version': STORE_VERSION,
+        'source': odb if isinstance(odb, str) else type(odb).__name__,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'reduce': reduce,
+        'frames': [{'step': step_name, 'index': index, 'step_time': reader.frame_time(step_name, index),
+                    'total_time': all_frames[(step_name, index)]} for step_name, index in frames],
+        'instances': {},
+    }
+    _save(store_dir, 'frame_times.npy', np.array([frame['total_time'] for frame in manifest['frames']]))
+
+    for instance_name in instances or reader.instance_names():
+        print(f"Exporting instance: {instance_name}")
+        os.makedirs(os.path.join(store_dir, instance_name), exist_ok=True)
+        node_labels, coords, element_labels, connectivity, mask = reader.instance_mesh(instance_name)
+        mesh = {
+            'node_labels': node_labels, 'coords': coords, 'element_labels': element_labels,
+            'connectivity': connectivity, 'mask': mask,
+            'centroids': centroids_from_arrays(node_labels, coords, connectivity, mask),
+            'volumes': volumes_from_arrays(node_labels, coords, connectivity, mask),
+        }
+        entry = {'n_nodes': int(node_labels.size), 'n_elements': int(element_labels.size),
+                 'arrays': {name: _save(store_dir, f"{instance_name}/{name}.npy", mesh[name])
+                            for name in MESH_ARRAYS},
+                 'fields': {}}
+        index = build_label_index(element_labels)
+
+        for field_name in fields:
+            values = None
+            present = np.zeros(len(frames), dtype=bool)
+            for row, (step_name, frame_index) in enumerate(frames):
+                try:
+                    blocks = list(reader.field_blocks(step_name, frame_index, field_name, instance_name))
+                except KeyError:
+                    continue  # Field not written in this frame
+                if not blocks:
+                    continue
+                if values is None:
+                    width = blocks[0][2].shape[1]
+                    values = np.lib.format.open_memmap(os.path.join(store_dir, instance_name, f"{field_name}.npy"),
+                                                       mode='w+', dtype=np.float32,
+                                                       shape=(len(frames), element_labels.size, width))
+                    values[:] = np.nan
+                frame = np.full((element_labels.size, values.shape[2]), np.nan, dtype=np.float32)
+                for _, labels, data in blocks:
+                    rows = lookup_rows(index, labels)
+                    # Integration points repeat an element label; fold them into its row
+                    for component in range(frame.shape[1]):
+                        combine.at(frame[:, component], rows, data[:, component])
+                values[row] = frame
+                present[row] = True
+            if values is None:
+                print(f"  {field_name}: not found")
+                continue
+            values.flush()
+            del values
+            entry['fields'][field_name] = {
+                'file': f"{instance_name}/{field_name}.npy",
+                'present': _save(store_dir, f"{instance_name}/{field_name}_present.npy", present),
+            }
+            print(f"  {field_name}: {int(present.sum())} of {len(frames)} frames")
+        manifest['instances'][instance_name] = entry
+
+    if reader is not odb:
+        reader.close()
+    with open(os.path.join(store_dir, 'manifest.json.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    os.replace(os.path.join(store_dir, 'manifest.json.tmp'), os.path.join(store_dir, 'manifest.json'))
+    return manifest
+
+
+class ResultStore(OdbReader):
+    """
+    Read-only view of a store written by export_results.
+
+    Arrays are opened with np.load(mmap_mode='r'), so slicing a time range of
+    a field reads only those frames from disk and returns a view without
+    copying. As an OdbReader it can replace the ODB in the post-processors
+    (pass the store instead of the ODB path); instance and field names are
+    those of the ODB, e.g. 'CU'.
+    """
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, 'manifest.json'), 'r') as f:
+            self.manifest = json.load(f)
+        if self.manifest['version'] != STORE_VERSION:
+            raise ValueError(f"Store version {self.manifest['version']} of {store_dir}, expected {STORE_VERSION}")
+        self.frames = self.manifest['frames']
+        self._arrays = {}
+        self._indices = {}
+        self._step_frames = {}
+        for row, frame in enumerate(self.frames):
+            self._step_frames.setdefault(frame['step'], []).append(row)
+
+    def _load(self, relative):
+        if relative not in self._arrays:
+            self._arrays[relative] = np.load(os.path.join(self.store_dir, relative), mmap_mode='r')
+        return self._arrays[relative]
+
+    def array(self, instance, name):
+        """Memory-mapped mesh array of an instance (one of MESH_ARRAYS)."""
+        return self._load(self.manifest['instances'][instance]['arrays'][name])
+
+    def field_names(self, instance):
+        return list(self.manifest['instances'][instance]['fields'])
+
+    def frame_times(self):
+        """Total time of every stored frame."""
+        return self._load('frame_times.npy')
+
+    def frame_range(self, time_window=None):
+        """Slice of the frames with total time in the inclusive window (start, end); all frames if None."""
+        if time_window is None:
+            return slice(0, len(self.frames))
+        times = self.frame_times()
+        start, end = time_window
+        return slice(int(np.searchsorted(times, start - 1e-9, side='left')),
+                     int(np.searchsorted(times, end + 1e-9, side='right')))
+
+    def frame_at(self, total_time):
+        """Row of the last stored frame at or before a total time (0 if there is none)."""
+        return max(int(np.searchsorted(self.frame_times(), total_time + 1e-9, side='right')) - 1, 0)
+
+    def element_rows(self, instance, labels):
+        """Rows of element labels in the field and mesh arrays of an instance."""
+        if instance not in self._indices:
+            self._indices[instance] = build_label_index(self.array(instance, 'element_labels'))
+        return lookup_rows(self._indices[instance], labels)
+
+    def field(self, instance, name, time_window=None, elements=None, component=None):
+        """
+        Values of a field over a time slice.
+
+        Without elements the result is a view of the memory map (zero copy);
+        selecting elements copies the selected rows.
+
+        Parameters:
+            instance (str): Instance name, e.g. 'CU'.
+            name (str): Field name.
+            time_window (tuple): (start, end) in total time, inclusive.
+            elements (array-like): Element labels to select (default all).
+            component (int): Keep one component (default all).
+
+        Returns:
+            tuple: (total times (f,), element labels (m,), values (f, m, k) or (f, m) with component)
+        """
+        frames = self.frame_range(time_window)
+        values = self._load(self.manifest['instances'][instance]['fields'][name]['file'])[frames]
+        labels = self.array(instance, 'element_labels')
+        if elements is not None:
+            rows = self.element_rows(instance, elements)
+            values = values[:, rows]
+            labels = labels[rows]
+        if component is not None:
+            values = values[..., component]
+        return self.frame_times()[frames], labels, values
+
+    def present(self, instance, name):
+        """Boolean per stored frame: the field was written in that frame."""
+        return self._load(self.manifest['instances'][instance]['fields'][name]['present'])
+
+    def first_times(self, instance, name='STATUS', failed_value=0.0, chunk=256):
+        """
+        Total time at which every element first holds failed_value (NaN if never).
+
+        Returns:
+            tuple: (element labels, first times)
+        """
+        values = self._load(self.manifest['instances'][instance]['fields'][name]['file'])
+        times = self.frame_times()
+        first = np.full(values.shape[1], np.nan)
+        for start in range(0, values.shape[0], chunk):
+            hit = (values[start:start + chunk, :, 0] == failed_value) & np.isnan(first)[None, :]
+            found = hit.any(axis=0)
+            first[found] = times[start + hit[:, found].argmax(axis=0)]
+        return self.array(instance, 'element_labels'), first
+
+    # OdbReader interface
+    def step_names(self):
+        return list(self._step_frames)
+
+    def frame_count(self, step_name):
+        return len(self._step_frames[step_name])
+
+    def frame_time(self, step_name, index):
+        return self.frames[self._step_frames[step_name][index]]['step_time']
+
+    def field_blocks(self, step_name, index, field_name, instance=None, element_set=None):
+        row = self._step_frames[step_name][index]
+        for name, entry in self.manifest['instances'].items():
+            if instance is not None and name != instance.upper():
+                continue
+            if field_name not in entry['fields']:
+                raise KeyError(field_name)
+            if not self.present(name, field_name)[row]:
+                raise KeyError(field_name)
+            data = self._load(entry['fields'][field_name]['file'])[row]
+            labels = self.array(name, 'element_labels')
+            written = ~np.isnan(data).all(axis=1)
+            if written.all():
+                yield name, labels, data
+            else:
+                yield name, labels[written], data[written]
+
+    def instance_names(self):
+        return list(self.manifest['instances'])
+
+    def instance_mesh(self, instance_name):
+        return tuple(self.array(instance_name, name) for name in MESH_ARRAYS[:5])
+
+
+# Example usage
+if __name__ == "__main__":
+    # abaqus python result_store.py ThermalAnalysis.odb ThermalAnalysis_store --fields STATUS,SDEG,PEEQ
+    parser = argparse.ArgumentParser(description="Export ODB results into a memory-mapped .npy store.")
+    parser.add_argument('odb')
+    parser.add_argument('store_dir')
+    parser.add_argument('--fields', default='STATUS,SDEG,PEEQ')
+    parser.add_argument('--instances', default=None, help="Comma separated instance names (default all)")
+    parser.add_argument('--stride', type=int, default=1)
+    args = parser.parse_args()
+    export_results(args.odb, args.store_dir, tuple(args.fields.split(',')),
+                   args.instances.split(',') if args.instances else None, args.stride)
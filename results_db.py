@@ -0,0 +1,271 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+
+from result_cache import ResultCache, design_key, read_run_results
+from tct_params import DEFAULT_PARAMS, load_params, step_start_times
+
+# Summary metrics of result_cache.failure_metrics kept as indexed columns of the runs table
+METRIC_COLUMNS = ('first_failure', 'first_failure_cycle', 'n_failed', 'failed_fraction', 'time_to_1pct',
+                  'time_to_5pct', 'time_to_10pct', 'time_to_50pct')
+
+QUERY_OPERATORS = ('<', '<=', '>', '>=', '=', '!=')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    design_key TEXT UNIQUE NOT NULL,
+    job TEXT,
+    created REAL,
+    params TEXT,
+    n_elements INTEGER,
+    first_failure REAL,
+    first_failure_cycle REAL,
+    n_failed INTEGER,
+    failed_fraction REAL,
+    time_to_1pct REAL,
+    time_to_5pct REAL,
+    time_to_10pct REAL,
+    time_to_50pct REAL
+);
+CREATE TABLE IF NOT EXISTS params (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    text TEXT
+);
+CREATE TABLE IF NOT EXISTS failures (
+    run_id INTEGER NOT NULL REFERENCES runs(run_id) ON DELETE CASCADE,
+    instance TEXT,
+    label INTEGER,
+    time REAL
+);
+CREATE INDEX IF NOT EXISTS params_by_value ON params (name, value, run_id);
+CREATE INDEX IF NOT EXISTS params_by_run ON params (run_id);
+CREATE INDEX IF NOT EXISTS failures_by_run ON failures (run_id, time);
+""" + ''.join(f"CREATE INDEX IF NOT EXISTS runs_by_{column} ON runs ({column});\n" for column in METRIC_COLUMNS)
+
+
+def flatten_params(params):
+    """
+    Rows (name, value, text) of a parameter record, one per scalar.
+
+    List parameters get one row per entry, named like tct_params.set_param
+    addresses them ('R0_CU[2]'); nested lists such as SINGLE_CYCLE_DATA are
+    kept as JSON text. Numbers and booleans go to value, strings to text.
+    """
+    rows = []
+    for name, value in params.items():
+        if isinstance(value, (list, tuple)) and all(isinstance(item, (int, float)) for item in value):
+            rows.extend((f"{name}[{index}]", float(item), None) for index, item in enumerate(value))
+        elif isinstance(value, (bool, int, float)):
+            rows.append((name, float(value), None))
+        elif isinstance(value, str):
+            rows.append((name, None, value))
+        else:
+            rows.append((name, None, json.dumps(value)))
+    return rows
+
+
+class ResultsDatabase:
+    """
+    SQLite database of solved designs across sweeps.
+
+    Every run keeps its parameter record, the summary metrics (as indexed
+    columns of runs, with first_failure_cycle = first_failure / CYCLE_TIME)
+    and its per-element failure events. Parameters are also stored one
+    scalar per row of an indexed (name, value) table, so conditions on any
+    parameter are index lookups. A run is identified by its
+    result_cache.design_key; adding the same design again replaces it.
+
+    Parameters:
+        path (str): Database file.
+    """
+
+    def __init__(self, path='results.db'):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _insert(self, params, metrics, arrays=None, job=None, instance='CU', key=None):
+        cursor = self.connection.cursor()
+        key = key or design_key(params)
+        cursor.execute("DELETE FROM runs WHERE design_key = ?", (key, ))
+        first_failure = metrics.get('first_failure')
+        row = dict(metrics, first_failure_cycle=None if first_failure is None else
+                   first_failure / params['CYCLE_TIME'])
+        n_elements = int(arrays['labels'].size) if arrays and 'labels' in arrays else None
+        cursor.execute(f"INSERT INTO runs (design_key, job, created, params, n_elements, "
+                       f"{', '.join(METRIC_COLUMNS)}) VALUES (?, ?, ?, ?, ?{', ?' * len(METRIC_COLUMNS)})",
+                       (key, job or params.get('JOB_NAME'), time.time(), json.dumps(params), n_elements,
+                        *(row.get(column) for column in METRIC_COLUMNS)))
+        run_id = cursor.lastrowid
+        cursor.executemany("INSERT INTO params (run_id, name, value, text) VALUES (?, ?, ?, ?)",
+                           [(run_id, name, value, text) for name, value, text in flatten_params(params)])
+        if arrays and 'failed_labels' in arrays:
+            n_failed = arrays['failed_labels'].size
+            cursor.executemany("INSERT INTO failures (run_id, instance, label, time) VALUES (?, ?, ?, ?)",
+                               zip([run_id] * n_failed, [instance] * n_failed, arrays['failed_labels'].tolist(),
+                                   arrays['failure_times'].tolist()))
+        return run_id
+
+    def add_run(self, params, metrics, arrays=None, job=None, instance='CU'):
+        """
+        Store one run in its own transaction.
+
+        Parameters:
+            params (dict): Parameter record of the design.
+            metrics (dict): Summary metrics (result_cache.failure_metrics).
+            arrays (dict): Result arrays of result_cache.read_run_results (labels, failed_labels,
+                failure_times); the failure events are stored when given.
+            job (str): Job name (default JOB_NAME).
+            instance (str): Instance of the failure events.
+
+        Returns:
+            int: run_id
+        """
+        with self.connection:
+            return self._insert(params, metrics, arrays, job, instance)
+
+    def add_runs(self, runs):
+        """
+        Store many runs in one transaction.
+
+        Parameters:
+            runs (iterable): (params, metrics, arrays) tuples; arrays may be None.
+
+        Returns:
+            list: run_id of every run.
+        """
+        with self.connection:
+            return [self._insert(params, metrics, arrays) for params, metrics, arrays in runs]
+
+    def add_run_dir(self, run_dir, params, instance='CU'):
+        """Read the text results of a run directory (read_run_results) and store them."""
+        arrays, metrics = read_run_results(run_dir, instance, step_starts=step_start_times(params))
+        return self.add_run(params, metrics, arrays, instance=instance)
+
+    def import_cache(self, cache):
+        """
+        Store every entry of a ResultCache (or cache directory) in one transaction.
+
+        The cache keys are reused, so designs keep the same design_key in both.
+
+        Returns:
+            int: Number of runs imported.
+        """
+        cache = cache if isinstance(cache, ResultCache) else ResultCache(cache)
+        count = 0
+        with self.connection:
+            for key, summary in cache.entries():
+                arrays_path = os.path.join(cache.entry_dir(key), 'results.npz')
+                arrays = dict(np.load(arrays_path)) if os.path.exists(arrays_path) else None
+                self._insert(summary['params'], summary['metrics'], arrays, key=key)
+                count += 1
+        return count
+
+    def query(self, conditions=(), order_by=None, limit=None):
+        """
+        Select runs by metrics and parameters.
+
+        Conditions on METRIC_COLUMNS filter the runs table, every other name
+        is a parameter ('R0_CU[2]', 'TOTAL_CYCLES', ...) joined through the
+        (name, value) index. Runs with a NULL metric (e.g. no failure) never
+        match a condition on it.
+
+        Parameters:
+            conditions (list): (name, operator, value) with an operator of QUERY_OPERATORS,
+                e.g. [('R0_CU[2]', '<', 12), ('first_failure_cycle', '>', 5)].
+            order_by (str): Metric column to sort by, prefix '-' for descending.
+            limit (int): Maximum number of runs.
+
+        Returns:
+            list: Dicts with run_id, design_key, job, n_elements, the metrics and params.
+
+        Raises:
+            ValueError: On an unknown operator or order_by column.
+        """
+        joins = []
+        join_values = []
+        where = []
+        where_values = []
+        for number, (name, operator, value) in enumerate(conditions):
+            if operator not in QUERY_OPERATORS:
+                raise ValueError(f"Unknown operator {operator!r}, expected one of {QUERY_OPERATORS}")
+            if name in METRIC_COLUMNS:
+                where.append(f"runs.{name} {operator} ?")
+                where_values.append(value)
+            else:
+                column = 'text' if isinstance(value, str) else 'value'
+                joins.append(f"JOIN params p{number} ON p{number}.run_id = runs.run_id AND p{number}.name = ? "
+                             f"AND p{number}.{column} {operator} ?")
+                join_values.extend((name, value))
+        sql = f"SELECT runs.run_id, design_key, job, n_elements, runs.params, {', '.join(METRIC_COLUMNS)} " \
+              f"FROM runs {' '.join(joins)}"
+        if where:
+            sql += " WHERE " + ' AND '.join(where)
+        if order_by is not None:
+            column = order_by.lstrip('-')
+            if column not in METRIC_COLUMNS:
+                raise ValueError(f"Cannot order by {column!r}, expected one of {METRIC_COLUMNS}")
+            sql += f" ORDER BY runs.{column} {'DESC' if order_by.startswith('-') else 'ASC'}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        results = []
+        for row in self.connection.execute(sql, join_values + where_values):
+            run_id, key, job, n_elements, params = row[:5]
+            result = {'run_id': run_id, 'design_key': key, 'job': job, 'n_elements': n_elements}
+            result.update(zip(METRIC_COLUMNS, row[5:]))
+            result['params'] = json.loads(params)
+            results.append(result)
+        return results
+
+    def failures(self, run_id):
+        """
+        Failure events of a run, earliest first.
+
+        Returns:
+            tuple: (instances list, labels (n,), times (n,))
+        """
+        rows = self.connection.execute("SELECT instance, label, time FROM failures WHERE run_id = ? ORDER BY time",
+                                       (run_id, )).fetchall()
+        return ([row[0] for row in rows], np.array([row[1] for row in rows], dtype=np.int64),
+                np.array([row[2] for row in rows], dtype=np.float64))
+
+    def count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+
+# Example usage
+if __name__ == "__main__":
+    # python results_db.py import <cache_dir> | add <run_dir> <params.json> | query "R0_CU[2] < 12" ...
+    with ResultsDatabase() as database:
+        if sys.argv[1:2] == ['import']:
+            print(f"Imported {database.import_cache(sys.argv[2])} runs")
+        elif sys.argv[1:2] == ['add']:
+            params = load_params(sys.argv[3]) if len(sys.argv) > 3 else dict(DEFAULT_PARAMS)
+            print(f"Stored run {database.add_run_dir(sys.argv[2], params)}")
+        else:
+            conditions = []
+            for text in sys.argv[2:]:
+                name, operator, value = text.split()
+                conditions.append((name, operator, float(value)))
+            for run in database.query(conditions, order_by='-first_failure'):
+                print(f"{run['job']}: first failure {run['first_failure']} (cycle {run['first_failure_cycle']}), "
+                      f"{run['n_failed']} failed")
@@ -0,0 +1,200 @@
+import json
+import os
+import subprocess
+import sys
+
+from inp_writer import write_inp, write_restart_inp
+from monitor_progress import StaFollower
+from standin_solver import RESTART_FILES
+from sweep import SOLVE_COMMAND, job_fields
+from tct_params import DEFAULT_PARAMS, load_params, make_params, step_plan
+
+# Restart analysis of a job continuing from oldjob, formatted like SOLVE_COMMAND (plus {oldjob})
+RESTART_COMMAND = ['abaqus', 'job={job}', 'oldjob={oldjob}', 'cpus={cpus}', 'memory={memory}', 'interactive']
+
+
+def completed_steps(sta_path):
+    """
+    Steps a job has finished, read from its .sta file.
+
+    A step is finished once a later step has started, or when the analysis
+    completed successfully.
+
+    Returns:
+        tuple: (list of finished step numbers, status of the .sta file)
+    """
+    follower = StaFollower(sta_path)
+    steps = sorted({record.step for record in follower.poll() if not record.cutback})
+    if follower.status != 'completed':
+        steps = steps[:-1]
+    return steps, follower.status
+
+
+class StagedRun:
+    """
+    Cycle-by-cycle execution of one design with restarts at cycle boundaries.
+
+    The loading is split into steps that close every cycle (STEP_MODE 'cycles'
+    unless 'segmented' is asked for) and restart data is written at the end of
+    each of them. A job that fails is resumed from its last completed cycle by
+    a restart job (<job>_R01, <job>_R02, ...), and a finished design can be
+    extended by more cycles the same way. The chain of jobs is kept in
+    <job>_stages.json, so a driver can pick it up again after a crash.
+
+    Parameters:
+        params (dict): Named parameter record of the design.
+        workdir (str): Directory of all jobs of the chain (restarts need the previous job's files).
+        solve_command, restart_command (list): Command templates ({job}, {oldjob}, {cpus}, {memory},
+            {script_dir}); replace them to use a stand-in solver.
+        max_attempts (int): Jobs run by run() before giving up on a design that keeps failing.
+    """
+
+    def __init__(self, params, workdir='.', solve_command=SOLVE_COMMAND, restart_command=RESTART_COMMAND,
+                 max_attempts=3):
+        if params['STEP_MODE'] == 'single':
+            params = make_params(params, STEP_MODE='cycles')
+        self.params = make_params(params, RESTART_WRITE=True)
+        self.workdir = workdir
+        self.solve_command = solve_command
+        self.restart_command = restart_command
+        self.max_attempts = max_attempts
+        self.state_file = os.path.join(workdir, f"{self.params['JOB_NAME']}_stages.json")
+        self.jobs = []
+        self.extensions = []  # TOTAL_CYCLES before every extend()
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+            self.params = state['params']
+            self.jobs = state['jobs']
+            self.extensions = state['extensions']
+
+    def save(self):
+        with open(self.state_file + '.tmp', 'w') as f:
+            json.dump({'params': self.params, 'jobs': self.jobs, 'extensions': self.extensions}, f, indent=1)
+        os.replace(self.state_file + '.tmp', self.state_file)
+
+    def total_steps(self):
+        return len(step_plan(self.params))
+
+    def completed_step(self):
+        """Highest step number finished by any job of the chain (0 before the first job)."""
+        return max((max(job['completed_steps'], default=0) for job in self.jobs), default=0)
+
+    def restart_point(self):
+        """
+        Latest cycle boundary with restart data.
+
+        Returns:
+            tuple: (job holding the restart data, step number) or (None, 0) if there is none.
+        """
+        plan = step_plan(self.params)
+        for job in reversed(self.jobs):
+            steps = [step for step in job['completed_steps'] if plan[step - 1]['cycle_end']]
+            if steps and all(os.path.exists(os.path.join(self.workdir, job['job'] + ext)) for ext in RESTART_FILES):
+                return job['job'], max(steps)
+        return None, 0
+
+    def completed_cycles(self):
+        """Cycles that are finished and saved in restart data."""
+        _, step = self.restart_point()
+        return step_plan(self.params)[step - 1]['cycle'] if step else 0
+
+    @property
+    def status(self):
+        """'pending', 'completed' (all steps of the plan finished) or 'failed'."""
+        if not self.jobs:
+            return 'pending'
+        return 'completed' if self.completed_step() >= self.total_steps() else 'failed'
+
+    def _run_job(self, job, oldjob=None, restart_step=None, extended_from=None):
+        os.makedirs(self.workdir, exist_ok=True)
+        params = make_params(self.params, JOB_NAME=job)
+        if oldjob is None:
+            write_inp(os.path.join(self.workdir, f"{job}.inp"), params)
+            command = self.solve_command
+        else:
+            write_restart_inp(os.path.join(self.workdir, f"{job}.inp"), params, restart_step, extended_from)
+            command = self.restart_command
+        fields = dict(job_fields(params), oldjob=oldjob)
+        with open(os.path.join(self.workdir, f"{job}.log"), 'w') as log:
+            code = subprocess.call([part.format(**fields) for part in command], cwd=self.workdir, stdout=log,
+                                   stderr=subprocess.STDOUT, shell=sys.platform == 'win32')
+        steps, status = completed_steps(os.path.join(self.workdir, f"{job}.sta"))
+        record = {'job': job, 'oldjob': oldjob, 'restart_step': restart_step, 'extended_from': extended_from,
+                  'exit_code': code, 'status': status, 'completed_steps': steps}
+        self.jobs.append(record)
+        self.save()
+        print(f"{job}: {status}, steps {steps[0] if steps else '-'}-{steps[-1] if steps else '-'} "
+              f"of {self.total_steps()}, {self.completed_cycles()} cycles done")
+        return record
+
+    def _next_job_name(self):
+        return f"{self.params['JOB_NAME']}_R{len(self.jobs):02d}"
+
+    def start(self):
+        """Run the first job of the chain."""
+        if self.jobs:
+            raise RuntimeError(f"{self.params['JOB_NAME']} has already been started; use resume() or extend()")
+        return self._run_job(self.params['JOB_NAME'])
+
+    def resume(self):
+        """
+        Restart from the last completed cycle and run the remaining steps.
+
+        Restarts from before the latest extension define the extended thermal
+        cycle amplitude again, since the restart data predates it.
+
+        Returns:
+            dict: Record of the restart job.
+        """
+        oldjob, step = self.restart_point()
+        if oldjob is None:
+            # Nothing to restart from: run the whole analysis again
+            return self._run_job(self._next_job_name())
+        extended_from = None
+        if self.extensions:
+            original_steps = len(step_plan(make_params(self.params, TOTAL_CYCLES=self.extensions[-1])))
+            if step <= original_steps:
+                extended_from = self.extensions[-1]
+        return self._run_job(self._next_job_name(), oldjob, step, extended_from)
+
+    def extend(self, n_cycles):
+        """
+        Add n_cycles cycles to a finished design and run them as a restart analysis.
+
+        Returns:
+            dict: Record of the restart job.
+        """
+        if self.status != 'completed':
+            raise RuntimeError(f"{self.params['JOB_NAME']} is {self.status}; resume it before extending")
+        self.extensions.append(self.params['TOTAL_CYCLES'])
+        self.params = make_params(self.params, TOTAL_CYCLES=self.params['TOTAL_CYCLES'] + n_cycles)
+        self.save()
+        return self.resume()
+
+    def run(self):
+        """
+        Start or resume the design until all steps finished or max_attempts jobs failed.
+
+        Returns:
+            str: Final status.
+        """
+        attempts = 0
+        if not self.jobs:
+            self.start()
+            attempts += 1
+        while self.status != 'completed' and attempts < self.max_attempts:
+            self.resume()
+            attempts += 1
+        return self.status
+
+
+# Example usage
+if __name__ == "__main__":
+    # python staged_run.py params.json [--extend N]
+    params = load_params(sys.argv[1]) if len(sys.argv) > 1 and sys.argv[1].endswith('.json') else dict(DEFAULT_PARAMS)
+    run = StagedRun(params)
+    if '--extend' in sys.argv:
+        print(run.extend(int(sys.argv[sys.argv.index('--extend') + 1])))
+    else:
+        print(run.run())
@@ -0,0 +1,103 @@
+import os
+import re
+import sys
+
+# Files Abaqus/Standard needs from the previous job to restart an analysis
+RESTART_FILES = ('.res', '.mdl', '.stt', '.prt', '.odb')
+
+_STEP_LINE = re.compile(r'^\*Step, name=([^,\s]+)', re.IGNORECASE)
+_RESTART_READ = re.compile(r'^\*Restart, read, step=(\d+)', re.IGNORECASE)
+
+
+def read_deck_steps(inp_path):
+    """
+    Read the steps of an input file written by inp_writer.
+
+    Returns:
+        tuple: (restart step or None, list of (step name, time period, writes restart))
+    """
+    restart_step = None
+    steps = []
+    with open(inp_path, 'r') as f:
+        lines = [line.strip() for line in f]
+    for i, line in enumerate(lines):
+        match = _RESTART_READ.match(line)
+        if match:
+            restart_step = int(match.group(1))
+        match = _STEP_LINE.match(line)
+        if match:
+            period = float(lines[i + 2].split(',')[1])
+            steps.append([match.group(1), period, False])
+        if line.lower().startswith('*restart, write, number interval') and steps:
+            steps[-1][2] = True
+    return restart_step, [tuple(step) for step in steps]
+
+
+def last_total_time(sta_path, step_number):
+    """Total time at the end of a step in a .sta file (0.0 if the step is not there)."""
+    total = 0.0
+    if os.path.exists(sta_path):
+        with open(sta_path, 'r') as f:
+            for line in f:
+                fields = line.split()
+                if len(fields) >= 9 and fields[0].isdigit() and int(fields[0]) == step_number \
+                        and not fields[2].endswith('U'):
+                    total = float(fields[6])
+    return total
+
+
+def solve(job, oldjob=None, fail_step=None, increments=4):
+    """
+    Pretend to run an Abaqus/Standard job on <job>.inp in the current directory.
+
+    Writes <job>.sta with `increments` increments per step (global step numbers
+    and total time continuing from oldjob on restarts), creates the restart
+    files of RESTART_FILES and records every step whose restart data was
+    written in <job>.res. With fail_step, the analysis cuts back and stops in
+    that step like a convergence failure.
+
+    Returns:
+        int: Exit code (0 when the analysis completed).
+    """
+    restart_step, steps = read_deck_steps(f"{job}.inp")
+    first_step = 1
+    offset = 0.0
+    with open(f"{job}.sta", 'w') as sta:
+        sta.write("Abaqus/Standard stand-in\n SUMMARY OF JOB INFORMATION:\n")
+        sta.write(" STEP  INC ATT SEVERE EQUIL TOTAL  TOTAL      STEP       INC OF\n")
+        if restart_step is not None:
+            missing = [ext for ext in RESTART_FILES if not os.path.exists(f"{oldjob}{ext}")]
+            if oldjob is None or missing:
+                sta.write(f" ***ERROR: RESTART FILES OF {oldjob} NOT FOUND {missing}\n")
+                sta.write(" THE ANALYSIS HAS NOT BEEN COMPLETED\n")
+                return 1
+            first_step = restart_step + 1
+            offset = last_total_time(f"{oldjob}.sta", restart_step)
+        for ext in RESTART_FILES:
+            open(f"{job}{ext}", 'w').close()
+        for number, (name, period, writes_restart) in enumerate(steps, first_step):
+            step_time = 0.0
+            for increment in range(1, increments + 1):
+                size = period / increments
+                if number == fail_step and increment > increments // 2:
+                    sta.write(f"{number:>5} {increment:>5}   1U   0     9     9 {offset + step_time:>10.4g} "
+                              f"{step_time:>10.4g} {size:>10.4g}\n")
+                    sta.write(" THE ANALYSIS HAS NOT BEEN COMPLETED\n")
+                    return 1
+                step_time += size
+                sta.write(f"{number:>5} {increment:>5}   1    0     2     2 {offset + step_time:>10.4g} "
+                          f"{step_time:>10.4g} {size:>10.4g}\n")
+            offset += period
+            if writes_restart:
+                with open(f"{job}.res", 'a') as res:
+                    res.write(f"{number} {name}\n")
+        sta.write(" THE ANALYSIS HAS COMPLETED SUCCESSFULLY\n")
+    return 0
+
+
+# Example usage
+if __name__ == "__main__":
+    # python standin_solver.py job=<job> [oldjob=<old>] [fail_step=<n>] [cpus=<n>] [memory=<m>] [interactive]
+    options = dict(arg.split('=', 1) for arg in sys.argv[1:] if '=' in arg)
+    fail_step = int(options['fail_step']) if 'fail_step' in options else None
+    sys.exit(solve(options['job'], options.get('oldjob'), fail_step))
@@ -0,0 +1,327 @@
+import copy
+import sys
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.stats import norm
+
+from sweep import latin_hypercube, name_designs, run_sweep
+from tct_params import get_param
+
+
+class GaussianProcess:
+    """
+    Gaussian-process regression with an ARD squared-exponential kernel.
+
+    k(a, b) = s^2 exp(-sum_d (a_d - b_d)^2 / (2 l_d^2)) plus noise variance on
+    the diagonal. Inputs should be scaled to about [0, 1]; targets are
+    standardized internally. The length scales l_d, s^2 and the noise are
+    fitted by maximizing the log marginal likelihood (L-BFGS-B with the
+    analytic gradient, from several starts).
+
+    Parameters:
+        restarts (int): Random starts of the hyperparameter fit besides the default start.
+        min_noise (float): Lower bound of the noise variance (standardized targets).
+        seed (int): Random seed of the restarts.
+    """
+
+    # Bounds of the log hyperparameters: length scales, signal variance, noise variance
+    LOG_LENGTH_BOUNDS = (np.log(1e-2), np.log(1e2))
+    LOG_SIGNAL_BOUNDS = (np.log(1e-2), np.log(1e2))
+    LOG_NOISE_MAX = np.log(1.0)
+
+    def __init__(self, restarts=3, min_noise=1e-6, seed=0):
+        self.restarts = restarts
+        self.min_noise = min_noise
+        self.seed = seed
+
+    def _kernel(self, a, b):
+        scaled_a = a / self.length_scales
+        scaled_b = b / self.length_scales
+        squared = (scaled_a ** 2).sum(axis=1)[:, None] + (scaled_b ** 2).sum(axis=1)[None, :] \
+            - 2.0 * scaled_a @ scaled_b.T
+        return self.signal * np.exp(-0.5 * np.maximum(squared, 0.0))
+
+    def _negative_log_likelihood(self, theta, X, y, differences):
+        n, d = X.shape
+        length_scales = np.exp(theta[:d])
+        signal, noise = np.exp(theta[d]), np.exp(theta[d + 1])
+        scaled = differences / length_scales[:, None, None] ** 2  # (d, n, n)
+        K_f = signal * np.exp(-0.5 * scaled.sum(axis=0))
+        K = K_f + noise * np.eye(n)
+        try:
+            factor = cho_factor(K, lower=True)
+        except np.linalg.LinAlgError:
+            return 1e25, np.zeros_like(theta)
+        alpha = cho_solve(factor, y)
+        value = 0.5 * y @ alpha + np.log(np.diag(factor[0])).sum() + 0.5 * n * np.log(2 * np.pi)
+        W = np.outer(alpha, alpha) - cho_solve(factor, np.eye(n))
+        gradient = np.empty_like(theta)
+        gradient[:d] = -0.5 * np.einsum('ij,dij->d', W, K_f[None] * scaled)
+        gradient[d] = -0.5 * np.sum(W * K_f)
+        gradient[d + 1] = -0.5 * noise * np.trace(W)
+        return value, gradient
+
+    def fit(self, X, y):
+        """
+        Fit the hyperparameters and condition on the training data.
+
+        Parameters:
+            X (np.ndarray): Inputs (n, d).
+            y (np.ndarray): Targets (n,).
+
+        Returns:
+            GaussianProcess: self
+        """
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        self.y_mean = float(y.mean())
+        self.y_scale = float(y.std()) or 1.0
+        standardized = (y - self.y_mean) / self.y_scale
+        d = X.shape[1]
+        differences = (X.T[:, :, None] - X.T[:, None, :]) ** 2
+        bounds = [self.LOG_LENGTH_BOUNDS] * d + [self.LOG_SIGNAL_BOUNDS, (np.log(self.min_noise), self.LOG_NOISE_MAX)]
+        rng = np.random.default_rng(self.seed)
+        starts = [np.concatenate([np.full(d, np.log(0.3)), [0.0, np.log(1e-2)]])]
+        starts += [np.array([rng.uniform(low, high) for low, high in bounds]) for _ in range(self.restarts)]
+        best = None
+        for start in starts:
+            result = minimize(self._negative_log_likelihood, start, args=(X, standardized, differences),
+                              jac=True, method='L-BFGS-B', bounds=bounds)
+            if best is None or result.fun < best.fun:
+                best = result
+        self.length_scales = np.exp(best.x[:d])
+        self.signal = float(np.exp(best.x[d]))
+        self.noise = float(np.exp(best.x[d + 1]))
+        self.log_likelihood = -float(best.fun)
+        return self._condition(X, standardized)
+
+    def _condition(self, X, standardized):
+        self.X = X
+        self.standardized = standardized
+        K = self._kernel(X, X) + self.noise * np.eye(X.shape[0])
+        self.factor = cho_factor(K, lower=True)
+        self.alpha = cho_solve(self.factor, standardized)
+        return self
+
+    def condition(self, X, y):
+        """
+        Copy of the process with extra observations and the same hyperparameters.
+
+        Returns:
+            GaussianProcess: The conditioned copy.
+        """
+        other = copy.copy(self)
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        standardized = (np.atleast_1d(np.asarray(y, dtype=np.float64)) - self.y_mean) / self.y_scale
+        return other._condition(np.vstack([self.X, X]), np.concatenate([self.standardized, standardized]))
+
+    def predict(self, X):
+        """
+        Predictive mean and standard deviation (without the noise) at inputs (m, d).
+
+        Returns:
+            tuple: (mean (m,), std (m,)) in target units.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        K_s = self._kernel(X, self.X)
+        mean = K_s @ self.alpha
+        v = cho_solve(self.factor, K_s.T)
+        variance = np.maximum(self.signal - np.einsum('ij,ji->i', K_s, v), 0.0)
+        return self.y_mean + self.y_scale * mean, self.y_scale * np.sqrt(variance)
+
+
+class LifeSurrogate:
+    """
+    Surrogate of a life metric of the via designs, trained on extracted results.
+
+    Design variables are parameter names as tct_params.get_param addresses
+    them ('R0_CU[1]', 'R_SI', 'P_K', ...) and are scaled to [0, 1] by their
+    bounds. The target is a failure_metrics key (first_failure, time_to_5pct,
+    ...), fitted in log space so predictions stay positive. Runs without a
+    value for the target (no failure within the simulated cycles) are left
+    out of the fit and counted in n_censored.
+
+    Parameters:
+        bounds (dict): Design variable -> (low, high).
+        target (str): Metric to predict.
+        log_target (bool): Fit the logarithm of the target.
+        gp_options: Passed to GaussianProcess.
+    """
+
+    def __init__(self, bounds, target='first_failure', log_target=True, **gp_options):
+        self.bounds = dict(bounds)
+        self.variables = list(bounds)
+        self.target = target
+        self.log_target = log_target
+        self.gp = GaussianProcess(**gp_options)
+        self.low = np.array([bounds[name][0] for name in self.variables], dtype=np.float64)
+        self.high = np.array([bounds[name][1] for name in self.variables], dtype=np.float64)
+        self.n_censored = 0
+
+    def features(self, designs):
+        """Scaled design variables (m, d) of parameter records."""
+        values = np.array([[get_param(params, name) for name in self.variables] for params in designs],
+                          dtype=np.float64).reshape(-1, len(self.variables))
+        return (values - self.low) / (self.high - self.low)
+
+    def fit(self, runs):
+        """
+        Train on solved runs.
+
+        Parameters:
+            runs (list): Dicts with 'params' and the target metric, e.g. ResultsDatabase.query()
+                rows or {'params': ..., **metrics} built from ResultCache summaries.
+
+        Returns:
+            LifeSurrogate: self
+        """
+        usable = [run for run in runs if run.get(self.target) is not None]
+        self.n_censored = len(runs) - len(usable)
+        if len(usable) < 2:
+            raise ValueError(f"Need at least 2 runs with {self.target}, got {len(usable)}")
+        y = np.array([run[self.target] for run in usable], dtype=np.float64)
+        self.gp.fit(self.features([run['params'] for run in usable]), np.log(y) if self.log_target else y)
+        return self
+
+    def predict(self, designs=None, X=None, z=1.96):
+        """
+        Predicted target with a confidence band.
+
+        Parameters:
+            designs (list): Parameter records, or
+            X (np.ndarray): their scaled features (faster for many calls).
+            z (float): Half-width of the band in standard deviations (1.96: 95 %).
+
+        Returns:
+            tuple: (prediction, lower, upper) arrays; the prediction is the median for log targets.
+        """
+        mean, std = self.gp.predict(self.features(designs) if X is None else X)
+        if self.log_target:
+            return np.exp(mean), np.exp(mean - z * std), np.exp(mean + z * std)
+        return mean, mean - z * std, mean + z * std
+
+
+# Points of the failed fraction versus time curve (metrics of result_cache.failure_metrics)
+FRACTION_TARGETS = {0.01: 'time_to_1pct', 0.05: 'time_to_5pct', 0.1: 'time_to_10pct', 0.5: 'time_to_50pct'}
+
+
+def fit_fraction_curve(runs, bounds, targets=FRACTION_TARGETS, **gp_options):
+    """
+    One LifeSurrogate per point of the failed fraction versus time curve.
+
+    Returns:
+        dict: Failed fraction -> trained LifeSurrogate of the time it is reached; fractions
+            reached by fewer than 2 runs are left out.
+    """
+    surrogates = {}
+    for fraction, target in targets.items():
+        try:
+            surrogates[fraction] = LifeSurrogate(bounds, target, **gp_options).fit(runs)
+        except ValueError:
+            continue
+    return surrogates
+
+
+def predict_fraction_curve(surrogates, designs):
+    """
+    Predicted times at which the designs reach each failed fraction.
+
+    Returns:
+        dict: Failed fraction -> (prediction, lower, upper) arrays over the designs.
+    """
+    X = None
+    curve = {}
+    for fraction, surrogate in sorted(surrogates.items()):
+        X = surrogate.features(designs) if X is None else X
+        curve[fraction] = surrogate.predict(X=X)
+    return curve
+
+
+def propose(surrogate, n, base=None, n_candidates=2000, acquisition='std', seed=0):
+    """
+    Pick the next designs worth a full FE run.
+
+    Candidates are a Latin-hypercube sample of the surrogate's bounds. With
+    acquisition 'std' the designs where the surrogate is least certain are
+    picked, with 'ei' those with the largest expected improvement of the
+    target (maximizing life). After every pick the process is conditioned
+    on its own prediction there (kriging believer), so one batch spreads
+    over the design space instead of piling up at one point.
+
+    Parameters:
+        surrogate (LifeSurrogate): Trained surrogate.
+        n (int): Designs to propose.
+        base (dict): Parameter record the candidates start from (default DEFAULT_PARAMS).
+        n_candidates (int): Size of the candidate sample.
+        acquisition (str): 'std' or 'ei'.
+        seed (int): Random seed of the candidates.
+
+    Returns:
+        list: Parameter records of the proposed designs.
+    """
+    candidates = latin_hypercube(n_candidates, surrogate.bounds, base, seed)
+    X = surrogate.features(candidates)
+    gp = surrogate.gp
+    best = float(gp.y_mean + gp.y_scale * gp.standardized.max())
+    chosen = []
+    for _ in range(n):
+        mean, std = gp.predict(X)
+        if acquisition == 'ei':
+            safe = np.maximum(std, 1e-12)
+            improvement = (mean - best) / safe
+            score = (mean - best) * norm.cdf(improvement) + safe * norm.pdf(improvement)
+        else:
+            score = std
+        score[chosen] = -np.inf
+        pick = int(np.argmax(score))
+        chosen.append(pick)
+        gp = gp.condition(X[pick], mean[pick])
+    return [candidates[i] for i in chosen]
+
+
+def active_learning(database, bounds, target='first_failure', rounds=5, batch=4, base=None, evaluate=None,
+                    acquisition='std', workdir='active_learning', mesh_defaults=None):
+    """
+    Alternate surrogate fits and full FE runs of the proposed designs.
+
+    Parameters:
+        database (ResultsDatabase): Results of the runs so far; new runs are added to it.
+        bounds (dict): Design variable -> (low, high).
+        target (str): Metric to learn.
+        rounds (int): Propose-and-run rounds.
+        batch (int): Designs run per round.
+        base (dict): Parameter record the designs start from.
+        evaluate (callable): evaluate(designs) runs the designs and stores them in the database;
+            default run_sweep(designs, workdir, database=database).
+        acquisition (str): See propose.
+        workdir (str): Directory of the default runs.
+        mesh_defaults (str): Mesh defaults file whose recorded seeds the proposed designs take
+            (see sweep.name_designs); None to keep the seeds of base.
+
+    Returns:
+        LifeSurrogate: Surrogate trained on all runs.
+    """
+    if evaluate is None:
+        def evaluate(designs):
+            return run_sweep(designs, workdir=workdir, database=database)
+    for number in range(rounds):
+        surrogate = LifeSurrogate(bounds, target).fit(database.query())
+        designs = name_designs(propose(surrogate, batch, base, acquisition=acquisition, seed=number),
+                               prefix=f"AL{number:02d}", mesh_defaults=mesh_defaults)
+        print(f"Round {number}: {len(designs)} designs proposed from {database.count()} runs")
+        evaluate(designs)
+    return LifeSurrogate(bounds, target).fit(database.query())
+
+
+# Example usage
+if __name__ == "__main__":
+    from results_db import ResultsDatabase
+    bounds = {'R0_CU[0]': (8.0, 20.0), 'R0_CU[1]': (8.0, 20.0), 'R0_CU[2]': (8.0, 20.0)}
+    with ResultsDatabase(sys.argv[1] if len(sys.argv) > 1 else 'results.db') as database:
+        surrogate = LifeSurrogate(bounds).fit(database.query())
+        for params in propose(surrogate, 4):
+            prediction, lower, upper = surrogate.predict([params])
+            print({name: round(get_param(params, name), 3) for name in bounds},
+                  f"first failure {prediction[0]:.1f} ({lower[0]:.1f} - {upper[0]:.1f})")
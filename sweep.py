@@ -0,0 +1,256 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from result_cache import ResultCache, read_run_results
+from tct_params import (MESH_DEFAULTS_FILE, default_seeds, load_mesh_defaults, make_params, save_params, save_designs,
+                        set_param, step_start_times)
+
+# Commands run per design, formatted with the design's fields ({job}, {params}, {cpus}, {memory}, {script_dir})
+BUILD_COMMAND = ['abaqus', 'cae', 'noGUI={script_dir}/tct_simulation.py', '--', '{params}']
+SOLVE_COMMAND = ['abaqus', 'job={job}', 'cpus={cpus}', 'memory={memory}', 'interactive']
+EXTRACT_COMMAND = ['abaqus', 'python', '{script_dir}/extract_failed_elements.py', '{job}.odb']
+# Builds a whole batch of designs in one CAE session (see batch_generate.py)
+BATCH_BUILD_COMMAND = ['abaqus', 'cae', 'noGUI={script_dir}/batch_generate.py', '--', '{designs}', '{output_dir}']
+
+
+def job_fields(params):
+    """Command template fields of a design's solver job: {job}, {cpus}, {memory} (MEMORY as '90%') and {script_dir}."""
+    return {'job': params['JOB_NAME'], 'cpus': params['NUM_CPUS'], 'memory': f"{params['MEMORY']}%",
+            'script_dir': os.path.dirname(os.path.abspath(__file__))}
+
+
+def grid(base=None, **axes):
+    """
+    Expand a full-factorial grid of designs.
+
+    Parameters:
+        base (dict): Parameter record the designs start from (default DEFAULT_PARAMS).
+        axes: Parameter name -> list of values; 'R0_CU[1]' addresses one profile control point.
+
+    Returns:
+        list: Parameter records, one per grid point.
+    """
+    names = list(axes)
+    designs = []
+    for values in itertools.product(*(axes[name] for name in names)):
+        designs.append(make_params(base, **dict(zip(names, values))))
+    return designs
+
+
+def latin_hypercube(n, bounds, base=None, seed=0):
+    """
+    Draw designs from a Latin-hypercube sample of continuous parameters.
+
+    Parameters:
+        n (int): Number of designs.
+        bounds (dict): Parameter name -> (low, high).
+        base (dict): Parameter record the designs start from (default DEFAULT_PARAMS).
+        seed (int): Random seed.
+
+    Returns:
+        list: Parameter records.
+    """
+    rng = np.random.default_rng(seed)
+    names = list(bounds)
+    # One stratum per design along every axis, strata shuffled independently
+    u = (rng.permuted(np.tile(np.arange(n), (len(names), 1)), axis=1).T + rng.random((n, len(names)))) / n
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    samples = low + u * (high - low)
+    return [make_params(base, **dict(zip(names, row.tolist()))) for row in samples]
+
+
+def name_designs(designs, prefix='TCT', start=0, mesh_defaults=None):
+    """
+    Give every design its own model and job name (e.g. TCT_0007).
+
+    With mesh_defaults every design also gets the converged seeds recorded
+    for its geometry family by mesh_convergence.py (see tct_params.default_seeds).
+    This is opt-in: designs that choose their seeds, e.g. of a seed sweep, keep them.
+
+    Parameters:
+        designs (list): Parameter records, changed in place.
+        prefix (str): Name prefix.
+        start (int): Number of the first design.
+        mesh_defaults (str): Mesh defaults file (e.g. MESH_DEFAULTS_FILE) whose seeds replace those of
+            the designs; None to keep the seeds of the designs.
+
+    Returns:
+        list: The named designs.
+    """
+    defaults = load_mesh_defaults(mesh_defaults) if mesh_defaults else {}
+    for i, params in enumerate(designs, start):
+        name = f"{prefix}_{i:04d}"
+        set_param(params, 'MODEL_NAME', name)
+        set_param(params, 'JOB_NAME', name)
+        for key, value in default_seeds(params, defaults).items():
+            set_param(params, key, value)
+    return designs
+
+
+class SweepTask:
+    """One design moving through build and solve."""
+
+    def __init__(self, params, workdir):
+        self.params = params
+        self.job = params['JOB_NAME']
+        self.directory = os.path.join(workdir, self.job)
+        self.params_file = os.path.join(self.directory, 'params.json')
+        self.cpus = params['NUM_CPUS']
+        self.memory = params['MEMORY']  # Percentage of the machine memory its solve may use
+        self.stage = 'pending'  # pending, build, solve, extract, done, cached or failed
+        self.process = None
+        self.log = None
+        self.times = {}
+
+    def fields(self):
+        return dict(job_fields(self.params), params=os.path.abspath(self.params_file))
+
+    def start(self, stage, command):
+        if stage == 'build':
+            os.makedirs(self.directory, exist_ok=True)
+            params = dict(self.params, CAE_PATH=f"{self.job}.cae", WRITE_INPUT=True)
+            save_params(self.params_file, params)
+        self.stage = stage
+        self.log = open(os.path.join(self.directory, f"{stage}.log"), 'w')
+        self.times[stage] = [time.time(), None]
+        args = [part.format(**self.fields()) for part in command]
+        self.process = subprocess.Popen(args, cwd=self.directory, stdout=self.log, stderr=subprocess.STDOUT,
+                                        shell=sys.platform == 'win32')
+
+    def finished(self):
+        """Return the exit code if the current stage process ended, else None."""
+        code = self.process.poll()
+        if code is not None:
+            self.times[self.stage][1] = time.time()
+            self.log.close()
+        return code
+
+    def status(self):
+        return {'job': self.job, 'stage': self.stage, 'cpus': self.cpus, 'memory': self.memory,
+                'times': {stage: (end - start if end else None) for stage, (start, end) in self.times.items()}}
+
+
+def build_batch(designs, output_dir='sweep', command=BATCH_BUILD_COMMAND):
+    """
+    Write the input files of all designs from a single CAE kernel session.
+
+    Returns:
+        int: Exit code of the batch session.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    designs_file = os.path.abspath(os.path.join(output_dir, 'designs.json'))
+    save_designs(designs_file, designs)
+    fields = {'designs': designs_file, 'output_dir': os.path.abspath(output_dir),
+              'script_dir': os.path.dirname(os.path.abspath(__file__))}
+    return subprocess.call([part.format(**fields) for part in command], shell=sys.platform == 'win32')
+
+
+def run_sweep(designs, workdir='sweep', max_concurrent=4, cpu_budget=None, build_command=BUILD_COMMAND,
+              solve_command=SOLVE_COMMAND, extract_command=EXTRACT_COMMAND, interval=10.0, status_file=None,
+              cache=None, database=None, memory_budget=None):
+    """
+    Build, solve and post-process designs under a concurrency and CPU/license budget.
+
+    Builds and extractions are single-CPU processes; solves use the design's
+    NUM_CPUS. A task only starts when both the number of running processes
+    stays within max_concurrent and the CPUs in use stay within cpu_budget;
+    with a memory budget the MEMORY percentages of the running solves also
+    stay within it.
+
+    Parameters:
+        designs (list): Named parameter records (see name_designs).
+        workdir (str): Directory that receives one sub-directory per design.
+        max_concurrent (int): Maximum number of processes running at once.
+        cpu_budget (int): Maximum CPUs (license tokens) in use at once; default os.cpu_count().
+        build_command, solve_command, extract_command (list): Command templates; replace them to use
+            a stand-in solver.
+        interval (float): Seconds between scheduler polls.
+        status_file (str): JSON file with the per-design status; default <workdir>/sweep_status.json.
+        cache (ResultCache): Designs already in the cache are skipped entirely; finished designs
+            are stored in it with their ODB as an evictable artifact.
+        database (ResultsDatabase): Finished designs are also stored in this results database.
+        memory_budget (float): Maximum sum of the MEMORY percentages of running solves (100 for the
+            whole machine); None for no memory limit.
+
+    Returns:
+        list: Final per-design status dicts.
+    """
+    cpu_budget = cpu_budget or os.cpu_count() or 1
+    status_file = status_file or os.path.join(workdir, 'sweep_status.json')
+    os.makedirs(workdir, exist_ok=True)
+    tasks = [SweepTask(params, workdir) for params in designs]
+    for task in tasks:
+        if task.cpus > cpu_budget:
+            raise ValueError(f"{task.job} needs {task.cpus} CPUs, more than the budget of {cpu_budget}")
+        if memory_budget is not None and task.memory > memory_budget:
+            raise ValueError(f"{task.job} needs {task.memory}% memory, more than the budget of {memory_budget}%")
+    commands = {'build': build_command, 'solve': solve_command, 'extract': extract_command}
+    next_stage = {'pending': 'build', 'build': 'solve', 'solve': 'extract'}
+    queue = []  # Designs waiting for their next stage, in order
+    for task in tasks:
+        if cache is not None and task.params in cache:
+            task.stage = 'cached'
+        else:
+            queue.append(task)
+    running = []
+
+    while queue or running:
+        for task in list(running):
+            code = task.finished()
+            if code is None:
+                continue
+            running.remove(task)
+            if code != 0:
+                task.stage = 'failed'
+            elif task.stage in next_stage:
+                queue.insert(0, task)  # Finish started designs before building further ones
+            else:
+                task.stage = 'done'
+                if cache is not None or database is not None:
+                    arrays, metrics = read_run_results(task.directory, step_starts=step_start_times(task.params))
+                if database is not None:
+                    database.add_run(task.params, metrics, arrays)
+                if cache is not None:
+                    odb_path = os.path.join(task.directory, f"{task.job}.odb")
+                    cache.put(task.params, metrics, arrays, [odb_path] if os.path.exists(odb_path) else [])
+
+        in_use = sum(task.cpus if task.stage == 'solve' else 1 for task in running)
+        memory_in_use = sum(task.memory for task in running if task.stage == 'solve')
+        for task in list(queue):
+            if len(running) >= max_concurrent:
+                break
+            stage = next_stage[task.stage]
+            cpus = task.cpus if stage == 'solve' else 1
+            memory = task.memory if stage == 'solve' else 0
+            if in_use + cpus > cpu_budget:
+                continue
+            if memory_budget is not None and memory_in_use + memory > memory_budget:
+                continue
+            queue.remove(task)
+            task.start(stage, commands[stage])
+            running.append(task)
+            in_use += cpus
+            memory_in_use += memory
+
+        with open(status_file, 'w') as f:
+            json.dump([task.status() for task in tasks], f, indent=1)
+        if queue or running:
+            time.sleep(interval)
+
+    return [task.status() for task in tasks]
+
+
+# Example usage
+if __name__ == "__main__":
+    # Geometry sweep at the converged seeds of its family (mesh_convergence.py)
+    designs = name_designs(grid(**{'R0_CU[1]': [10, 15, 20], 'R0_CU[2]': [8, 10, 12]}),
+                           mesh_defaults=MESH_DEFAULTS_FILE)
+    for status in run_sweep(designs, max_concurrent=4, cache=ResultCache()):
+        print(status)
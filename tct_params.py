@@ -0,0 +1,402 @@
+import copy
+import json
+import math
+import os
+import re
+
+import numpy as np
+from scipy.interpolate import lagrange
+
+from curve_sampling import adaptive_samples
+
+#-------------------------------------------------
+# Default design of tct_simulation.py
+# Units are in MMKS(mm, kg, s, kg/m^3, Pa), geometry is scaled up to 1000 times
+DEFAULT_PARAMS = {
+    # Geometry
+    'R_SI': 100,
+    'Y_SI': 100,
+    'R0_CU': [15, 15, 10],
+    'Y0_CU': [0, 60, 100],
+    'PROFILE_POINTS': 100,  # Spline points of the side wall (maximum with PROFILE_TOLERANCE)
+    'PROFILE_TOLERANCE': 1e-3,  # Radius error of the side wall spline; None samples PROFILE_POINTS uniformly
+    # Material properties (Cu)
+    'E_CU': 120e3,
+    'NU_CU': 0.34,
+    'CTE_CU': 17e-6,
+    'Y_CU': 150,
+    'K_CU': 0.401,
+    'C_CU': 390e-6,
+    'RHO_CU': 8.960e-12,
+    # Cu plasticity: sigma = P_SIGMA0 + P_K * eps^P_N sampled on [0, P_EPS_MAX]
+    'P_SIGMA0': 140.0,
+    'P_K': 69.6,
+    'P_N': 0.286,
+    'P_EPS_MAX': 0.2,
+    'P_POINTS': 200,  # Table points (maximum with P_TOLERANCE)
+    'P_TOLERANCE': 0.5,  # Stress error of the linearly interpolated table; None samples P_POINTS uniformly
+    # Cu ductile damage: initiation (strain, triaxiality, strain rate) and displacement at failure
+    'DAMAGE_INITIATION': [0.3, 0.1, 0.0],
+    'DAMAGE_DISPLACEMENT': 0.1,
+    # Material properties (Si)
+    'E_SI': 130000,
+    'NU_SI': 0.28,
+    'CTE_SI': 2.8e-6,
+    'K_SI': 0.149,
+    'C_SI': 700e-6,
+    'RHO_SI': 2.33e-12,
+    # Thermal cycle: (time, temperature) of one cycle, repeated TOTAL_CYCLES times
+    'SINGLE_CYCLE_DATA': [[0.0, 25.0], [18.33, 300.0], [28.33, 300.0], [44.33, -65.0], [54.33, -65.0],
+                          [70.0, 25.0]],
+    'TOTAL_CYCLES': 10,
+    'CYCLE_TIME': 70.0,
+    # Step incrementation
+    'INITIAL_INC': 0.1,
+    'MIN_INC': 1e-5,
+    'MAX_INC': 1.0,
+    'DELTMX': 1.0,
+    'MAX_NUM_INC': 100000,
+    # 'single' TCTCondition step, 'cycles' with one step per cycle, or 'segmented' with one step per
+    # amplitude segment of every cycle using the ramp/dwell controls below (see step_plan)
+    'STEP_MODE': 'single',
+    'TURN_INC': 0.01,  # Initial increment of a ramp, right after a temperature turning point
+    'RAMP_MAX_INC': 1.0,
+    'RAMP_DELTMX': 1.0,
+    'DWELL_MAX_INC': 10.0,
+    'RESTART_WRITE': True,  # Write restart data at the end of every cycle-closing step
+    # Output requests: 'needs' writes only what the post-processors in OUTPUT_CONSUMERS read (see
+    # output_policy.OUTPUT_NEEDS), 'preselect' the default Abaqus field and history output every increment
+    'OUTPUT_POLICY': 'needs',
+    'OUTPUT_CONSUMERS': ['failed_elements', 'cycle_jump', 'stress_extremes'],
+    'OUTPUT_FREQUENCY': 1,  # Increments between frames of the per-increment needs (STATUS, SDEG)
+    # Mesh
+    'CONTACT_SEED': 10.0,
+    'MESH_SIZE': 18.0,  # Global seed of the CAE parts; radial element size in Si in the NumPy mesher of via_mesh.py
+    'ELEM_CODE': 'C3D6T',
+    # Model reduction: 'full' (360 deg), 'quarter' (90 deg with symmetry planes x=0 and z=0) or
+    # 'axisymmetric' (CAX elements, Si block replaced by a cylinder of equal volume)
+    'SYMMETRY': 'full',
+    # Job
+    'MODEL_NAME': 'Model-1',
+    'JOB_NAME': 'ThermalAnalysis',
+    'NUM_CPUS': 1,
+    'NUM_DOMAINS': 1,
+    'MEMORY': 90,  # PERCENTAGE
+    'CAE_PATH': 'C:/Users/user/Desktop/ABAQUS/GEOMETRY/auto_model_output.cae',
+    'WRITE_INPUT': False,
+}
+
+# Parameters that define the Cu and Si materials; designs that agree on these can share material definitions
+MATERIAL_KEYS = ('E_CU', 'NU_CU', 'CTE_CU', 'Y_CU', 'K_CU', 'C_CU', 'RHO_CU', 'P_SIGMA0', 'P_K', 'P_N', 'P_EPS_MAX',
+                 'P_POINTS', 'P_TOLERANCE', 'DAMAGE_INITIATION', 'DAMAGE_DISPLACEMENT', 'E_SI', 'NU_SI', 'CTE_SI',
+                 'K_SI', 'C_SI', 'RHO_SI')
+
+# Parameters that define a geometry family sharing one converged mesh (see mesh_convergence.py)
+FAMILY_KEYS = ('SYMMETRY', 'ELEM_CODE', 'R_SI', 'Y_SI')
+# Seeds of the coarsest adequate mesh per geometry family, written by mesh_convergence.convergence_study
+MESH_DEFAULTS_FILE = 'mesh_defaults.json'
+
+SYMMETRY_MODES = ('full', 'quarter', 'axisymmetric')
+
+STEP_MODES = ('single', 'cycles', 'segmented')
+
+# Axisymmetric counterparts of the 3D coupled temperature-displacement elements
+AXISYMMETRIC_ELEMENTS = {'C3D6T': 'CAX3T', 'C3D8T': 'CAX4T'}
+
+# Increment growth factor of Abaqus/Standard after easily converged increments
+GROWTH_FACTOR = 1.5
+
+_INDEXED_KEY = re.compile(r'^(\w+)\[(\d+)\]$')
+
+
+def set_param(params, key, value):
+    """
+    Set a parameter in place; 'R0_CU[1]' addresses one entry of a list parameter.
+
+    Raises:
+        KeyError: If the parameter does not exist.
+    """
+    match = _INDEXED_KEY.match(key)
+    if match:
+        name, index = match.group(1), int(match.group(2))
+        if name not in params:
+            raise KeyError(f"Unknown parameter: {name}")
+        params[name][index] = value
+    else:
+        if key not in params:
+            raise KeyError(f"Unknown parameter: {key}")
+        params[key] = value
+
+
+def get_param(params, key):
+    """Get a parameter; 'R0_CU[1]' addresses one entry of a list parameter."""
+    match = _INDEXED_KEY.match(key)
+    if match:
+        return params[match.group(1)][int(match.group(2))]
+    return params[key]
+
+
+def make_params(base=None, **overrides):
+    """
+    Return a full parameter record: a copy of base (default DEFAULT_PARAMS) with overrides applied.
+
+    Raises:
+        KeyError: If an override names an unknown parameter.
+    """
+    params = copy.deepcopy(DEFAULT_PARAMS if base is None else base)
+    for key, value in overrides.items():
+        set_param(params, key, value)
+    return params
+
+
+def load_params(path):
+    """Load a parameter record from JSON, filling missing keys from DEFAULT_PARAMS."""
+    with open(path, 'r') as f:
+        return make_params(DEFAULT_PARAMS, **json.load(f))
+
+
+def save_params(path, params):
+    """Save a parameter record to JSON."""
+    with open(path, 'w') as f:
+        json.dump(params, f, indent=1)
+
+
+def load_designs(path):
+    """Load a list of parameter records from JSON, filling missing keys from DEFAULT_PARAMS."""
+    with open(path, 'r') as f:
+        return [make_params(DEFAULT_PARAMS, **design) for design in json.load(f)]
+
+
+def save_designs(path, designs):
+    """Save a list of parameter records to JSON."""
+    with open(path, 'w') as f:
+        json.dump(designs, f, indent=1)
+
+
+def material_key(params):
+    """Canonical string identifying the material definitions of a design."""
+    return json.dumps({key: params[key] for key in MATERIAL_KEYS}, sort_keys=True)
+
+
+def geometry_family(params, keys=FAMILY_KEYS):
+    """Name of the geometry family of a design, e.g. 'full-C3D6T-R_SI=100-Y_SI=100'."""
+    return '-'.join(f"{key}={params[key]:g}" if isinstance(params[key], (int, float)) else str(params[key])
+                    for key in keys)
+
+
+def load_mesh_defaults(path=MESH_DEFAULTS_FILE):
+    """Recorded mesh defaults per geometry family ({} if there is no file)."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def default_seeds(params, defaults, family=None):
+    """
+    Recorded seeds of a design's geometry family.
+
+    Parameters:
+        params (dict): Parameter record.
+        defaults (dict): Output of load_mesh_defaults.
+        family (str): Geometry family (default geometry_family(params)).
+
+    Returns:
+        dict: Seed name -> value; empty when the family has no recorded default.
+    """
+    record = defaults.get(family or geometry_family(params))
+    return {} if record is None else dict(record['seeds'])
+
+
+def apply_mesh_defaults(params, path=MESH_DEFAULTS_FILE, family=None):
+    """
+    Copy of a design with the recorded seeds of its geometry family (see default_seeds).
+
+    Returns:
+        dict: Parameter record; unchanged when the family has no recorded default.
+    """
+    return make_params(params, **default_seeds(params, load_mesh_defaults(path), family))
+
+
+def plastic_curve(params):
+    """True stress of Cu as a vectorized function of the plastic strain."""
+    return lambda strain: params['P_SIGMA0'] + params['P_K'] * np.asarray(strain, dtype=float) ** params['P_N']
+
+
+def plastic_table(params):
+    """
+    Plasticity true stress-strain table ((stress, strain), ...) for Cu.
+
+    With P_TOLERANCE the strains are the fewest (at most P_POINTS) for which
+    the linear interpolation Abaqus does between them stays within
+    P_TOLERANCE of the curve (curve_sampling.adaptive_samples); otherwise
+    P_POINTS equally spaced strains.
+    """
+    if params['P_TOLERANCE'] is None:
+        e_t_values = np.linspace(0, params['P_EPS_MAX'], params['P_POINTS'], endpoint=True)
+        stresses = plastic_curve(params)(e_t_values)
+    else:
+        e_t_values, stresses = adaptive_samples(plastic_curve(params), 0.0, params['P_EPS_MAX'],
+                                                params['P_TOLERANCE'], max_points=params['P_POINTS'])
+    return tuple(zip(stresses.tolist(), e_t_values.tolist()))
+
+
+def radius_function(params):
+    """Lagrange r-y relation of the via profile through (Y0_CU, R0_CU)."""
+    return lagrange(np.asarray(params['Y0_CU'], dtype=float), np.asarray(params['R0_CU'], dtype=float))
+
+
+def via_profile(params):
+    """
+    Points (r, y) of the via side wall, from the bottom (y=0) to the top (y=Y_SI).
+
+    With PROFILE_TOLERANCE the heights are the fewest (at most PROFILE_POINTS)
+    for which a cubic spline through the points stays within
+    PROFILE_TOLERANCE of the Lagrange radius; otherwise PROFILE_POINTS
+    equally spaced heights.
+    """
+    if params['PROFILE_TOLERANCE'] is None:
+        y = np.linspace(0, params['Y_SI'], params['PROFILE_POINTS'], endpoint=True)
+        r = radius_function(params)(y)
+    else:
+        y, r = adaptive_samples(radius_function(params), 0.0, float(params['Y_SI']), params['PROFILE_TOLERANCE'],
+                                'spline', max_points=params['PROFILE_POINTS'])
+    return list(zip(r.tolist(), y.tolist()))
+
+
+def amplitude_data(params):
+    """((time, temperature), ...) of the ThermalCycle amplitude over all cycles."""
+    single_cycle_data = [tuple(point) for point in params['SINGLE_CYCLE_DATA']]
+    data = list(single_cycle_data)
+    for i in range(params['TOTAL_CYCLES'] - 1):
+        for time, temp in single_cycle_data[1:]:
+            data.append((time + (i + 1) * params['CYCLE_TIME'], temp))
+    return tuple(data)
+
+
+def total_time(params):
+    """Analysis time period covering all cycles."""
+    return params['TOTAL_CYCLES'] * params['CYCLE_TIME']
+
+
+def symmetry(params):
+    """
+    Model reduction mode of a design.
+
+    Raises:
+        ValueError: If SYMMETRY is not one of SYMMETRY_MODES.
+    """
+    mode = params.get('SYMMETRY', 'full')
+    if mode not in SYMMETRY_MODES:
+        raise ValueError(f"Unknown SYMMETRY {mode!r}, expected one of {SYMMETRY_MODES}")
+    return mode
+
+
+def element_code(params):
+    """Element type used for the design: ELEM_CODE, or its CAX counterpart in axisymmetric mode."""
+    if symmetry(params) == 'axisymmetric':
+        return AXISYMMETRIC_ELEMENTS[params['ELEM_CODE']]
+    return params['ELEM_CODE']
+
+
+def axisymmetric_radius(params):
+    """Radius of the Si cylinder with the cross-section area of the square Si block (2 R_SI)^2."""
+    return float(2 * params['R_SI'] / np.sqrt(np.pi))
+
+
+def step_plan(params):
+    """
+    Analysis steps and their incrementation controls, shared by the CAE builder and the .inp writer.
+
+    In 'single' mode this is the one TCTCondition step over all cycles, in
+    'cycles' mode one step per cycle with the same controls. In
+    'segmented' mode every segment of SINGLE_CYCLE_DATA becomes its own step
+    in every cycle: ramps start with TURN_INC after the turning point and are
+    limited by RAMP_MAX_INC and RAMP_DELTMX, while dwells (constant
+    temperature, nothing to resolve without creep) are taken in increments of
+    up to DWELL_MAX_INC.
+
+    Returns:
+        list: Dicts with name, kind ('cycling', 'ramp' or 'dwell'), start (total time), period,
+            initial_inc, min_inc, max_inc, deltmx, the segment's start/end temperatures, the cycle
+            (1-based, the last one covered) and cycle_end (the step closes that cycle).
+
+    Raises:
+        ValueError: If STEP_MODE is not one of STEP_MODES.
+    """
+    mode = params.get('STEP_MODE', 'single')
+    if mode not in STEP_MODES:
+        raise ValueError(f"Unknown STEP_MODE {mode!r}, expected one of {STEP_MODES}")
+    data = params['SINGLE_CYCLE_DATA']
+    controls = {'initial_inc': params['INITIAL_INC'], 'min_inc': params['MIN_INC'], 'max_inc': params['MAX_INC'],
+                'deltmx': params['DELTMX'], 'temperatures': (data[0][1], data[-1][1]), 'cycle_end': True}
+    if mode == 'single':
+        return [dict(controls, name='TCTCondition', kind='cycling', start=0.0, period=float(total_time(params)),
+                     cycle=params['TOTAL_CYCLES'])]
+    if mode == 'cycles':
+        return [dict(controls, name=f"Cycle{cycle + 1:03d}", kind='cycling',
+                     start=round(cycle * params['CYCLE_TIME'], 10), period=float(params['CYCLE_TIME']),
+                     cycle=cycle + 1)
+                for cycle in range(params['TOTAL_CYCLES'])]
+    plan = []
+    for cycle in range(params['TOTAL_CYCLES']):
+        for segment, ((t0, temp0), (t1, temp1)) in enumerate(zip(data[:-1], data[1:]), 1):
+            period = round(float(t1 - t0), 10)
+            if temp0 == temp1:
+                kind = 'dwell'
+                initial_inc = max_inc = min(period, params['DWELL_MAX_INC'])
+                deltmx = params['DELTMX']
+            else:
+                kind = 'ramp'
+                initial_inc = min(period, params['TURN_INC'])
+                max_inc = min(period, params['RAMP_MAX_INC'])
+                deltmx = params['RAMP_DELTMX']
+            plan.append({'name': f"Cycle{cycle + 1:03d}_{kind.capitalize()}{segment}", 'kind': kind,
+                         'start': round(cycle * params['CYCLE_TIME'] + t0, 10), 'period': period,
+                         'initial_inc': initial_inc, 'min_inc': min(params['MIN_INC'], initial_inc),
+                         'max_inc': max_inc, 'deltmx': deltmx, 'temperatures': (temp0, temp1),
+                         'cycle': cycle + 1, 'cycle_end': segment == len(data) - 1})
+    return plan
+
+
+def step_start_times(params):
+    """Total time at which every step of step_plan starts, by step name."""
+    return {step['name']: step['start'] for step in step_plan(params)}
+
+
+def step_increments(params):
+    """
+    Lower bound of the increments every step of step_plan needs, without running the solver.
+
+    Every amplitude segment needs at least period / max_inc increments and,
+    on ramps, |temperature change| / deltmx increments; every step also pays
+    the growth from its initial increment. Cutbacks at turning points, which
+    a single step meets with the large increment of the preceding dwell, are
+    not included -- the solver benchmark of increment_benchmark.py measures those.
+
+    Returns:
+        list: Estimated number of increments per step.
+    """
+    points = amplitude_data(params)
+    counts = []
+    for step in step_plan(params):
+        end = step['start'] + step['period']
+        total = 0
+        first_size = None
+        for (t0, temp0), (t1, temp1) in zip(points[:-1], points[1:]):
+            if t1 <= step['start'] + 1e-9 or t0 >= end - 1e-9:
+                continue
+            n = max(math.ceil((t1 - t0) / step['max_inc'] - 1e-9),
+                    math.ceil(abs(temp1 - temp0) / step['deltmx'] - 1e-9))
+            total += n
+            if first_size is None:
+                first_size = (t1 - t0) / max(n, 1)
+        if first_size and first_size > step['initial_inc']:
+            total += math.ceil(math.log(first_size / step['initial_inc']) / math.log(GROWTH_FACTOR))
+        counts.append(total)
+    return counts
+
+
+def estimate_increments(params):
+    """Lower bound of the increments of the whole step plan (see step_increments)."""
+    return sum(step_increments(params))
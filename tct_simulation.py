@@ -1,259 +1,452 @@
 from abaqus import *
 from abaqusConstants import *
-import numpy as np
-from scipy.interpolate import lagrange
+import abaqusConstants
+import sys
 from mesh import ElemType
 import locale
 import step
 import interaction
 from regionToolset import Region
 
-locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
-#-------------------------------------------------
-#Units are in MMKS(mm, kg, s, kg/m^3, Pa)
-#Geometrical informations, Geometry is scaled up to 1000 times
-R_SI = 100
-Y_SI = 100
-R0_CU = np.array([15, 15, 10])
-Y0_CU = np.array([0, 60, Y_SI])
-#-------------------------------------------------
-#Material Properties(Cu)
-E_CU = 120e3 # Elastic Modulus
-NU_CU = 0.34 # Poisson's Ratio
-CTE_CU = 17e-6
-Y_CU = 150
-e_t_values = np.linspace(0, 0.2, 200, endpoint=True).tolist()
-P_TABLE_CU = [(140 + 69.6 * (e_t_cu ** 0.286), e_t_cu) for e_t_cu in e_t_values]
-K_CU = 0.401 #Thermal Conductivity
-C_CU = 390e-6 #Specific heat
-RHO_CU = 8.960e-12 #Density
-
-# Material Properties (Si - Silicon) in MMKS
-E_SI = 130000  # Elastic Modulus in MPa
-NU_SI = 0.28  # Poisson's Ratio
-CTE_SI = 2.8e-6  # Coefficient of Thermal Expansion in 1/°C
-K_SI = 0.149  # Thermal Conductivity in W/mm·K (converted from W/m·K)
-C_SI = 700e-6  # Specific Heat in mJ/kg·K (converted from J/kg·K)
-RHO_SI = 2.33e-12  # Density in kg/mm³ (converted from kg/m³)
-
-#-------------------------------------------------
-#r-z relation
-r_CU = lagrange(Y0_CU, R0_CU)
-ry_CU = [(r_CU(y), y) for y in np.linspace(0, Y_SI, 100, endpoint=True).tolist()]
-#-------------------------------------------------
-# 모델 생성
-mymodel = mdb.models['Model-1']
-
-cu_sketch = mymodel.ConstrainedSketch(name='revolve_profile', sheetSize=200.0)
-
-# 회전시킬 CU 반평면 제작
-v1 = cu_sketch.Spline(ry_CU)
-v2 = cu_sketch.Line(point1 = ry_CU[-1], point2 = (0, Y_SI))
-v3 = cu_sketch.Line(point1 = (0, Y_SI), point2 = (0, 0))
-v4 = cu_sketch.Line(point1 = (0, 0), point2 = ry_CU[0])
-#mysketch.CoincidentConstraint(v1, v2)
-
-rotation_axis = cu_sketch.ConstructionLine(point1=(0, 0), point2=(0, Y_SI))
-cu_sketch.assignCenterline(rotation_axis)
-
-
-
-# Cu 파트 생성 (회전 축은 Y축)
-cu_part = mymodel.Part(name='Cu',
-                  dimensionality=THREE_D,
-                  type=DEFORMABLE_BODY)
-
-# 직사각형을 Y축을 기준으로 360도 회전하여 원통 형태로 만들기
-cu_part.BaseSolidRevolve(sketch=cu_sketch, angle=360.0)
-
-
-# Si 단면 생성
-si_sketch = mymodel.ConstrainedSketch(name='Box_profile', sheetSize=200.0)
-si_sketch.rectangle(point1=(-R_SI, 0), point2=(R_SI, Y_SI))  # 정사각형 단면
-
-uncut_si_part = mymodel.Part(name='UncutSi', dimensionality=THREE_D, type=DEFORMABLE_BODY)
-uncut_si_part.BaseSolidExtrude(sketch=si_sketch, depth=2*R_SI)  # 깊이 방향은 Y축
-
-myassembly = mymodel.rootAssembly
-cu_instance = myassembly.Instance(name='Cu', part=cu_part, dependent=ON)
-uncut_si_instance = myassembly.Instance(name='UncutSi', part=uncut_si_part, dependent=ON)
-myassembly.translate(instanceList=('UncutSi',), vector=(0,0,-R_SI))
-
-si_part = myassembly.PartFromBooleanCut(
-    name='Si',
-    instanceToBeCut=uncut_si_instance,
-    cuttingInstances=(cu_instance,),
-    originalInstances=DELETE
-)
-del mymodel.parts['UncutSi']
-
-#myassembly에 assembly된 부품을 삭제하고, 새로운 부품을 assembly에 추가. 최종적인 assembly은 Cu와 Si로 구성됨
-cu_instance = myassembly.Instance(name='Cu', part=cu_part, dependent=ON)
-si_instance = myassembly.Instance(name='Si', part=si_part, dependent=ON)
-
-
-# Calculate the midpoint of the ry_CU list
-mid_index = len(ry_CU) // 2
-mid_point = ry_CU[mid_index]
-# 1. ContactSurf : Define contact surfaces for CU and SI parts
-contactsurf_cu = cu_part.Surface(name='ContactSurfCu', side1Faces=cu_part.faces.findAt(((mid_point[0], mid_point[1], 0),)))
-contactsurf_si = si_part.Surface(name='ContactSurfSi', side1Faces=si_part.faces.findAt(((mid_point[0], mid_point[1], 0),)))
-
-# 2. Volume : Create sets for all cells in Si and Cu parts
-si_part.Set(name='Sivolume', cells=si_part.cells[:])
-cu_part.Set(name='Cuvolume', cells=cu_part.cells[:])
-
-# Manually select the four lateral faces of Si
-left_face = si_part.faces.findAt(((-R_SI, Y_SI / 2, 0),))  # Left face
-right_face = si_part.faces.findAt(((R_SI, Y_SI / 2, 0),))  # Right face
-front_face = si_part.faces.findAt(((0, Y_SI / 2, -R_SI),))  # Front face
-back_face = si_part.faces.findAt(((0, Y_SI / 2, R_SI),))  # Back face
-# 3. SiLateralSurf : Combine the selected faces into a single set# Combine the selected faces into a single set
-si_part.Set(name='SiLateralSurf', faces=(left_face, right_face, front_face, back_face))
-
-
-#-------------------------------------------------
-# 구리 재료 정의
-cu_material = mymodel.Material(name = 'Cu')
-cu_material.Elastic(table=((E_CU, NU_CU),)) # Elastic Modulus and Poisson's Ratio
-cu_material.Plastic(table=P_TABLE_CU) # Plasticity true stress-strain curve
-cu_material.Expansion(table=((CTE_CU,),)) # Coefficient of Thermal Expansion
-cu_material.Density(table=((RHO_CU,),)) # Density
-cu_material.Conductivity(table=((K_CU,),)) # Thermal Conductivity
-cu_material.SpecificHeat(table=((C_CU,),)) # Specific Heat
-
-# Add ductile damage initiation to Cu material
-cu_material_fracturemode = cu_material.DuctileDamageInitiation(table=((0.3, 0.1, 0.0),))  # Example values: triaxiality, equivalent plastic strain, strain rate
-cu_material_fracturemode.DamageEvolution(type=DISPLACEMENT, softening=LINEAR, mixedModeBehavior=MODE_INDEPENDENT, table=((0.1,),))  # Example values: displacement, rate
-# 실리콘 재료 정의
-si_material = mymodel.Material(name='Si')
-si_material.Elastic(table=((E_SI, NU_SI),)) # Elastic Modulus and Poisson's Ratio
-si_material.Expansion(table=((CTE_SI,),)) # Coefficient of Thermal Expansion
-si_material.Density(table=((RHO_SI,),)) # Density
-si_material.Conductivity(table=((K_SI,),)) # Thermal Conductivity
-si_material.SpecificHeat(table=((C_SI,),)) # Specific Heat
-#-------------------------------------------------
-
-# Define Via section
-via_section = mymodel.HomogeneousSolidSection(name='Via', material='Cu', thickness=None)
-
-# Define Wafer section
-wafer_section = mymodel.HomogeneousSolidSection(name='wafer', material='Si', thickness=None)
-
-# Assign sections to parts
-cu_region = (cu_part.cells, )
-cu_part.SectionAssignment(region=cu_region, sectionName='Via')
-
-si_region = (si_part.cells, )
-si_part.SectionAssignment(region=si_region, sectionName='wafer')
-
-myassembly.regenerate() # 할 필요는 없지만 안전을 위해 assembly 최신화
-
-#-------------------------------------------------
-#Steps
-# 사용자 정의 Amplitude 생성 (온도 사이클)
-single_cycle_data = [
-    (0.0, 25.0),       # 시간 0분, 온도 25°C
-    (18.33, 300.0),    # 15도/분으로 가열하여 18.33분 후 300°C 도달
-    (28.33, 300.0),    # 10분간 300°C 유지
-    (44.33, -65.0),    # -10도/분으로 냉각하여 44.33분 후 -65°C 도달
-    (54.33, -65.0),    # 10분간 -65°C 유지
-    (70.0, 25.0)       # 15도/분으로 가열하여 70분 후 25°C 도달
-]
-
-single_cycle_data_multi = [
-    (18.33, 300.0),    # 15도/분으로 가열하여 18.33분 후 300°C 도달
-    (28.33, 300.0),    # 10분간 300°C 유지
-    (44.33, -65.0),    # -10도/분으로 냉각하여 44.33분 후 -65°C 도달
-    (54.33, -65.0),    # 10분간 -65°C 유지
-    (70.0, 25.0)       # 15도/분으로 가열하여 70분 후 25°C 도달
-]
-
-# 열사이클 반복 설정
-total_cycles = 10
-cycle_time = 70.0
-custom_amplitude_data = single_cycle_data
-for i in range(total_cycles-1):
-    for time, temp in single_cycle_data_multi:
-        custom_amplitude_data.append((time + (i+1) * cycle_time, temp))
-
-
-# Amplitude 정의
-mymodel.TabularAmplitude(name='ThermalCycle', timeSpan=TOTAL, smooth=SOLVER_DEFAULT, data=custom_amplitude_data)
-
-# Step 설정
-total_time = total_cycles * cycle_time
-
-mymodel.CoupledTempDisplacementStep(name='TCTCondition', previous='Initial', timePeriod=total_time, initialInc=0.1, minInc=1e-5, maxInc=1, deltmx=1, maxNumInc=100000)
-#-------------------------------------------------
-# Update Temperature BCs to reference sets in instances
-region_sivolume = myassembly.instances['Si'].sets['Sivolume']
-region_cuvolume = myassembly.instances['Cu'].sets['Cuvolume']
-
-mymodel.TemperatureBC(name='SiTempBC', createStepName='TCTCondition', region=region_sivolume, 
-                      distributionType=UNIFORM, fieldName='', magnitude=1.0, amplitude='ThermalCycle')
-
-mymodel.TemperatureBC(name='CuTempBC', createStepName='TCTCondition', region=region_cuvolume, 
-                      distributionType=UNIFORM, fieldName='', magnitude=1.0, amplitude='ThermalCycle')
-
-# Convert the set to a region
-region_silateralsurf = myassembly.instances['Si'].sets['SiLateralSurf']
-
-# Add boundary condition to fix the lateral surfaces
-mymodel.DisplacementBC(name='FixedSiLateral', createStepName='Initial', region=region_silateralsurf, 
-                       u1=0.0, u2=0.0, u3=0.0, 
-                       ur1=UNSET, ur2=UNSET, ur3=UNSET, 
-                       amplitude=UNSET, fixed=ON, distributionType=UNIFORM, fieldName='')
-
-
-
-# Update the CuSiTie constraint to use instance contact surfaces
-contactsurf_cu_instance = myassembly.instances['Cu'].surfaces['ContactSurfCu']
-contactsurf_si_instance = myassembly.instances['Si'].surfaces['ContactSurfSi']
-
-mymodel.Tie(name='CuSiTie', 
-    main=contactsurf_cu_instance, 
-    secondary=contactsurf_si_instance, 
-    positionToleranceMethod=COMPUTED, 
-    adjust=ON, 
-    tieRotations=ON)
-
-
-
-# Adjust mesh settings for CU and SI parts near the contact surface
-# Seed the edges near the contact surface with the same size
-
-# Assign coupled temperature-displacement element type to CU and SI parts
-cu_region = (cu_part.cells, )
-si_region = (si_part.cells, )
-
-# Define the element type for coupled temperature-displacement analysis
-cu_elem_type = ElemType(elemCode=C3D6T, elemLibrary=STANDARD)
-si_elem_type = ElemType(elemCode=C3D6T, elemLibrary=STANDARD)
-
-# Assign the element type to the regions
-cu_part.setElementType(regions=cu_region, elemTypes=(cu_elem_type,))
-si_part.setElementType(regions=si_region, elemTypes=(si_elem_type,))
+from tct_params import (DEFAULT_PARAMS, load_params, plastic_table, via_profile, amplitude_data, symmetry,
+                        element_code, axisymmetric_radius, step_plan, apply_mesh_defaults)
+from output_policy import output_plan
+from instrumentation import span, traced, write_trace
 
+locale.setlocale(locale.LC_ALL, 'en_US.UTF-8')
 
-contact_edges_cu = cu_part.edges.findAt(((mid_point[0], mid_point[1], 0),))
-contact_edges_si = si_part.edges.findAt(((mid_point[0], mid_point[1], 0),))
-
-cu_part.seedEdgeBySize(edges=contact_edges_cu, size=10.0, deviationFactor=0.1, constraint=FINER)
-si_part.seedEdgeBySize(edges=contact_edges_si, size=10.0, deviationFactor=0.1, constraint=FINER)
-
-# Generate the meshes
-cu_part.generateMesh()
-si_part.generateMesh()
-
-# Create a job for the analysis
-mdb.Job(name='ThermalAnalysis', model='Model-1', description='Thermal and mechanical analysis', 
-         type=ANALYSIS, atTime=None, waitMinutes=0, waitHours=0, queue=None, memory=90, 
-         memoryUnits=PERCENTAGE, getMemoryFromAnalysis=True, explicitPrecision=DOUBLE, 
-         nodalOutputPrecision=SINGLE, echoPrint=OFF, modelPrint=OFF, contactPrint=OFF, 
-         historyPrint=OFF, userSubroutine='', scratch='', multiprocessingMode=DEFAULT, numCpus=1, numDomains=1, numGPUs=0)
 
-mdb.saveAs(pathName='C:/Users/user/Desktop/ABAQUS/GEOMETRY/auto_model_output.cae')
-# Submit the job and wait for completion
-#mdb.jobs['ThermalAnalysis'].submit(consistencyChecking=OFF)
-#mdb.jobs['ThermalAnalysis'].waitForCompletion()
+def get_model(model_name):
+    """Return the named model, creating it if it does not exist yet."""
+    if model_name in mdb.models.keys():
+        return mdb.models[model_name]
+    return mdb.Model(name=model_name)
+
+
+@traced()
+def create_geometry(mymodel, params):
+    """
+    Create the Cu via and Si block parts, their assembly instances, surfaces and sets.
+
+    SYMMETRY 'quarter' revolves and extrudes a 90 deg sector and adds the XSymm
+    and ZSymm face sets on the cut planes; 'axisymmetric' creates the (r, y)
+    half-sections instead (see create_axisymmetric_geometry).
+
+    Returns:
+        tuple: (cu_part, si_part)
+    """
+    if symmetry(params) == 'axisymmetric':
+        return create_axisymmetric_geometry(mymodel, params)
+    quarter = symmetry(params) == 'quarter'
+    R_SI = params['R_SI']
+    Y_SI = params['Y_SI']
+    #-------------------------------------------------
+    #r-z relation
+    ry_CU = via_profile(params)
+
+    with span('sketch_revolve'):
+        cu_sketch = mymodel.ConstrainedSketch(name='revolve_profile', sheetSize=200.0)
+
+        # 회전시킬 CU 반평면 제작
+        v1 = cu_sketch.Spline(ry_CU)
+        v2 = cu_sketch.Line(point1 = ry_CU[-1], point2 = (0, Y_SI))
+        v3 = cu_sketch.Line(point1 = (0, Y_SI), point2 = (0, 0))
+        v4 = cu_sketch.Line(point1 = (0, 0), point2 = ry_CU[0])
+        #mysketch.CoincidentConstraint(v1, v2)
+
+        rotation_axis = cu_sketch.ConstructionLine(point1=(0, 0), point2=(0, Y_SI))
+        cu_sketch.assignCenterline(rotation_axis)
+
+        # Cu 파트 생성 (회전 축은 Y축)
+        cu_part = mymodel.Part(name='Cu',
+                          dimensionality=THREE_D,
+                          type=DEFORMABLE_BODY)
+
+        # 직사각형을 Y축을 기준으로 360도 회전하여 원통 형태로 만들기
+        # (quarter: +Y축에 대해 90도 회전, x >= 0, z <= 0 영역)
+        cu_part.BaseSolidRevolve(sketch=cu_sketch, angle=90.0 if quarter else 360.0)
+
+    # Si 단면 생성
+    si_sketch = mymodel.ConstrainedSketch(name='Box_profile', sheetSize=200.0)
+    if quarter:
+        si_sketch.rectangle(point1=(0, 0), point2=(R_SI, Y_SI))
+    else:
+        si_sketch.rectangle(point1=(-R_SI, 0), point2=(R_SI, Y_SI))  # 정사각형 단면
+
+    uncut_si_part = mymodel.Part(name='UncutSi', dimensionality=THREE_D, type=DEFORMABLE_BODY)
+    uncut_si_part.BaseSolidExtrude(sketch=si_sketch, depth=R_SI if quarter else 2*R_SI)  # 깊이 방향은 Y축
+
+    myassembly = mymodel.rootAssembly
+    cu_instance = myassembly.Instance(name='Cu', part=cu_part, dependent=ON)
+    uncut_si_instance = myassembly.Instance(name='UncutSi', part=uncut_si_part, dependent=ON)
+    myassembly.translate(instanceList=('UncutSi',), vector=(0,0,-R_SI))
+
+    with span('boolean_cut'):
+        si_part = myassembly.PartFromBooleanCut(
+            name='Si',
+            instanceToBeCut=uncut_si_instance,
+            cuttingInstances=(cu_instance,),
+            originalInstances=DELETE
+        )
+    del mymodel.parts['UncutSi']
+
+    #myassembly에 assembly된 부품을 삭제하고, 새로운 부품을 assembly에 추가. 최종적인 assembly은 Cu와 Si로 구성됨
+    cu_instance = myassembly.Instance(name='Cu', part=cu_part, dependent=ON)
+    si_instance = myassembly.Instance(name='Si', part=si_part, dependent=ON)
+
+    # Calculate the midpoint of the ry_CU list
+    mid_point = contact_point(params)
+    # Point on the via side wall inside the modelled sector
+    wall_point = (mid_point[0] * 0.5 ** 0.5, mid_point[1], -mid_point[0] * 0.5 ** 0.5) if quarter \
+        else (mid_point[0], mid_point[1], 0)
+    # 1. ContactSurf : Define contact surfaces for CU and SI parts
+    contactsurf_cu = cu_part.Surface(name='ContactSurfCu', side1Faces=cu_part.faces.findAt((wall_point,)))
+    contactsurf_si = si_part.Surface(name='ContactSurfSi', side1Faces=si_part.faces.findAt((wall_point,)))
+
+    # 2. Volume : Create sets for all cells in Si and Cu parts
+    si_part.Set(name='Sivolume', cells=si_part.cells[:])
+    cu_part.Set(name='Cuvolume', cells=cu_part.cells[:])
+
+    if quarter:
+        # Lateral faces x = R_SI and z = -R_SI of the quarter block
+        right_face = si_part.faces.findAt(((R_SI, Y_SI / 2, -R_SI / 2),))
+        front_face = si_part.faces.findAt(((R_SI / 2, Y_SI / 2, -R_SI),))
+        si_part.Set(name='SiLateralSurf', faces=(right_face, front_face))
+        # Symmetry planes x = 0 and z = 0
+        r_mid, y_mid = mid_point
+        cu_part.Set(name='XSymm', faces=cu_part.faces.findAt(((0, y_mid, -r_mid / 2),)))
+        si_part.Set(name='XSymm', faces=si_part.faces.findAt(((0, y_mid, -(r_mid + R_SI) / 2),)))
+        cu_part.Set(name='ZSymm', faces=cu_part.faces.findAt(((r_mid / 2, y_mid, 0),)))
+        si_part.Set(name='ZSymm', faces=si_part.faces.findAt((((r_mid + R_SI) / 2, y_mid, 0),)))
+        return cu_part, si_part
+
+    # Manually select the four lateral faces of Si
+    left_face = si_part.faces.findAt(((-R_SI, Y_SI / 2, 0),))  # Left face
+    right_face = si_part.faces.findAt(((R_SI, Y_SI / 2, 0),))  # Right face
+    front_face = si_part.faces.findAt(((0, Y_SI / 2, -R_SI),))  # Front face
+    back_face = si_part.faces.findAt(((0, Y_SI / 2, R_SI),))  # Back face
+    # 3. SiLateralSurf : Combine the selected faces into a single set# Combine the selected faces into a single set
+    si_part.Set(name='SiLateralSurf', faces=(left_face, right_face, front_face, back_face))
+    return cu_part, si_part
+
+
+@traced()
+def create_axisymmetric_geometry(mymodel, params):
+    """
+    Create axisymmetric (r, y) Cu and Si parts with the same surfaces and sets as the 3D model.
+
+    The Si block becomes a cylinder of equal volume (tct_params.axisymmetric_radius).
+    The contact surfaces are the via wall edges; the Axis edge set of Cu lies on r = 0.
+
+    Returns:
+        tuple: (cu_part, si_part)
+    """
+    R_AXI = axisymmetric_radius(params)
+    Y_SI = params['Y_SI']
+    ry_CU = via_profile(params)
+
+    # Cu 단면: 축(r = 0)과 측벽 사이
+    cu_sketch = mymodel.ConstrainedSketch(name='cu_section', sheetSize=200.0)
+    cu_sketch.ConstructionLine(point1=(0, 0), point2=(0, Y_SI))
+    cu_sketch.Spline(ry_CU)
+    cu_sketch.Line(point1=ry_CU[-1], point2=(0, Y_SI))
+    cu_sketch.Line(point1=(0, Y_SI), point2=(0, 0))
+    cu_sketch.Line(point1=(0, 0), point2=ry_CU[0])
+    cu_part = mymodel.Part(name='Cu', dimensionality=AXISYMMETRIC, type=DEFORMABLE_BODY)
+    cu_part.BaseShell(sketch=cu_sketch)
+
+    # Si 단면: 측벽과 등가 원통 외곽 사이
+    si_sketch = mymodel.ConstrainedSketch(name='si_section', sheetSize=200.0)
+    si_sketch.ConstructionLine(point1=(0, 0), point2=(0, Y_SI))
+    si_sketch.Spline(ry_CU)
+    si_sketch.Line(point1=ry_CU[-1], point2=(R_AXI, Y_SI))
+    si_sketch.Line(point1=(R_AXI, Y_SI), point2=(R_AXI, 0))
+    si_sketch.Line(point1=(R_AXI, 0), point2=ry_CU[0])
+    si_part = mymodel.Part(name='Si', dimensionality=AXISYMMETRIC, type=DEFORMABLE_BODY)
+    si_part.BaseShell(sketch=si_sketch)
+
+    myassembly = mymodel.rootAssembly
+    myassembly.Instance(name='Cu', part=cu_part, dependent=ON)
+    myassembly.Instance(name='Si', part=si_part, dependent=ON)
+
+    mid_point = contact_point(params)
+    wall_point = (mid_point[0], mid_point[1], 0)
+    cu_part.Surface(name='ContactSurfCu', side1Edges=cu_part.edges.findAt((wall_point,)))
+    si_part.Surface(name='ContactSurfSi', side1Edges=si_part.edges.findAt((wall_point,)))
+    cu_part.Set(name='Cuvolume', faces=cu_part.faces[:])
+    si_part.Set(name='Sivolume', faces=si_part.faces[:])
+    cu_part.Set(name='Axis', edges=cu_part.edges.findAt(((0, Y_SI / 2, 0),)))
+    si_part.Set(name='SiLateralSurf', edges=si_part.edges.findAt(((R_AXI, Y_SI / 2, 0),)))
+    return cu_part, si_part
+
+
+def contact_point(params):
+    """Point (r, y) on the via side wall used to pick the contact faces and edges."""
+    ry_CU = via_profile(params)
+    return ry_CU[len(ry_CU) // 2]
+
+
+@traced()
+def create_materials(mymodel, params):
+    """Create the Cu and Si materials."""
+    #-------------------------------------------------
+    # 구리 재료 정의
+    cu_material = mymodel.Material(name = 'Cu')
+    cu_material.Elastic(table=((params['E_CU'], params['NU_CU']),)) # Elastic Modulus and Poisson's Ratio
+    cu_material.Plastic(table=plastic_table(params)) # Plasticity true stress-strain curve
+    cu_material.Expansion(table=((params['CTE_CU'],),)) # Coefficient of Thermal Expansion
+    cu_material.Density(table=((params['RHO_CU'],),)) # Density
+    cu_material.Conductivity(table=((params['K_CU'],),)) # Thermal Conductivity
+    cu_material.SpecificHeat(table=((params['C_CU'],),)) # Specific Heat
+
+    # Add ductile damage initiation to Cu material
+    cu_material_fracturemode = cu_material.DuctileDamageInitiation(table=(tuple(params['DAMAGE_INITIATION']),))  # triaxiality, equivalent plastic strain, strain rate
+    cu_material_fracturemode.DamageEvolution(type=DISPLACEMENT, softening=LINEAR, mixedModeBehavior=MODE_INDEPENDENT, table=((params['DAMAGE_DISPLACEMENT'],),))  # displacement at failure
+    # 실리콘 재료 정의
+    si_material = mymodel.Material(name='Si')
+    si_material.Elastic(table=((params['E_SI'], params['NU_SI']),)) # Elastic Modulus and Poisson's Ratio
+    si_material.Expansion(table=((params['CTE_SI'],),)) # Coefficient of Thermal Expansion
+    si_material.Density(table=((params['RHO_SI'],),)) # Density
+    si_material.Conductivity(table=((params['K_SI'],),)) # Thermal Conductivity
+    si_material.SpecificHeat(table=((params['C_SI'],),)) # Specific Heat
+
+
+def part_region(params, part):
+    """Whole-part region for section and element type assignment (faces of axisymmetric parts)."""
+    if symmetry(params) == 'axisymmetric':
+        return (part.faces, )
+    return (part.cells, )
+
+
+@traced()
+def assign_sections(mymodel, params, cu_part, si_part):
+    """Create the Via and wafer sections and assign them to the parts."""
+    # Define Via section
+    via_section = mymodel.HomogeneousSolidSection(name='Via', material='Cu', thickness=None)
+
+    # Define Wafer section
+    wafer_section = mymodel.HomogeneousSolidSection(name='wafer', material='Si', thickness=None)
+
+    # Assign sections to parts
+    cu_region = part_region(params, cu_part)
+    cu_part.SectionAssignment(region=cu_region, sectionName='Via')
+
+    si_region = part_region(params, si_part)
+    si_part.SectionAssignment(region=si_region, sectionName='wafer')
+
+    mymodel.rootAssembly.regenerate() # 할 필요는 없지만 안전을 위해 assembly 최신화
+
+
+@traced()
+def create_steps(mymodel, params):
+    """Create the ThermalCycle amplitude and the analysis steps of tct_params.step_plan."""
+    #-------------------------------------------------
+    #Steps
+    # 사용자 정의 Amplitude 생성 (온도 사이클), 열사이클 반복 설정
+    mymodel.TabularAmplitude(name='ThermalCycle', timeSpan=TOTAL, smooth=SOLVER_DEFAULT, data=amplitude_data(params))
+
+    # Step 설정 (single: TCTCondition 하나, segmented: 사이클마다 구간별 step)
+    previous = 'Initial'
+    for step_data in step_plan(params):
+        mymodel.CoupledTempDisplacementStep(name=step_data['name'], previous=previous,
+                                            timePeriod=step_data['period'], initialInc=step_data['initial_inc'],
+                                            minInc=step_data['min_inc'], maxInc=step_data['max_inc'],
+                                            deltmx=step_data['deltmx'], maxNumInc=params['MAX_NUM_INC'])
+        if params['RESTART_WRITE']:
+            # 사이클이 끝나는 step의 마지막 increment에서만 restart 기록
+            mymodel.steps[step_data['name']].Restart(frequency=0, numberIntervals=1 if step_data['cycle_end'] else 0,
+                                                      overlay=OFF, timeMarks=OFF)
+        previous = step_data['name']
+
+
+@traced()
+def create_loads(mymodel, params):
+    """Create the temperature, displacement and symmetry boundary conditions and the Cu/Si tie."""
+    mode = symmetry(params)
+    first_step = step_plan(params)[0]['name']
+    myassembly = mymodel.rootAssembly
+    #-------------------------------------------------
+    # Update Temperature BCs to reference sets in instances
+    region_sivolume = myassembly.instances['Si'].sets['Sivolume']
+    region_cuvolume = myassembly.instances['Cu'].sets['Cuvolume']
+
+    mymodel.TemperatureBC(name='SiTempBC', createStepName=first_step, region=region_sivolume,
+                          distributionType=UNIFORM, fieldName='', magnitude=1.0, amplitude='ThermalCycle')
+
+    mymodel.TemperatureBC(name='CuTempBC', createStepName=first_step, region=region_cuvolume,
+                          distributionType=UNIFORM, fieldName='', magnitude=1.0, amplitude='ThermalCycle')
+
+    # Convert the set to a region
+    region_silateralsurf = myassembly.instances['Si'].sets['SiLateralSurf']
+
+    # Add boundary condition to fix the lateral surfaces
+    mymodel.DisplacementBC(name='FixedSiLateral', createStepName='Initial', region=region_silateralsurf,
+                           u1=0.0, u2=0.0, u3=UNSET if mode == 'axisymmetric' else 0.0,
+                           ur1=UNSET, ur2=UNSET, ur3=UNSET,
+                           amplitude=UNSET, fixed=ON, distributionType=UNIFORM, fieldName='')
+
+    if mode == 'quarter':
+        # Symmetry planes x = 0 and z = 0 of both parts
+        for name in ('Cu', 'Si'):
+            mymodel.XsymmBC(name=f'{name}XSymm', createStepName='Initial',
+                            region=myassembly.instances[name].sets['XSymm'], localCsys=None)
+            mymodel.ZsymmBC(name=f'{name}ZSymm', createStepName='Initial',
+                            region=myassembly.instances[name].sets['ZSymm'], localCsys=None)
+    elif mode == 'axisymmetric':
+        # No radial displacement on the axis
+        mymodel.DisplacementBC(name='CuAxis', createStepName='Initial', region=myassembly.instances['Cu'].sets['Axis'],
+                               u1=0.0, u2=UNSET, ur3=UNSET, amplitude=UNSET, fixed=OFF,
+                               distributionType=UNIFORM, fieldName='')
+
+    # Update the CuSiTie constraint to use instance contact surfaces
+    contactsurf_cu_instance = myassembly.instances['Cu'].surfaces['ContactSurfCu']
+    contactsurf_si_instance = myassembly.instances['Si'].surfaces['ContactSurfSi']
+
+    mymodel.Tie(name='CuSiTie',
+        main=contactsurf_cu_instance,
+        secondary=contactsurf_si_instance,
+        positionToleranceMethod=COMPUTED,
+        adjust=ON,
+        tieRotations=ON)
+
+
+@traced()
+def create_outputs(mymodel, params):
+    """
+    Replace the default output requests by the field output of output_policy.output_plan.
+
+    A request that pauses in some steps continues as a new request when it is
+    needed again. Nothing changes with OUTPUT_POLICY 'preselect'.
+    """
+    if params['OUTPUT_POLICY'] != 'needs':
+        return
+    myassembly = mymodel.rootAssembly
+    outputs, time_points = output_plan(params)
+    # 기본 출력 요청(F-Output-1, H-Output-1) 삭제 후 후처리에 필요한 변수만 요청
+    for name in list(mymodel.fieldOutputRequests.keys()):
+        del mymodel.fieldOutputRequests[name]
+    for name in list(mymodel.historyOutputRequests.keys()):
+        del mymodel.historyOutputRequests[name]
+    for name, points in time_points.items():
+        mymodel.TimePoint(name=name, points=tuple((point, ) for point in points))
+
+    active = {}  # output_plan request name -> (CAE request name, settings of the last step)
+    created = set()
+    for step_data, requests in zip(step_plan(params), outputs):
+        step_name = step_data['name']
+        current = {request['name']: request for request in requests}
+        for name in [name for name in active if name not in current]:
+            mymodel.fieldOutputRequests[active.pop(name)[0]].deactivate(step_name)
+        for name, request in current.items():
+            if request['time_points'] is None:
+                settings = {'frequency': request['frequency']}
+            else:
+                settings = {'timePoint': request['time_points']}
+            if name not in active:
+                cae_name = name if name not in created else f"{name}-{step_name}"
+                region = MODEL
+                if request['instance'] is not None:
+                    region = myassembly.instances[request['instance']].sets[request['elset']]
+                mymodel.FieldOutputRequest(name=cae_name, createStepName=step_name, variables=request['variables'],
+                                           region=region, **settings)
+                created.add(name)
+                active[name] = (cae_name, settings)
+            elif active[name][1] != settings:
+                mymodel.fieldOutputRequests[active[name][0]].setValuesInStep(stepName=step_name, **settings)
+                active[name] = (active[name][0], settings)
+
+
+@traced()
+def create_mesh(params, cu_part, si_part):
+    """Assign element types, seed the contact edges and mesh both parts."""
+    # Adjust mesh settings for CU and SI parts near the contact surface
+    # Seed the edges near the contact surface with the same size
+
+    # Assign coupled temperature-displacement element type to CU and SI parts
+    cu_region = part_region(params, cu_part)
+    si_region = part_region(params, si_part)
+
+    # Define the element type for coupled temperature-displacement analysis
+    elem_code = getattr(abaqusConstants, element_code(params))
+    if element_code(params) == 'CAX3T':
+        cu_part.setMeshControls(regions=cu_part.faces, elemShape=TRI)
+        si_part.setMeshControls(regions=si_part.faces, elemShape=TRI)
+    cu_elem_type = ElemType(elemCode=elem_code, elemLibrary=STANDARD)
+    si_elem_type = ElemType(elemCode=elem_code, elemLibrary=STANDARD)
+
+    # Assign the element type to the regions
+    cu_part.setElementType(regions=cu_region, elemTypes=(cu_elem_type,))
+    si_part.setElementType(regions=si_region, elemTypes=(si_elem_type,))
+
+    mid_point = contact_point(params)
+    contact_edges_cu = cu_part.edges.findAt(((mid_point[0], mid_point[1], 0),))
+    contact_edges_si = si_part.edges.findAt(((mid_point[0], mid_point[1], 0),))
+
+    # Global seed of both parts (v6.py: seedPartInstance size=18.0), refined along the contact edges
+    cu_part.seedPart(size=params['MESH_SIZE'], deviationFactor=0.2, minSizeFactor=0.1)
+    si_part.seedPart(size=params['MESH_SIZE'], deviationFactor=0.2, minSizeFactor=0.1)
+    cu_part.seedEdgeBySize(edges=contact_edges_cu, size=params['CONTACT_SEED'], deviationFactor=0.1, constraint=FINER)
+    si_part.seedEdgeBySize(edges=contact_edges_si, size=params['CONTACT_SEED'], deviationFactor=0.1, constraint=FINER)
+
+    # Generate the meshes
+    with span('generate_mesh'):
+        cu_part.generateMesh()
+        si_part.generateMesh()
+
+
+@traced()
+def create_job(params, model_name):
+    """Create the analysis job for a model."""
+    return mdb.Job(name=params['JOB_NAME'], model=model_name, description='Thermal and mechanical analysis',
+                   type=ANALYSIS, atTime=None, waitMinutes=0, waitHours=0, queue=None, memory=params['MEMORY'],
+                   memoryUnits=PERCENTAGE, getMemoryFromAnalysis=True, explicitPrecision=DOUBLE,
+                   nodalOutputPrecision=SINGLE, echoPrint=OFF, modelPrint=OFF, contactPrint=OFF,
+                   historyPrint=OFF, userSubroutine='', scratch='', multiprocessingMode=DEFAULT,
+                   numCpus=params['NUM_CPUS'], numDomains=params['NUM_DOMAINS'], numGPUs=0)
+
+
+@traced()
+def build_model(params, model_name=None, material_source=None):
+    """
+    Build the TCT model of one design and its job.
+
+    Parameters:
+        params (dict): Parameter record (see tct_params.DEFAULT_PARAMS).
+        model_name (str): Model to build into; defaults to params['MODEL_NAME'].
+        material_source (Model): Model whose materials are copied instead of being
+            created again (it must have the same tct_params.material_key).
+
+    Returns:
+        Model: The built model.
+    """
+    model_name = model_name or params['MODEL_NAME']
+    # 모델 생성
+    mymodel = get_model(model_name)
+    cu_part, si_part = create_geometry(mymodel, params)
+    if material_source is not None:
+        mymodel.copyMaterials(sourceModel=material_source)
+    else:
+        create_materials(mymodel, params)
+    assign_sections(mymodel, params, cu_part, si_part)
+    create_steps(mymodel, params)
+    create_loads(mymodel, params)
+    create_outputs(mymodel, params)
+    create_mesh(params, cu_part, si_part)
+    # Create a job for the analysis
+    create_job(params, model_name)
+    return mymodel
+
+
+if __name__ == "__main__":
+    # abaqus cae noGUI=tct_simulation.py -- params.json
+    params = load_params(sys.argv[-1]) if sys.argv[-1].endswith('.json') else apply_mesh_defaults(DEFAULT_PARAMS)
+    build_model(params)
+    if params['WRITE_INPUT']:
+        with span('write_input'):
+            mdb.jobs[params['JOB_NAME']].writeInput(consistencyChecking=OFF)
+    with span('save_cae'):
+        mdb.saveAs(pathName=params['CAE_PATH'])
+    write_trace()  # TCT_TRACE=trace.json
+    # Submit the job and wait for completion
+    #mdb.jobs[params['JOB_NAME']].submit(consistencyChecking=OFF)
+    #mdb.jobs[params['JOB_NAME']].waitForCompletion()
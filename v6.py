@@ -20,11 +20,16 @@ import connectorBehavior
 import numpy as np
 from scipy.interpolate import lagrange
 
+from curve_sampling import adaptive_samples
+from instrumentation import stage, write_trace
+from tct_params import DEFAULT_PARAMS
+
 #Geometrical informations
 R_SI = 75
 Y_SI = 100
 R0_CU = np.array([15, 25, 10])
 Y0_CU = np.array([0, 60, Y_SI])
+PROFILE_TOLERANCE = DEFAULT_PARAMS['PROFILE_TOLERANCE'] # Radius error of the side wall spline (at most 100 points)
 
 
 #-------------------------------------------------
@@ -50,24 +55,28 @@ DEN_SI = 2330000e-12
 CTE_SI = 2.8e-06
 SH_SI = 700.0e6
 
-def s_t_cu(e_t_cu): #Plasticity true stress-strain curve
-    if e_t_cu <= 0.02:
-        return 8.0e4 * e_t_cu +0.001
-    else:
-        return 69.6 * (e_t_cu ** 0.286)
-P_TABLE_CU = tuple((s_t_cu(e_t_cu), e_t_cu) for e_t_cu in np.linspace(0., 0.2, 200, endpoint=True).tolist())
+def s_t_cu(e_t_cu): #Plasticity true stress-strain curve (vectorized over an array of strains)
+    e_t_cu = np.asarray(e_t_cu, dtype=float)
+    return np.where(e_t_cu <= 0.02, 8.0e4 * e_t_cu + 0.001, 69.6 * e_t_cu ** 0.286)
+P_TOLERANCE = DEFAULT_PARAMS['P_TOLERANCE'] # Stress error of the table (at most 200 points)
+# Fewest strains whose linear interpolation stays within P_TOLERANCE, kink at 0.02 always sampled
+E_T_CU, S_T_CU = adaptive_samples(s_t_cu, 0., 0.2, P_TOLERANCE, max_points=200, breakpoints=(0.02,))
+P_TABLE_CU = tuple(zip(S_T_CU.tolist(), E_T_CU.tolist()))
 
 
 
 
 #Cohesive Contact
 
+stage('profile_curves')  # TCT_TRACE=trace.json traces every stage below
 #-------------------------------------------------
 #r-z relation
 r_CU = lagrange(Y0_CU, R0_CU)
-ry_CU = [(r_CU(y), y) for y in np.linspace(0, Y_SI, 100, endpoint=True).tolist()]
+Y_PROFILE, R_PROFILE = adaptive_samples(r_CU, 0., float(Y_SI), PROFILE_TOLERANCE, 'spline', max_points=100)
+ry_CU = list(zip(R_PROFILE.tolist(), Y_PROFILE.tolist()))
 #-------------------------------------------------
 # 모델 생성
+stage('sketch_revolve')
 mymodel = mdb.models['Model-1']
 
 cu_sketch = mymodel.ConstrainedSketch(name='revolve_profile', sheetSize=200.0)
@@ -93,6 +102,7 @@ cu_part = mymodel.Part(name='Cu',
 cu_part.BaseSolidRevolve(sketch=cu_sketch, angle=360.0)
 
 
+stage('si_block')
 # Si 단면 생성
 si_sketch = mymodel.ConstrainedSketch(name='Box_profile', sheetSize=200.0)
 si_sketch.rectangle(point1=(-R_SI, 0), point2=(R_SI, Y_SI))  # 정사각형 단면
@@ -105,6 +115,7 @@ cu_instance = myassembly.Instance(name='Cu', part=cu_part, dependent=ON)
 uncut_si_instance = myassembly.Instance(name='UncutSi', part=uncut_si_part, dependent=ON)
 myassembly.translate(instanceList=('UncutSi',), vector=(0,0,-R_SI))
 
+stage('boolean_cut')
 si_part = myassembly.PartFromBooleanCut(
     name='Si',
     instanceToBeCut=uncut_si_instance,
@@ -114,6 +125,7 @@ si_part = myassembly.PartFromBooleanCut(
 del mymodel.parts['UncutSi']
 
 
+stage('materials')
 ##Material Properties
 cu_material = mymodel.Material(name='Cu')
 cu_material.Density(table=((DEN_CU, ), ))
@@ -131,6 +143,7 @@ si_material.Density(table=((DEN_SI, ), ))
 si_material.Expansion(table=((CTE_SI, ), ))
 si_material.SpecificHeat(table=((SH_SI, ), ))
 
+stage('sections')
 #Section & Section assignment
 mymodel.HomogeneousSolidSection(name='Cu', material='Cu', thickness=None)
 mymodel.HomogeneousSolidSection(name='Si', material='Si', thickness=None)
@@ -147,6 +160,7 @@ cells = c.getSequenceFromMask(mask=('[#1 ]', ), )
 region = p1.Set(cells=cells, name='Set-1')
 p1.SectionAssignment(region=region, sectionName='Si', offset=0.0, offsetType=MIDDLE_SURFACE, offsetField='', thicknessAssignment=FROM_SECTION)
 
+stage('assembly')
 #Assembly
 a2 = mymodel.rootAssembly
 a2.DatumCsysByDefault(CARTESIAN)
@@ -155,6 +169,7 @@ a2.Instance(name='Cu-1', part=p, dependent=OFF)
 p = mymodel.parts['Si']
 a2.Instance(name='Si-1', part=p, dependent=OFF)
 
+stage('mesh_controls')
 #Mesh
 a1 = mymodel.rootAssembly
 c1 = a1.instances['Cu-1'].cells
@@ -174,12 +189,14 @@ a1.setElementType(regions=pickedRegions, elemTypes=(elemType1, elemType2))
 a1 = mymodel.rootAssembly
 partInstances =(a1.instances['Cu-1'], a1.instances['Si-1'], )
 a1.seedPartInstance(regions=partInstances, size=18.0, deviationFactor=0.2,minSizeFactor=0.1)
+stage('generate_mesh')
 a1.generateMesh(regions=partInstances)
 
 
 
 
 
+stage('steps_loads')
 #Amplitude
 mymodel.PeriodicAmplitude(name='Amp-1', timeSpan=STEP,  frequency=0.5, start=0.0, a_0=1.0, data=((0.0, 1.0), ))
 
@@ -214,6 +231,7 @@ region = a1.Set(vertices=verts1+verts2, edges=edges1+edges2, faces=faces1+faces2
 mymodel.TemperatureBC(name='BC-3', createStepName='Step-1', region=region, fixed=OFF, distributionType=UNIFORM, fieldName='', magnitude=50.0, amplitude='Amp-1')
 
 
+stage('job_submit')
 #Job
 
 mdb.Job(name='mymodel', model=mymodel, description='', type=ANALYSIS, 
@@ -223,7 +241,5 @@ mdb.Job(name='mymodel', model=mymodel, description='', type=ANALYSIS,
         contactPrint=OFF, historyPrint=OFF, userSubroutine='', scratch='', 
         resultsFormat=ODB)
 mdb.jobs['mymodel'].submit(consistencyChecking=OFF)
-
-
-
-
+stage(None)
+write_trace()
@@ -0,0 +1,359 @@
+import math
+
+import numpy as np
+
+from extract_failed_elements import ELEMENT_FACES, volumes_from_arrays
+from tct_params import AXISYMMETRIC_ELEMENTS, axisymmetric_radius, radius_function, symmetry
+
+# Node indices (0-based) of the edges S1, S2, ... of 2D elements, by node count
+ELEMENT_EDGES = {
+    3: ((0, 1), (1, 2), (2, 0)),
+    4: ((0, 1), (1, 2), (2, 3), (3, 0)),
+}
+
+
+class PartMesh:
+    """
+    Mesh of one part as arrays, ready to be written to an input file.
+
+    Attributes:
+        name (str): Part name.
+        coords (np.ndarray): Node coordinates (n, 3), or (n, 2) as (r, y) for axisymmetric parts;
+            node labels are row + 1.
+        elements (dict): Element type -> connectivity (m, k) by node label, labelled consecutively
+            in insertion order starting at 1.
+        nsets (dict): Node set name -> node labels.
+        elsets (dict): Element set name -> element labels.
+        surfaces (dict): Surface name -> {face number: element labels}.
+    """
+
+    def __init__(self, name, coords):
+        self.name = name
+        self.coords = coords
+        self.elements = {}
+        self.nsets = {}
+        self.elsets = {}
+        self.surfaces = {}
+
+    @property
+    def node_labels(self):
+        return np.arange(1, self.coords.shape[0] + 1)
+
+    def element_labels(self):
+        """Return element type -> labels, numbered consecutively over all types."""
+        labels = {}
+        start = 1
+        for elem_type, connectivity in self.elements.items():
+            labels[elem_type] = np.arange(start, start + connectivity.shape[0])
+            start += connectivity.shape[0]
+        return labels
+
+    def all_element_labels(self):
+        return np.arange(1, sum(c.shape[0] for c in self.elements.values()) + 1)
+
+    def add_surface(self, name, node_labels):
+        """Create an element-based surface of all element faces (edges in 2D) whose nodes all lie in node_labels."""
+        on_surface = np.zeros(self.coords.shape[0] + 1, dtype=bool)
+        on_surface[node_labels] = True
+        faces = {}
+        element_labels = self.element_labels()
+        face_table = ELEMENT_EDGES if self.coords.shape[1] == 2 else ELEMENT_FACES
+        for elem_type, connectivity in self.elements.items():
+            for number, face in enumerate(face_table[connectivity.shape[1]], 1):
+                hit = on_surface[connectivity[:, list(face)]].all(axis=1)
+                if hit.any():
+                    faces[number] = np.concatenate([faces.get(number, np.zeros(0, dtype=np.int64)),
+                                                    element_labels[elem_type][hit]])
+        self.surfaces[name] = faces
+
+
+def orient(coords, connectivity):
+    """
+    Reorder wedge/hex connectivity (0-based) so every element has a positive volume in Abaqus convention.
+    """
+    n = connectivity.shape[1]
+    mask = np.ones(connectivity.shape, dtype=bool)
+    volume = volumes_from_arrays(np.arange(coords.shape[0]), coords, connectivity, mask, signed=True)
+    flipped = volume < 0
+    if n == 6:
+        order = [0, 2, 1, 3, 5, 4]
+    else:
+        order = [0, 3, 2, 1, 4, 7, 6, 5]
+    connectivity[flipped] = connectivity[flipped][:, order]
+    return connectivity
+
+
+def signed_areas(coords, connectivity):
+    """Signed areas of 2D elements (0-based connectivity); counterclockwise elements are positive."""
+    x = coords[connectivity, 0]
+    y = coords[connectivity, 1]
+    return 0.5 * (x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y).sum(axis=1)
+
+
+def split_hexes(connectivity):
+    """Split each hex (0-based, bottom quad then top quad) into two wedges."""
+    first = connectivity[:, [0, 1, 2, 4, 5, 6]]
+    second = connectivity[:, [0, 2, 3, 4, 6, 7]]
+    return np.stack([first, second], axis=1).reshape(-1, 6)
+
+
+def square_perimeter(half_width, n_theta, count=None):
+    """
+    Points uniformly spaced along the perimeter of a square block cross-section.
+
+    Point i lies at perimeter parameter 8 i / n_theta, starting at (half_width, 0) and turning
+    counterclockwise in the x-z plane, so point i matches the ray at angle 2 pi i / n_theta
+    at every corner and edge midpoint.
+
+    Parameters:
+        half_width (float): Half the side of the square.
+        n_theta (int): Points on the whole perimeter.
+        count (int): Number of points to return, starting at i = 0 (default n_theta).
+
+    Returns:
+        tuple: (x (count,), z (count,))
+    """
+    u = 8.0 * np.arange(n_theta if count is None else count) / n_theta
+    x = np.select([u < 1, u < 3, u < 5, u < 7], [np.ones_like(u), 2 - u, -np.ones_like(u), u - 6], np.ones_like(u))
+    z = np.select([u < 1, u < 3, u < 5, u < 7], [u, np.ones_like(u), 4 - u, -np.ones_like(u)], u - 8)
+    return half_width * x, half_width * z
+
+
+def mesh_divisions(params):
+    """
+    Default mesh divisions from the seed sizes.
+
+    CONTACT_SEED sets the element size along the Cu/Si interface (axial and
+    circumferential) and in the Cu radius; MESH_SIZE sets the radial size in Si.
+
+    Returns:
+        dict: n_theta (multiple of 8), n_y, n_r_cu, n_r_si.
+    """
+    seed = params['CONTACT_SEED']
+    y = np.linspace(0, params['Y_SI'], 101)
+    r = radius_function(params)(y)
+    r_max = float(r.max())
+    return {
+        'n_theta': 8 * max(1, math.ceil(2 * math.pi * r_max / (8 * seed))),
+        'n_y': max(2, math.ceil(params['Y_SI'] / seed)),
+        'n_r_cu': max(1, round(r_max / seed)),
+        'n_r_si': max(1, math.ceil((params['R_SI'] - float(r.min())) / params['MESH_SIZE'])),
+    }
+
+
+def via_mesh(params, n_theta=None, n_y=None, n_r_cu=None, n_r_si=None):
+    """
+    Mesh a revolved Lagrange-profiled Cu via inside a square Si block.
+
+    The via axis is y, as in tct_simulation.py. Cu is meshed with wedges on
+    the axis and hex rings around them; Si is a mapped mesh from the via wall
+    to the square block boundary. The two parts have coincident but separate
+    interface nodes, joined by the CuSiTie constraint like the CAE model.
+    With ELEM_CODE 'C3D6T' every hex is split into two wedges.
+
+    SYMMETRY 'quarter' meshes the sector x >= 0, z <= 0 that the CAE builder
+    revolves (90 deg about +y) and adds the XSymm (x = 0) and ZSymm (z = 0)
+    node sets of both parts;
+    'axisymmetric' returns the 2D mesh of axisymmetric_mesh instead.
+
+    Parameters:
+        params (dict): Parameter record (see tct_params.DEFAULT_PARAMS).
+        n_theta, n_y, n_r_cu, n_r_si (int): Divisions around (over 360 deg), along, and across Cu
+            and Si; defaults from mesh_divisions.
+
+    Returns:
+        tuple: (Cu PartMesh, Si PartMesh)
+    """
+    divisions = mesh_divisions(params)
+    n_theta = n_theta or divisions['n_theta']
+    n_y = n_y or divisions['n_y']
+    n_r_cu = n_r_cu or divisions['n_r_cu']
+    n_r_si = n_r_si or divisions['n_r_si']
+    mode = symmetry(params)
+    if mode == 'axisymmetric':
+        return axisymmetric_mesh(params, n_y, n_r_cu, n_r_si)
+    if n_theta % 8:
+        raise ValueError("n_theta must be a multiple of 8 so the block corners get nodes")
+
+    y = np.linspace(0, params['Y_SI'], n_y + 1)
+    r = radius_function(params)(y)
+    quarter = mode == 'quarter'
+    # Node columns around the axis; the quarter sector keeps both of its bounding planes
+    n_around = n_theta // 4 + 1 if quarter else n_theta
+    theta = 2 * np.pi * np.arange(n_around) / n_theta
+    # The quarter sector turns from +x toward -z like tct_simulation.create_geometry
+    cos, sin = np.cos(theta), -np.sin(theta) if quarter else np.sin(theta)
+    split = params['ELEM_CODE'] == 'C3D6T'
+    i = np.arange(n_around - 1 if quarter else n_around)
+    i_next = (i + 1) % n_around
+
+    # Cu: per layer one axis node followed by n_r_cu rings of n_around nodes
+    per_layer = 1 + n_r_cu * n_around
+    rho = r[:, None, None] * (np.arange(1, n_r_cu + 1) / n_r_cu)[None, :, None]  # (layer, ring, 1)
+    ring_x = (rho * cos).reshape(n_y + 1, -1)
+    ring_z = (rho * sin).reshape(n_y + 1, -1)
+    x = np.concatenate([np.zeros((n_y + 1, 1)), ring_x], axis=1)
+    z = np.concatenate([np.zeros((n_y + 1, 1)), ring_z], axis=1)
+    cu_coords = np.stack([x, np.repeat(y[:, None], per_layer, axis=1), z], axis=-1).reshape(-1, 3)
+
+    def cu_node(layer, ring, sector):
+        return layer * per_layer + np.where(ring == 0, 0, 1 + (ring - 1) * n_around + sector)
+
+    layers = np.arange(n_y)
+    L, I = np.meshgrid(layers, i, indexing='ij')
+    L, I = L.ravel(), I.ravel()
+    I1 = i_next[I]
+    zero = np.zeros_like(L)
+    one = np.ones_like(L)
+    cu_wedges = np.column_stack([cu_node(L, zero, I), cu_node(L, one, I), cu_node(L, one, I1),
+                                 cu_node(L + 1, zero, I), cu_node(L + 1, one, I), cu_node(L + 1, one, I1)])
+    cu_hexes = []
+    for ring in range(1, n_r_cu):
+        k = np.full_like(L, ring)
+        cu_hexes.append(np.column_stack([cu_node(L, k, I), cu_node(L, k + 1, I), cu_node(L, k + 1, I1),
+                                         cu_node(L, k, I1), cu_node(L + 1, k, I), cu_node(L + 1, k + 1, I),
+                                         cu_node(L + 1, k + 1, I1), cu_node(L + 1, k, I1)]))
+    cu = _assemble('Cu', cu_coords, cu_wedges, cu_hexes, split)
+    cu_outer = cu_node(np.repeat(np.arange(n_y + 1), n_around), np.full((n_y + 1) * n_around, n_r_cu),
+                       np.tile(np.arange(n_around), n_y + 1)) + 1
+    cu.nsets['Cuvolume'] = cu.node_labels
+    cu.elsets['Cuvolume'] = cu.all_element_labels()
+    cu.add_surface('ContactSurfCu', cu_outer)
+
+    # Si: per layer n_r_si + 1 rings from the via wall to the block boundary
+    px, pz = square_perimeter(params['R_SI'], n_theta, n_around)
+    if quarter:
+        pz = -pz
+    t = (np.arange(n_r_si + 1) / n_r_si)[None, :, None]
+    wall_x = r[:, None, None] * cos
+    wall_z = r[:, None, None] * sin
+    si_x = wall_x + t * (px - wall_x)
+    si_z = wall_z + t * (pz - wall_z)
+    si_y = np.broadcast_to(y[:, None, None], si_x.shape)
+    si_coords = np.stack([si_x, si_y, si_z], axis=-1).reshape(-1, 3)
+
+    def si_node(layer, ring, sector):
+        return (layer * (n_r_si + 1) + ring) * n_around + sector
+
+    si_hexes = []
+    for ring in range(n_r_si):
+        k = np.full_like(L, ring)
+        si_hexes.append(np.column_stack([si_node(L, k, I), si_node(L, k + 1, I), si_node(L, k + 1, I1),
+                                         si_node(L, k, I1), si_node(L + 1, k, I), si_node(L + 1, k + 1, I),
+                                         si_node(L + 1, k + 1, I1), si_node(L + 1, k, I1)]))
+    si = _assemble('Si', si_coords, np.zeros((0, 6), dtype=np.int64), si_hexes, split)
+    all_layers = np.repeat(np.arange(n_y + 1), n_around)
+    all_sectors = np.tile(np.arange(n_around), n_y + 1)
+    si.nsets['Sivolume'] = si.node_labels
+    si.elsets['Sivolume'] = si.all_element_labels()
+    si.nsets['SiLateralSurf'] = si_node(all_layers, np.full_like(all_layers, n_r_si), all_sectors) + 1
+    si.add_surface('ContactSurfSi', si_node(all_layers, np.zeros_like(all_layers), all_sectors) + 1)
+    if quarter:
+        tolerance = 1e-9 * params['R_SI']
+        for part in (cu, si):
+            on_x_plane = np.abs(part.coords[:, 0]) < tolerance
+            on_z_plane = np.abs(part.coords[:, 2]) < tolerance
+            part.coords[on_x_plane, 0] = 0.0
+            part.coords[on_z_plane, 2] = 0.0
+            part.nsets['XSymm'] = part.node_labels[on_x_plane]
+            part.nsets['ZSymm'] = part.node_labels[on_z_plane]
+    return cu, si
+
+
+def axisymmetric_mesh(params, n_y, n_r_cu, n_r_si):
+    """
+    Mesh the (r, y) half-section of the via for CAX elements.
+
+    The square Si block is replaced by a cylinder of equal cross-section
+    (tct_params.axisymmetric_radius). Both parts are mapped quad meshes, split
+    into triangles for CAX3T, with the same sets and surfaces as the 3D mesh
+    plus the Axis node set of Cu on r = 0.
+
+    Returns:
+        tuple: (Cu PartMesh, Si PartMesh)
+    """
+    y = np.linspace(0, params['Y_SI'], n_y + 1)
+    r = radius_function(params)(y)
+    elem_type = AXISYMMETRIC_ELEMENTS[params['ELEM_CODE']]
+
+    def quads(n_r):
+        L, K = np.meshgrid(np.arange(n_y), np.arange(n_r), indexing='ij')
+        first = L.ravel() * (n_r + 1) + K.ravel()
+        above = first + n_r + 1
+        # Counterclockwise in the (r, y) plane
+        return np.column_stack([first, first + 1, above + 1, above])
+
+    def part(name, inner, outer, n_r):
+        radius = inner[:, None] + (np.arange(n_r + 1) / n_r)[None, :] * (outer - inner)[:, None]
+        coords = np.stack([radius, np.broadcast_to(y[:, None], radius.shape)], axis=-1).reshape(-1, 2)
+        mesh = PartMesh(name, coords)
+        connectivity = quads(n_r)
+        if elem_type == 'CAX3T':
+            connectivity = np.stack([connectivity[:, [0, 1, 2]], connectivity[:, [0, 2, 3]]], axis=1).reshape(-1, 3)
+        mesh.elements[elem_type] = connectivity + 1
+        ring = np.tile(np.arange(n_r + 1), n_y + 1)
+        return mesh, ring
+
+    cu, cu_ring = part('Cu', np.zeros_like(r), r, n_r_cu)
+    cu.nsets['Cuvolume'] = cu.node_labels
+    cu.elsets['Cuvolume'] = cu.all_element_labels()
+    cu.nsets['Axis'] = cu.node_labels[cu_ring == 0]
+    cu.add_surface('ContactSurfCu', cu.node_labels[cu_ring == n_r_cu])
+
+    si, si_ring = part('Si', r, np.full_like(r, axisymmetric_radius(params)), n_r_si)
+    si.nsets['Sivolume'] = si.node_labels
+    si.elsets['Sivolume'] = si.all_element_labels()
+    si.nsets['SiLateralSurf'] = si.node_labels[si_ring == n_r_si]
+    si.add_surface('ContactSurfSi', si.node_labels[si_ring == 0])
+    return cu, si
+
+
+def expand_to_full(centroids, params, n_theta=None):
+    """
+    Map element centroids of a reduced model to positions in the full 360 deg model.
+
+    Quarter models (x >= 0, z <= 0 in both builders) are mirrored about the
+    x = 0 and z = 0 planes, so every element appears four times.
+    Axisymmetric (r, y) centroids are revolved to n_theta positions around the
+    y axis; each copy stands for 1 / n_theta of the element's ring.
+
+    Parameters:
+        centroids (np.ndarray): (n, 3) centroids; for axisymmetric models x is the radius
+            ((n, 2) arrays are accepted too).
+        params (dict): Parameter record of the reduced model.
+        n_theta (int): Positions per ring for axisymmetric models (default from mesh_divisions).
+
+    Returns:
+        tuple: (full-model coordinates (m, 3), source row (m,) of every copy in centroids)
+            -- index per-element results with the source rows, e.g. failure_times[source].
+    """
+    centroids = np.asarray(centroids, dtype=np.float64)
+    rows = np.arange(centroids.shape[0])
+    mode = symmetry(params)
+    if mode == 'full':
+        return centroids[:, :3].copy(), rows
+    if mode == 'quarter':
+        signs = np.array([[1, 1, 1], [-1, 1, 1], [1, 1, -1], [-1, 1, -1]], dtype=np.float64)
+        coords = (signs[:, None, :] * centroids[None, :, :3]).reshape(-1, 3)
+        return coords, np.tile(rows, len(signs))
+    n_theta = n_theta or mesh_divisions(params)['n_theta']
+    theta = 2 * np.pi * (np.arange(n_theta) + 0.5) / n_theta
+    radius, height = centroids[:, 0], centroids[:, 1]
+    coords = np.stack([radius[None, :] * np.cos(theta)[:, None],
+                       np.broadcast_to(height, (n_theta, height.size)),
+                       radius[None, :] * np.sin(theta)[:, None]], axis=-1).reshape(-1, 3)
+    return coords, np.tile(rows, n_theta)
+
+
+def _assemble(name, coords, wedges, hexes, split):
+    """Orient the elements of a part and store them with 1-based node labels."""
+    part = PartMesh(name, coords)
+    hexes = np.concatenate(hexes) if hexes else np.zeros((0, 8), dtype=np.int64)
+    if split:
+        wedges = np.concatenate([wedges, split_hexes(hexes)])
+        hexes = np.zeros((0, 8), dtype=np.int64)
+    if wedges.shape[0]:
+        part.elements['C3D6T'] = orient(coords, wedges) + 1
+    if hexes.shape[0]:
+        part.elements['C3D8T'] = orient(coords, hexes) + 1
+    return part